@@ -10,67 +10,16 @@ import pandas as pd
 import sqlite3
 from datetime import datetime
 
+from school_migrations import migrate
+from school_store import UPSERT_ATTENDANCE_SQL, UPSERT_GRADE_SQL
+
 # Database setup
 conn = sqlite3.connect('school.db')
 c = conn.cursor()
 
-# Create tables if they don't exist
-def init_db():
-    c.execute('''CREATE TABLE IF NOT EXISTS students
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 roll_no TEXT UNIQUE,
-                 class TEXT,
-                 section TEXT,
-                 dob DATE,
-                 gender TEXT,
-                 address TEXT,
-                 parent_name TEXT,
-                 parent_contact TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS teachers
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 emp_id TEXT UNIQUE,
-                 subject TEXT,
-                 qualification TEXT,
-                 dob DATE,
-                 gender TEXT,
-                 address TEXT,
-                 contact TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS classes
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 class_name TEXT UNIQUE,
-                 section TEXT,
-                 class_teacher_id INTEGER,
-                 room_no TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS subjects
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 subject_name TEXT UNIQUE,
-                 subject_code TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS attendance
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 student_id INTEGER,
-                 date DATE,
-                 status TEXT,
-                 FOREIGN KEY(student_id) REFERENCES students(id))''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS grades
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 student_id INTEGER,
-                 subject_id INTEGER,
-                 term TEXT,
-                 grade TEXT,
-                 remarks TEXT,
-                 FOREIGN KEY(student_id) REFERENCES students(id),
-                 FOREIGN KEY(subject_id) REFERENCES subjects(id))''')
-    
-    conn.commit()
-
-init_db()
+# Create or upgrade the tables with the main app's migrations, whose unique
+# indexes the attendance and grade saves below upsert against
+migrate(conn)
 
 # Page configuration
 st.set_page_config(
@@ -79,37 +28,40 @@ st.set_page_config(
     layout="wide"
 )
 
-
+# Each page is a function run by st.navigation, so a rerun only executes
+# the queries and widgets of the page that is open
 
 # Dashboard Page
-st.title("🏫 School Management Dashboard")
-    
+def dashboard_page():
+    st.title("🏫 School Management Dashboard")
+
     # Get counts from database
-student_count = c.execute("SELECT COUNT(*) FROM students").fetchone()[0]
-teacher_count = c.execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
-class_count = c.execute("SELECT COUNT(*) FROM classes").fetchone()[0]
-    
+    student_count = c.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    teacher_count = c.execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
+    class_count = c.execute("SELECT COUNT(*) FROM classes").fetchone()[0]
+
     # Display metrics
-col1, col2, col3 = st.columns(3)
-with col1:
+    col1, col2, col3 = st.columns(3)
+    with col1:
         st.metric("Total Students", student_count)
-with col2:
+    with col2:
         st.metric("Total Teachers", teacher_count)
-with col3:
+    with col3:
         st.metric("Total Classes", class_count)
-    
+
     # Recent activity
-st.subheader("Recent Activity")
-recent_students = pd.read_sql("SELECT name, roll_no, class FROM students ORDER BY id DESC LIMIT 5", conn)
-st.dataframe(recent_students)
+    st.subheader("Recent Activity")
+    recent_students = pd.read_sql("SELECT name, roll_no, class FROM students ORDER BY id DESC LIMIT 5", conn)
+    st.dataframe(recent_students)
 
 # Student Management
-st.title("👨‍🎓 Student Management")
-    
-operation = st.selectbox("Select Operation", ["Add Student", "View Students", "Update Student", "Delete Student"])
-    
-if operation == "Add Student":
-    with st.form("add_student_form"):
+def student_page():
+    st.title("👨‍🎓 Student Management")
+
+    operation = st.selectbox("Select Operation", ["Add Student", "View Students", "Update Student", "Delete Student"])
+
+    if operation == "Add Student":
+        with st.form("add_student_form"):
             col1, col2 = st.columns(2)
             with col1:
                 name = st.text_input("Full Name*")
@@ -121,9 +73,9 @@ if operation == "Add Student":
                 gender = st.selectbox("Gender", ["Male", "Female", "Other"])
                 parent_name = st.text_input("Parent/Guardian Name")
                 parent_contact = st.text_input("Parent/Guardian Contact")
-            
+
             address = st.text_area("Address")
-            
+
             if st.form_submit_button("Add Student"):
                 if name and roll_no and class_name:
                     try:
@@ -135,26 +87,27 @@ if operation == "Add Student":
                         st.error("Roll number must be unique!")
                 else:
                     st.warning("Please fill all required fields (*)")
-    
-students = pd.read_sql("SELECT * FROM students", conn)
-st.dataframe(students)
-        
+
+    elif operation == "View Students":
+        students = pd.read_sql("SELECT * FROM students", conn)
+        st.dataframe(students)
+
         # Search functionality
-st.subheader("Search Students")
-search_term = st.text_input("Search by name or roll number")
-if search_term:
-            search_results = pd.read_sql("SELECT * FROM students WHERE name LIKE ? OR roll_no LIKE ?", 
+        st.subheader("Search Students")
+        search_term = st.text_input("Search by name or roll number")
+        if search_term:
+            search_results = pd.read_sql("SELECT * FROM students WHERE name LIKE ? OR roll_no LIKE ?",
                                         conn, params=(f"%{search_term}%", f"%{search_term}%"))
             st.dataframe(search_results)
-    
-elif operation == "Update Student":
+
+    elif operation == "Update Student":
         students = pd.read_sql("SELECT id, name, roll_no FROM students", conn)
         selected_student = st.selectbox("Select Student", students['name'] + " (" + students['roll_no'] + ")")
-        
+
         if selected_student:
             student_id = students.loc[students['name'] + " (" + students['roll_no'] + ")" == selected_student, 'id'].values[0]
             student_data = c.execute("SELECT * FROM students WHERE id = ?", (student_id,)).fetchone()
-            
+
             with st.form("update_student_form"):
                 col1, col2 = st.columns(2)
                 with col1:
@@ -167,19 +120,19 @@ elif operation == "Update Student":
                     gender = st.selectbox("Gender", ["Male", "Female", "Other"], index=["Male", "Female", "Other"].index(student_data[6]))
                     parent_name = st.text_input("Parent/Guardian Name", value=student_data[8])
                     parent_contact = st.text_input("Parent/Guardian Contact", value=student_data[9])
-                
+
                 address = st.text_area("Address", value=student_data[7])
-                
+
                 if st.form_submit_button("Update Student"):
                     c.execute("UPDATE students SET name=?, roll_no=?, class=?, section=?, dob=?, gender=?, address=?, parent_name=?, parent_contact=? WHERE id=?",
                             (name, roll_no, class_name, section, dob, gender, address, parent_name, parent_contact, student_id))
                     conn.commit()
                     st.success("Student updated successfully!")
-    
-elif operation == "Delete Student":
+
+    elif operation == "Delete Student":
         students = pd.read_sql("SELECT id, name, roll_no FROM students", conn)
         selected_student = st.selectbox("Select Student to Delete", students['name'] + " (" + students['roll_no'] + ")")
-        
+
         if selected_student and st.button("Delete Student"):
             student_id = students.loc[students['name'] + " (" + students['roll_no'] + ")" == selected_student, 'id'].values[0]
             c.execute("DELETE FROM students WHERE id=?", (student_id,))
@@ -187,12 +140,12 @@ elif operation == "Delete Student":
             st.success("Student deleted successfully!")
 
 # Teacher Management (similar structure as student)
+def teacher_page():
+    st.title("👨‍🏫 Teacher Management")
+
+    operation = st.selectbox("Select Operation", ["Add Teacher", "View Teachers", "Update Teacher", "Delete Teacher"])
 
-st.title("👨‍🏫 Teacher Management")
-    
-operation = st.selectbox("Select Operation", ["Add Teacher", "View Teachers", "Update Teacher", "Delete Teacher"])
-    
-if operation == "Add Teacher":
+    if operation == "Add Teacher":
         with st.form("add_teacher_form"):
             col1, col2 = st.columns(2)
             with col1:
@@ -204,9 +157,9 @@ if operation == "Add Teacher":
                 dob = st.date_input("Date of Birth", max_value=datetime.now().date())
                 gender = st.selectbox("Gender", ["Male", "Female", "Other"])
                 contact = st.text_input("Contact Number")
-            
+
             address = st.text_area("Address")
-            
+
             if st.form_submit_button("Add Teacher"):
                 if name and emp_id:
                     try:
@@ -218,25 +171,26 @@ if operation == "Add Teacher":
                         st.error("Employee ID must be unique!")
                 else:
                     st.warning("Please fill all required fields (*)")
-    
-elif operation == "View Teachers":
+
+    elif operation == "View Teachers":
         teachers = pd.read_sql("SELECT * FROM teachers", conn)
         st.dataframe(teachers)
-    
+
     # Similar update and delete functionality as students
     # ... (implementation similar to student section)
 
 # Class Management
-st.title("👥 Class Management")
-    
-operation = st.selectbox("Select Operation", ["Add Class", "View Classes", "Assign Class Teacher", "Delete Class"])
-    
-if operation == "Add Class":
+def class_page():
+    st.title("👥 Class Management")
+
+    operation = st.selectbox("Select Operation", ["Add Class", "View Classes", "Assign Class Teacher", "Delete Class"])
+
+    if operation == "Add Class":
         with st.form("add_class_form"):
             class_name = st.text_input("Class Name*")
             section = st.text_input("Section")
             room_no = st.text_input("Room Number")
-            
+
             if st.form_submit_button("Add Class"):
                 if class_name:
                     try:
@@ -248,36 +202,37 @@ if operation == "Add Class":
                         st.error("Class name must be unique!")
                 else:
                     st.warning("Please fill all required fields (*)")
-    
-elif operation == "View Classes":
+
+    elif operation == "View Classes":
         classes = pd.read_sql("SELECT * FROM classes", conn)
         st.dataframe(classes)
-    
-elif operation == "Assign Class Teacher":
+
+    elif operation == "Assign Class Teacher":
         classes = pd.read_sql("SELECT id, class_name FROM classes", conn)
         teachers = pd.read_sql("SELECT id, name FROM teachers", conn)
-        
+
         selected_class = st.selectbox("Select Class", classes['class_name'])
         selected_teacher = st.selectbox("Select Teacher", teachers['name'])
-        
+
         if st.button("Assign Teacher"):
             class_id = classes.loc[classes['class_name'] == selected_class, 'id'].values[0]
             teacher_id = teachers.loc[teachers['name'] == selected_teacher, 'id'].values[0]
-            
+
             c.execute("UPDATE classes SET class_teacher_id=? WHERE id=?", (teacher_id, class_id))
             conn.commit()
             st.success(f"Assigned {selected_teacher} as class teacher for {selected_class}")
 
 # Subject Management
-st.title("📚 Subject Management")
-    
-operation = st.selectbox("Select Operation", ["Add Subject", "View Subjects", "Delete Subject"])
-    
-if operation == "Add Subject":
+def subject_page():
+    st.title("📚 Subject Management")
+
+    operation = st.selectbox("Select Operation", ["Add Subject", "View Subjects", "Delete Subject"])
+
+    if operation == "Add Subject":
         with st.form("add_subject_form"):
             subject_name = st.text_input("Subject Name*")
             subject_code = st.text_input("Subject Code")
-            
+
             if st.form_submit_button("Add Subject"):
                 if subject_name:
                     try:
@@ -289,26 +244,27 @@ if operation == "Add Subject":
                         st.error("Subject name must be unique!")
                 else:
                     st.warning("Please fill all required fields (*)")
-    
-elif operation == "View Subjects":
+
+    elif operation == "View Subjects":
         subjects = pd.read_sql("SELECT * FROM subjects", conn)
         st.dataframe(subjects)
 
 # Attendance Management
-st.title("📅 Attendance Management")
-    
-operation = st.selectbox("Select Operation", ["Mark Attendance", "View Attendance"])
-    
-if operation == "Mark Attendance":
+def attendance_page():
+    st.title("📅 Attendance Management")
+
+    operation = st.selectbox("Select Operation", ["Mark Attendance", "View Attendance"])
+
+    if operation == "Mark Attendance":
         date = st.date_input("Select Date", datetime.now().date())
         selected_class = st.selectbox("Select Class", pd.read_sql("SELECT class_name FROM classes", conn)['class_name'])
-        
+
         if date and selected_class:
             students = pd.read_sql("SELECT id, name, roll_no FROM students WHERE class=?", conn, params=(selected_class,))
-            
+
             if not students.empty:
                 st.subheader(f"Attendance for {selected_class} on {date}")
-                
+
                 attendance_data = []
                 for _, student in students.iterrows():
                     status = st.radio(
@@ -321,34 +277,34 @@ if operation == "Mark Attendance":
                         'date': date,
                         'status': status
                     })
-                
+
                 if st.button("Save Attendance"):
                     for record in attendance_data:
-                        c.execute("INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
+                        c.execute(UPSERT_ATTENDANCE_SQL,
                                 (record['student_id'], record['date'], record['status']))
                     conn.commit()
                     st.success("Attendance saved successfully!")
             else:
                 st.warning("No students found in this class")
-elif operation == "View Attendance":
+    elif operation == "View Attendance":
         date = st.date_input("Select Date to View")
         selected_class = st.selectbox("Select Class", pd.read_sql("SELECT class_name FROM classes", conn)['class_name'])
-        
+
         if date and selected_class and st.button("View Attendance"):
             attendance = pd.read_sql('''
-                SELECT s.name, s.roll_no, a.status 
+                SELECT s.name, s.roll_no, a.status
                 FROM attendance a
                 JOIN students s ON a.student_id = s.id
                 WHERE a.date = ? AND s.class = ?
             ''', conn, params=(date, selected_class))
-            
+
             if not attendance.empty:
                 st.dataframe(attendance)
-                
+
                 # Attendance summary
                 present_count = len(attendance[attendance['status'] == 'Present'])
                 absent_count = len(attendance[attendance['status'] == 'Absent'])
-                
+
                 col1, col2 = st.columns(2)
                 col1.metric("Present Students", present_count)
                 col2.metric("Absent Students", absent_count)
@@ -356,20 +312,21 @@ elif operation == "View Attendance":
                 st.warning("No attendance records found for this date and class")
 
 # Grade Management
-st.title("🎓 Grade Management")
-operation = st.selectbox("Select Operation", ["Add Grades", "View Grades"])
-    
-if operation == "Add Grades":
+def grade_page():
+    st.title("🎓 Grade Management")
+    operation = st.selectbox("Select Operation", ["Add Grades", "View Grades"])
+
+    if operation == "Add Grades":
         selected_class = st.selectbox("Select Class", pd.read_sql("SELECT DISTINCT class FROM students", conn)['class'])
         selected_subject = st.selectbox("Select Subject", pd.read_sql("SELECT subject_name FROM subjects", conn)['subject_name'])
         term = st.selectbox("Select Term", ["First Term", "Mid Term", "Final Term"])
-        
+
         students = pd.read_sql("SELECT id, name, roll_no FROM students WHERE class=?", conn, params=(selected_class,))
-        
-        
-        if not students.empty:
+
+        if not students.empty and selected_subject:
+            subject_id = c.execute("SELECT id FROM subjects WHERE subject_name=?", (selected_subject,)).fetchone()[0]
             st.subheader(f"Enter Grades for {selected_subject} - {term}")
-            
+
             grades_data = []
             for _, student in students.iterrows():
                 col1, col2 = st.columns([3, 1])
@@ -381,9 +338,9 @@ if operation == "Add Grades":
                         ["A+", "A", "B+", "B", "C+", "C", "D", "F"],
                         key=f"grade_{student['id']}"
                     )
-                
+
                 remarks = st.text_input("Remarks", key=f"remarks_{student['id']}")
-                
+
                 grades_data.append({
                     'student_id': student['id'],
                     'subject_id': subject_id,
@@ -391,21 +348,18 @@ if operation == "Add Grades":
                     'grade': grade,
                     'remarks': remarks
                 })
-            
+
             if st.button("Save Grades"):
                 for record in grades_data:
-                    c.execute('''
-                        INSERT INTO grades (student_id, subject_id, term, grade, remarks)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (record['student_id'], record['subject_id'], record['term'], record['grade'], record['remarks']))
+                    c.execute(UPSERT_GRADE_SQL, (record['student_id'], record['subject_id'], record['term'], record['grade'], record['remarks']))
                 conn.commit()
                 st.success("Grades saved successfully!")
-    
-elif operation == "View Grades":
+
+    elif operation == "View Grades":
         selected_class = st.selectbox("Select Class", pd.read_sql("SELECT DISTINCT class FROM students", conn)['class'])
-        selected_student = st.selectbox("Select Student", 
+        selected_student = st.selectbox("Select Student",
                                       pd.read_sql("SELECT name FROM students WHERE class=?", conn, params=(selected_class,))['name'])
-        
+
         if selected_student and st.button("View Grades"):
             grades = pd.read_sql('''
                 SELECT g.term, s.subject_name, g.grade, g.remarks
@@ -415,14 +369,23 @@ elif operation == "View Grades":
                 WHERE st.name = ?
                 ORDER BY g.term
             ''', conn, params=(selected_student,))
-            
+
             if not grades.empty:
                 st.dataframe(grades)
             else:
                 st.warning("No grades found for this student")
 
+# Sidebar navigation
+page = st.navigation([
+    st.Page(dashboard_page, title="Dashboard", icon="🏫", default=True),
+    st.Page(student_page, title="Student", icon="👨‍🎓"),
+    st.Page(teacher_page, title="Teacher", icon="👨‍🏫"),
+    st.Page(class_page, title="Class", icon="👥"),
+    st.Page(subject_page, title="Subject", icon="📚"),
+    st.Page(attendance_page, title="Attendance", icon="📅"),
+    st.Page(grade_page, title="Grades", icon="🎓"),
+])
+page.run()
+
 # Close connection when done
 conn.close()
-
-
-
@@ -6,118 +6,236 @@ Created on Sun Aug 10 15:05:26 2025
 """
 
 import streamlit as st
-import pandas as pd
 import sqlite3
+import math
+import os
+import tempfile
+import time
 from datetime import datetime
 from streamlit_option_menu import option_menu
 
-# Database setup
-conn = sqlite3.connect('school.db')
-c = conn.cursor()
-
-# Create tables if they don't exist
-def init_db():
-    c.execute('''CREATE TABLE IF NOT EXISTS students
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 roll_no TEXT UNIQUE,
-                 class TEXT,
-                 section TEXT,
-                 dob DATE,
-                 gender TEXT,
-                 address TEXT,
-                 parent_name TEXT,
-                 parent_contact TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS teachers
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 name TEXT NOT NULL,
-                 emp_id TEXT UNIQUE,
-                 subject TEXT,
-                 qualification TEXT,
-                 dob DATE,
-                 gender TEXT,
-                 address TEXT,
-                 contact TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS classes
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 class_name TEXT UNIQUE,
-                 section TEXT,
-                 class_teacher_id INTEGER,
-                 room_no TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS subjects
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 subject_name TEXT UNIQUE,
-                 subject_code TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS attendance
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 student_id INTEGER,
-                 date DATE,
-                 status TEXT,
-                 FOREIGN KEY(student_id) REFERENCES students(id))''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS grades
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                 student_id INTEGER,
-                 subject_id INTEGER,
-                 term TEXT,
-                 grade TEXT,
-                 remarks TEXT,
-                 FOREIGN KEY(student_id) REFERENCES students(id),
-                 FOREIGN KEY(subject_id) REFERENCES subjects(id))''')
-    
-    conn.commit()
-
-init_db()
+from grade_analytics import GradeAnalytics
+from attendance_analytics import (
+    CHRONIC_ABSENCE_RATE,
+    absence_streaks,
+    available_months,
+    chronic_absentees,
+    class_rates,
+    class_trend,
+    month_bounds,
+    student_rates,
+)
+from report_cards import REPORT_CARDS_DIR, generate as generate_report_cards
+from school_db import DB_PATH, ConnectionPool
+from school_export import export
+from school_import import GENDERS, IMPORTS, import_file
+from school_migrations import migrate
+from school_store import (
+    GRADES,
+    PICK_LIMIT,
+    TERMS,
+    add_class,
+    add_student,
+    add_subject,
+    add_teacher,
+    assign_class_teacher,
+    attendance_sheet,
+    class_attendance,
+    class_names,
+    class_students,
+    class_table,
+    count_rows,
+    dashboard_stats,
+    delete_student,
+    filter_options,
+    get_student,
+    gradebook,
+    gradebook_changes,
+    list_page,
+    page_cursor,
+    save_attendance,
+    recent_activity,
+    save_grades,
+    pick_students,
+    search_students,
+    student_classes,
+    student_transcript,
+    subject_id_by_name,
+    subject_names,
+    subject_table,
+    teacher_list,
+    update_student,
+)
+from school_trace import TRACE_LOG_PATH, TracingConnection, tracer
+from school_writer import SchoolWriter
 
-# Page configuration
+# Page configuration: must be the first Streamlit call, ahead of the cached
+# setup below, whose first run (migrations) can show a spinner or warnings
 st.set_page_config(
     page_title="School DBMS",
     page_icon="🏫",
     layout="wide"
 )
 
+# Database setup
+@st.cache_resource
+def get_connection_pool():
+    """One pool per server process; schema migrations run once, on creation"""
+    pool = ConnectionPool(DB_PATH, factory=TracingConnection)
+    migrate(pool.connection())
+    return pool
+
+@st.cache_resource
+def get_grade_analytics():
+    """Per-class grade analytics shared by all sessions"""
+    return GradeAnalytics()
+
+@st.cache_resource
+def get_writer():
+    """The one thread writing to school.db, shared by all sessions"""
+    return SchoolWriter(DB_PATH, factory=TracingConnection)
+
+conn = get_connection_pool().connection()
+writer = get_writer()
+
+def show_listing(table, filter_labels, sort_options, noun):
+    """Filtered, sorted, keyset-paginated view of the students or teachers table"""
+    options = filter_options(conn, table)
+    cols = st.columns(len(filter_labels) + 2)
+    filters = {}
+    for col, (column, label) in zip(cols, filter_labels.items()):
+        choice = col.selectbox(label, ["All"] + options[column], key=f"{table}_filter_{column}")
+        if choice != "All":
+            filters[column] = choice
+    sort_label = cols[-2].selectbox("Sort By", list(sort_options), key=f"{table}_sort")
+    page_size = cols[-1].selectbox("Rows per Page", [25, 50, 100], key=f"{table}_page_size")
+    sort, descending = sort_options[sort_label]
+    
+    # Stack of cursors for the pages visited so far; a new query starts over
+    query = (tuple(sorted(filters.items())), sort_label, page_size)
+    pages = st.session_state.get(f"{table}_pages")
+    if pages is None or pages["query"] != query:
+        pages = st.session_state[f"{table}_pages"] = {"query": query, "cursors": [None], "next": None}
+    
+    # One extra row tells us whether there is a next page
+    page = list_page(conn, table, filters, sort, descending, pages["cursors"][-1], page_size + 1)
+    has_next = len(page) > page_size
+    page = page.head(page_size)
+    pages["next"] = page_cursor(page, sort) if has_next else None
+    st.dataframe(page, hide_index=True, use_container_width=True)
+    
+    total = count_rows(conn, table, filters)
+    col1, col2, col3 = st.columns([1, 4, 1])
+    col1.button("Previous", key=f"{table}_prev", disabled=len(pages["cursors"]) == 1,
+                on_click=lambda: pages["cursors"].pop())
+    col2.caption(f"Page {len(pages['cursors'])} of {max(1, math.ceil(total / page_size))} "
+                 f"· {total} {noun}")
+    col3.button("Next", key=f"{table}_next", disabled=not has_next,
+                on_click=lambda: pages["cursors"].append(pages["next"]))
+
+def student_picker(label, key):
+    """Roll number or name prefix search; returns the chosen student's id or None"""
+    prefix = st.text_input("Roll number or name starts with", key=f"{key}_prefix")
+    if not prefix.strip():
+        return None
+    matches = pick_students(conn, prefix)
+    if not matches:
+        st.info("No students match")
+        return None
+    if len(matches) == PICK_LIMIT:
+        st.caption(f"First {PICK_LIMIT} matches, keep typing to narrow the list")
+    return st.selectbox(label, list(matches), format_func=matches.get, key=key)
+
+def show_import(table, noun):
+    """Bulk import of students or teachers from an uploaded CSV or Excel file"""
+    spec = IMPORTS[table]
+    st.caption(f"Columns: {', '.join(spec['columns'])}. Required: {', '.join(spec['required'])}. "
+               "Headers are matched ignoring case, and spaces may stand for underscores.")
+    upload = st.file_uploader("CSV or Excel file", type=["csv", "xlsx"], key=f"{table}_import_file")
+    if upload is not None and st.button(f"Import {noun.title()}"):
+        bar = st.progress(0.0)
+        result = import_file(conn, table, upload, filename=upload.name, writer=writer,
+                             progress=lambda r: bar.progress(min(upload.tell() / upload.size, 1.0),
+                                                             text=f"{r.read} rows read"))
+        bar.empty()
+        st.success(f"Imported {result.inserted} of {result.read} {noun} in {result.seconds:.1f} s")
+        rejected = result.rejected
+        if not rejected.empty:
+            st.warning(f"{len(rejected)} rows were rejected")
+            st.dataframe(rejected.head(100), hide_index=True)
+            st.download_button("Download Error Report", result.error_report(),
+                               file_name=f"{table}_import_errors.csv", mime="text/csv")
+
+def show_export(kind, filters):
+    """Stream attendance or grades rows straight into a CSV or Parquet download"""
+    fmt = st.radio("Format", ["CSV", "Parquet"], horizontal=True, key=f"{kind}_export_format")
+    if st.button("Prepare Export", key=f"{kind}_export"):
+        # Spooled to disk, so the only in-memory copy is the one the download serves
+        with tempfile.TemporaryFile() as spool:
+            started = time.perf_counter()
+            count = export(conn, kind, spool, fmt.lower(), **filters)
+            st.caption(f"{count} rows exported in {time.perf_counter() - started:.1f} s")
+            spool.seek(0)
+            mime = "text/csv" if fmt == "CSV" else "application/vnd.apache.parquet"
+            st.download_button(f"Download {fmt}", spool.read(), file_name=f"{kind}.{fmt.lower()}",
+                               mime=mime, on_click="ignore")
+
 # Sidebar navigation
 with st.sidebar:
     selected = option_menu(
         menu_title="Main Menu",
-        options=["Dashboard", "Student", "Teacher", "Class", "Subject", "Attendance", "Grades"],
-        icons=["house", "person", "person-badge", "people", "book", "calendar-check", "award"],
+        options=["Dashboard", "Student", "Teacher", "Class", "Subject", "Attendance", "Grades", "Admin"],
+        icons=["house", "person", "person-badge", "people", "book", "calendar-check", "award", "speedometer2"],
         menu_icon="cast",
         default_index=0,
     )
+    
+    writes = writer.stats()
+    if writes["jobs"]:
+        st.caption(f"Writes: {writes['jobs']} in {writes['batches']} transactions, "
+                   f"p95 {writes.get('p95_ms', 0):.0f} ms, {writes['retries']} retries")
 
 # Dashboard Page
 if selected == "Dashboard":
     st.title("🏫 School Management Dashboard")
     
-    # Get counts from database
-    student_count = c.execute("SELECT COUNT(*) FROM students").fetchone()[0]
-    teacher_count = c.execute("SELECT COUNT(*) FROM teachers").fetchone()[0]
-    class_count = c.execute("SELECT COUNT(*) FROM classes").fetchone()[0]
+    # Counters kept current by triggers, so this doesn't scan any table
+    today = datetime.now().date()
+    stats = dashboard_stats(conn, today)
     
     # Display metrics
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Students", student_count)
+        st.metric("Total Students", stats.get("students", 0))
     with col2:
-        st.metric("Total Teachers", teacher_count)
+        st.metric("Total Teachers", stats.get("teachers", 0))
     with col3:
-        st.metric("Total Classes", class_count)
+        st.metric("Total Classes", stats.get("classes", 0))
+    with col4:
+        st.metric("Total Subjects", stats.get("subjects", 0))
+    
+    st.subheader(f"Attendance Today ({today})")
+    present = stats["attendance"].get("Present", 0)
+    absent = stats["attendance"].get("Absent", 0)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Present", present)
+    col2.metric("Absent", absent)
+    col3.metric("Attendance Rate", f"{present / (present + absent):.0%}" if present + absent else "-")
+    
+    st.subheader("Grades Entered")
+    for col, term in zip(st.columns(len(TERMS)), TERMS):
+        col.metric(term, stats["grades"].get(term, 0))
     
     # Recent activity
     st.subheader("Recent Activity")
-    recent_students = pd.read_sql("SELECT name, roll_no, class FROM students ORDER BY id DESC LIMIT 5", conn)
-    st.dataframe(recent_students)
+    st.dataframe(recent_activity(conn), column_config={"at": "Time (UTC)", "summary": "Activity"},
+                 hide_index=True, use_container_width=True)
 
 # Student Management
 elif selected == "Student":
     st.title("👨‍🎓 Student Management")
     
-    operation = st.selectbox("Select Operation", ["Add Student", "View Students", "Update Student", "Delete Student"])
+    operation = st.selectbox("Select Operation", ["Add Student", "Import Students", "View Students", "Update Student", "Delete Student"])
     
     if operation == "Add Student":
         with st.form("add_student_form"):
@@ -138,71 +256,83 @@ elif selected == "Student":
             if st.form_submit_button("Add Student"):
                 if name and roll_no and class_name:
                     try:
-                        c.execute("INSERT INTO students (name, roll_no, class, section, dob, gender, address, parent_name, parent_contact) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                                (name, roll_no, class_name, section, dob, gender, address, parent_name, parent_contact))
-                        conn.commit()
+                        writer.run(add_student, name, roll_no, class_name, section, dob, gender, address, parent_name, parent_contact)
                         st.success("Student added successfully!")
                     except sqlite3.IntegrityError:
                         st.error("Roll number must be unique!")
                 else:
                     st.warning("Please fill all required fields (*)")
     
+    elif operation == "Import Students":
+        show_import("students", "students")
+    
     elif operation == "View Students":
-        students = pd.read_sql("SELECT * FROM students", conn)
-        st.dataframe(students)
+        show_listing(
+            "students",
+            {"class": "Class", "section": "Section", "gender": "Gender"},
+            {
+                "Name (A-Z)": ("name", False),
+                "Name (Z-A)": ("name", True),
+                "Roll Number": ("roll_no", False),
+                "Newest First": ("id", True),
+            },
+            "students",
+        )
         
         # Search functionality
         st.subheader("Search Students")
-        search_term = st.text_input("Search by name or roll number")
+        search_term = st.text_input("Search by name, roll number, parent name or contact")
         if search_term:
-            search_results = pd.read_sql("SELECT * FROM students WHERE name LIKE ? OR roll_no LIKE ?", 
-                                        conn, params=(f"%{search_term}%", f"%{search_term}%"))
-            st.dataframe(search_results)
+            started = time.perf_counter()
+            search_results, ranked = search_students(conn, search_term)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if ranked:
+                st.caption(f"Top {len(search_results)} matches in {elapsed_ms:.1f} ms")
+            else:
+                st.caption(f"First {len(search_results)} of many matches in {elapsed_ms:.1f} ms, "
+                           "keep typing to narrow the search")
+            st.dataframe(search_results, hide_index=True)
     
     elif operation == "Update Student":
-        students = pd.read_sql("SELECT id, name, roll_no FROM students", conn)
-        selected_student = st.selectbox("Select Student", students['name'] + " (" + students['roll_no'] + ")")
+        student_id = student_picker("Select Student", "update_student")
         
-        if selected_student:
-            student_id = students.loc[students['name'] + " (" + students['roll_no'] + ")" == selected_student, 'id'].values[0]
-            student_data = c.execute("SELECT * FROM students WHERE id = ?", (student_id,)).fetchone()
+        if student_id is not None:
+            student_data = get_student(conn, student_id)
             
             with st.form("update_student_form"):
                 col1, col2 = st.columns(2)
                 with col1:
-                    name = st.text_input("Full Name*", value=student_data[1])
-                    roll_no = st.text_input("Roll Number*", value=student_data[2])
-                    class_name = st.text_input("Class*", value=student_data[3])
-                    section = st.text_input("Section", value=student_data[4])
+                    name = st.text_input("Full Name*", value=student_data["name"])
+                    roll_no = st.text_input("Roll Number*", value=student_data["roll_no"])
+                    class_name = st.text_input("Class*", value=student_data["class"])
+                    section = st.text_input("Section", value=student_data["section"])
                 with col2:
-                    dob = st.date_input("Date of Birth", value=datetime.strptime(student_data[5], "%Y-%m-%d").date())
-                    gender = st.selectbox("Gender", ["Male", "Female", "Other"], index=["Male", "Female", "Other"].index(student_data[6]))
-                    parent_name = st.text_input("Parent/Guardian Name", value=student_data[8])
-                    parent_contact = st.text_input("Parent/Guardian Contact", value=student_data[9])
+                    # Imported students may have no dob or gender; those fields start empty
+                    dob = st.date_input("Date of Birth", value=datetime.strptime(student_data["dob"], "%Y-%m-%d").date()
+                                        if student_data["dob"] else None)
+                    gender = st.selectbox("Gender", GENDERS, index=GENDERS.index(student_data["gender"])
+                                          if student_data["gender"] in GENDERS else None)
+                    parent_name = st.text_input("Parent/Guardian Name", value=student_data["parent_name"])
+                    parent_contact = st.text_input("Parent/Guardian Contact", value=student_data["parent_contact"])
                 
-                address = st.text_area("Address", value=student_data[7])
+                address = st.text_area("Address", value=student_data["address"])
                 
                 if st.form_submit_button("Update Student"):
-                    c.execute("UPDATE students SET name=?, roll_no=?, class=?, section=?, dob=?, gender=?, address=?, parent_name=?, parent_contact=? WHERE id=?",
-                            (name, roll_no, class_name, section, dob, gender, address, parent_name, parent_contact, student_id))
-                    conn.commit()
+                    writer.run(update_student, student_id, name, roll_no, class_name, section, dob, gender, address, parent_name, parent_contact)
                     st.success("Student updated successfully!")
     
     elif operation == "Delete Student":
-        students = pd.read_sql("SELECT id, name, roll_no FROM students", conn)
-        selected_student = st.selectbox("Select Student to Delete", students['name'] + " (" + students['roll_no'] + ")")
+        student_id = student_picker("Select Student to Delete", "delete_student")
         
-        if selected_student and st.button("Delete Student"):
-            student_id = students.loc[students['name'] + " (" + students['roll_no'] + ")" == selected_student, 'id'].values[0]
-            c.execute("DELETE FROM students WHERE id=?", (student_id,))
-            conn.commit()
+        if student_id is not None and st.button("Delete Student"):
+            writer.run(delete_student, student_id)
             st.success("Student deleted successfully!")
 
 # Teacher Management (similar structure as student)
 elif selected == "Teacher":
     st.title("👨‍🏫 Teacher Management")
     
-    operation = st.selectbox("Select Operation", ["Add Teacher", "View Teachers", "Update Teacher", "Delete Teacher"])
+    operation = st.selectbox("Select Operation", ["Add Teacher", "Import Teachers", "View Teachers", "Update Teacher", "Delete Teacher"])
     
     if operation == "Add Teacher":
         with st.form("add_teacher_form"):
@@ -222,18 +352,28 @@ elif selected == "Teacher":
             if st.form_submit_button("Add Teacher"):
                 if name and emp_id:
                     try:
-                        c.execute("INSERT INTO teachers (name, emp_id, subject, qualification, dob, gender, address, contact) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                                (name, emp_id, subject, qualification, dob, gender, address, contact))
-                        conn.commit()
+                        writer.run(add_teacher, name, emp_id, subject, qualification, dob, gender, address, contact)
                         st.success("Teacher added successfully!")
                     except sqlite3.IntegrityError:
                         st.error("Employee ID must be unique!")
                 else:
                     st.warning("Please fill all required fields (*)")
     
+    elif operation == "Import Teachers":
+        show_import("teachers", "teachers")
+    
     elif operation == "View Teachers":
-        teachers = pd.read_sql("SELECT * FROM teachers", conn)
-        st.dataframe(teachers)
+        show_listing(
+            "teachers",
+            {"subject": "Subject", "gender": "Gender"},
+            {
+                "Name (A-Z)": ("name", False),
+                "Name (Z-A)": ("name", True),
+                "Employee ID": ("emp_id", False),
+                "Newest First": ("id", True),
+            },
+            "teachers",
+        )
     
     # Similar update and delete functionality as students
     # ... (implementation similar to student section)
@@ -253,9 +393,7 @@ elif selected == "Class":
             if st.form_submit_button("Add Class"):
                 if class_name:
                     try:
-                        c.execute("INSERT INTO classes (class_name, section, room_no) VALUES (?, ?, ?)",
-                                (class_name, section, room_no))
-                        conn.commit()
+                        writer.run(add_class, class_name, section, room_no)
                         st.success("Class added successfully!")
                     except sqlite3.IntegrityError:
                         st.error("Class name must be unique!")
@@ -263,12 +401,11 @@ elif selected == "Class":
                     st.warning("Please fill all required fields (*)")
     
     elif operation == "View Classes":
-        classes = pd.read_sql("SELECT * FROM classes", conn)
-        st.dataframe(classes)
+        st.dataframe(class_table(conn))
     
     elif operation == "Assign Class Teacher":
-        classes = pd.read_sql("SELECT id, class_name FROM classes", conn)
-        teachers = pd.read_sql("SELECT id, name FROM teachers", conn)
+        classes = class_table(conn)
+        teachers = teacher_list(conn)
         
         selected_class = st.selectbox("Select Class", classes['class_name'])
         selected_teacher = st.selectbox("Select Teacher", teachers['name'])
@@ -277,8 +414,7 @@ elif selected == "Class":
             class_id = classes.loc[classes['class_name'] == selected_class, 'id'].values[0]
             teacher_id = teachers.loc[teachers['name'] == selected_teacher, 'id'].values[0]
             
-            c.execute("UPDATE classes SET class_teacher_id=? WHERE id=?", (teacher_id, class_id))
-            conn.commit()
+            writer.run(assign_class_teacher, class_id, teacher_id)
             st.success(f"Assigned {selected_teacher} as class teacher for {selected_class}")
 
 # Subject Management
@@ -295,9 +431,7 @@ elif selected == "Subject":
             if st.form_submit_button("Add Subject"):
                 if subject_name:
                     try:
-                        c.execute("INSERT INTO subjects (subject_name, subject_code) VALUES (?, ?)",
-                                (subject_name, subject_code))
-                        conn.commit()
+                        writer.run(add_subject, subject_name, subject_code)
                         st.success("Subject added successfully!")
                     except sqlite3.IntegrityError:
                         st.error("Subject name must be unique!")
@@ -305,142 +439,319 @@ elif selected == "Subject":
                     st.warning("Please fill all required fields (*)")
     
     elif operation == "View Subjects":
-        subjects = pd.read_sql("SELECT * FROM subjects", conn)
-        st.dataframe(subjects)
+        st.dataframe(subject_table(conn))
 
 # Attendance Management
 elif selected == "Attendance":
     st.title("📅 Attendance Management")
     
-    operation = st.selectbox("Select Operation", ["Mark Attendance", "View Attendance"])
+    operation = st.selectbox("Select Operation", ["Mark Attendance", "View Attendance", "Attendance Analytics", "Export Attendance"])
     
     if operation == "Mark Attendance":
         date = st.date_input("Select Date", datetime.now().date())
-        selected_class = st.selectbox("Select Class", pd.read_sql("SELECT class_name FROM classes", conn)['class_name'])
+        selected_class = st.selectbox("Select Class", class_names(conn))
         
         if date and selected_class:
-            students = pd.read_sql("SELECT id, name, roll_no FROM students WHERE class=?", conn, params=(selected_class,))
+            # One DataFrame per class/day, kept across reruns; bumping the
+            # version gives the grid a new key so bulk changes replace any edits
+            sheet = st.session_state.get("attendance_sheet")
+            if sheet is None or sheet["key"] != (selected_class, date):
+                sheet = st.session_state.attendance_sheet = {
+                    "key": (selected_class, date),
+                    "data": attendance_sheet(conn, selected_class, date),
+                    "version": 0,
+                }
             
-            if not students.empty:
+            if not sheet["data"].empty:
                 st.subheader(f"Attendance for {selected_class} on {date}")
                 
-                attendance_data = []
-                for _, student in students.iterrows():
-                    status = st.radio(
-                        f"{student['name']} ({student['roll_no']})",
-                        ["Present", "Absent"],
-                        key=f"attendance_{student['id']}"
+                col1, col2, col3 = st.columns(3)
+                if col1.button("Mark All Present"):
+                    sheet["data"] = sheet["data"].assign(present=True)
+                    sheet["version"] += 1
+                if col2.button("Mark All Absent"):
+                    sheet["data"] = sheet["data"].assign(present=False)
+                    sheet["version"] += 1
+                if col3.button("Invert Selection"):
+                    sheet["data"] = sheet["data"].assign(present=~sheet["data"]["present"])
+                    sheet["version"] += 1
+                
+                # Edits inside the form don't rerun the script until it is submitted
+                with st.form("attendance_form"):
+                    edited = st.data_editor(
+                        sheet["data"],
+                        key=f"attendance_grid_{sheet['version']}",
+                        column_config={
+                            "id": None,
+                            "name": "Name",
+                            "roll_no": "Roll Number",
+                            "present": st.column_config.CheckboxColumn("Present"),
+                        },
+                        disabled=["name", "roll_no"],
+                        hide_index=True,
+                        use_container_width=True,
                     )
-                    attendance_data.append({
-                        'student_id': student['id'],
-                        'date': date,
-                        'status': status
-                    })
+                    submitted = st.form_submit_button("Save Attendance")
                 
-                if st.button("Save Attendance"):
-                    for record in attendance_data:
-                        c.execute("INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
-                                (record['student_id'], record['date'], record['status']))
-                    conn.commit()
-                    st.success("Attendance saved successfully!")
+                if submitted:
+                    statuses = zip(edited['id'], edited['present'].map({True: "Present", False: "Absent"}))
+                    changed = writer.run(save_attendance, date, list(statuses), selected_class)
+                    sheet["data"] = attendance_sheet(conn, selected_class, date)
+                    sheet["version"] += 1
+                    st.success(f"Attendance saved successfully! ({changed} records changed)")
             else:
                 st.warning("No students found in this class")
     
     elif operation == "View Attendance":
         date = st.date_input("Select Date to View")
-        selected_class = st.selectbox("Select Class", pd.read_sql("SELECT class_name FROM classes", conn)['class_name'])
+        selected_class = st.selectbox("Select Class", class_names(conn))
         
         if date and selected_class and st.button("View Attendance"):
-            attendance = pd.read_sql('''
-                SELECT s.name, s.roll_no, a.status 
-                FROM attendance a
-                JOIN students s ON a.student_id = s.id
-                WHERE a.date = ? AND s.class = ?
-            ''', conn, params=(date, selected_class))
+            attendance = class_attendance(conn, selected_class, date)
             
             if not attendance.empty:
                 st.dataframe(attendance)
                 
                 # Attendance summary
-                present_count = len(attendance[attendance['status'] == 'Present'])
-                absent_count = len(attendance[attendance['status'] == 'Absent'])
+                counts = attendance['status'].value_counts()
+                present_count = counts.get('Present', 0)
+                absent_count = counts.get('Absent', 0)
                 
                 col1, col2 = st.columns(2)
                 col1.metric("Present Students", present_count)
                 col2.metric("Absent Students", absent_count)
             else:
                 st.warning("No attendance records found for this date and class")
+    
+    elif operation == "Attendance Analytics":
+        months = available_months(conn)
+        if not months:
+            st.info("No attendance has been marked yet")
+        else:
+            started = time.perf_counter()
+            col1, col2, col3 = st.columns(3)
+            month_from = col1.selectbox("From Month", months, index=max(0, len(months) - 4))
+            month_to = col2.selectbox("To Month", months, index=len(months) - 1)
+            selected_class = col3.selectbox("Class", ["All Classes"] + class_names(conn))
+            class_name = None if selected_class == "All Classes" else selected_class
+            date_from, date_to = month_bounds(month_from, month_to)
+            
+            rates = class_rates(conn, date_from, date_to)
+            present, absent = rates["present"].sum(), rates["absent"].sum()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Attendance Rate", f"{present / (present + absent):.1%}" if present + absent else "-")
+            col2.metric("Present", int(present))
+            col3.metric("Absent", int(absent))
+            
+            if class_name is None:
+                st.subheader("Attendance Rate by Class")
+                st.bar_chart(rates.set_index("class")["rate"])
+                st.dataframe(rates, hide_index=True, use_container_width=True)
+            else:
+                st.subheader(f"Daily Attendance Rate of {class_name}")
+                st.line_chart(class_trend(conn, class_name, date_from, date_to).set_index("date")["rate"])
+                st.subheader("Students")
+                students = student_rates(conn, month_from, month_to, class_name)
+                streaks = absence_streaks(conn, class_name, date_from, date_to)
+                st.dataframe(students.merge(streaks[["id", "longest_streak", "current_streak"]], on="id"),
+                             column_config={"id": None}, hide_index=True, use_container_width=True)
+            
+            st.subheader("Chronic Absentees")
+            col1, col2 = st.columns(2)
+            threshold = col1.slider("Absent on at least", 0.05, 0.5, CHRONIC_ABSENCE_RATE, 0.05, format="%.2f")
+            min_days = col2.number_input("Minimum days marked", 1, 200, 10)
+            chronic = chronic_absentees(conn, month_from, month_to, threshold, min_days, class_name)
+            st.dataframe(chronic.sort_values("absence_rate", ascending=False),
+                         column_config={"id": None}, hide_index=True, use_container_width=True)
+            st.caption(f"{len(chronic)} students · computed in "
+                       f"{(time.perf_counter() - started) * 1000:.0f} ms from the attendance rollups")
+    
+    elif operation == "Export Attendance":
+        selected_class = st.selectbox("Class", ["All Classes"] + class_names(conn))
+        col1, col2 = st.columns(2)
+        date_from = col1.date_input("From", None)
+        date_to = col2.date_input("To", None)
+        show_export("attendance", {
+            "class_name": None if selected_class == "All Classes" else selected_class,
+            "date_from": date_from,
+            "date_to": date_to,
+        })
 
 # Grade Management
 elif selected == "Grades":
     st.title("🎓 Grade Management")
     
-    operation = st.selectbox("Select Operation", ["Add Grades", "View Grades"])
+    operation = st.selectbox("Select Operation", ["Add Grades", "View Grades", "Grade Analytics", "Export Grades", "Report Cards"])
     
     if operation == "Add Grades":
-        selected_class = st.selectbox("Select Class", pd.read_sql("SELECT DISTINCT class FROM students", conn)['class'])
-        selected_subject = st.selectbox("Select Subject", pd.read_sql("SELECT subject_name FROM subjects", conn)['subject_name'])
-        term = st.selectbox("Select Term", ["First Term", "Mid Term", "Final Term"])
+        selected_class = st.selectbox("Select Class", student_classes(conn))
+        selected_subject = st.selectbox("Select Subject", subject_names(conn))
+        term = st.selectbox("Select Term", TERMS)
         
-        students = pd.read_sql("SELECT id, name, roll_no FROM students WHERE class=?", conn, params=(selected_class,))
-        subject_id = c.execute("SELECT id FROM subjects WHERE subject_name=?", (selected_subject,)).fetchone()[0]
-        
-        if not students.empty:
-            st.subheader(f"Enter Grades for {selected_subject} - {term}")
+        if selected_class and selected_subject:
+            subject_id = subject_id_by_name(conn, selected_subject)
             
-            grades_data = []
-            for _, student in students.iterrows():
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.write(f"{student['name']} ({student['roll_no']})")
-                with col2:
-                    grade = st.selectbox(
-                        "Grade",
-                        ["A+", "A", "B+", "B", "C+", "C", "D", "F"],
-                        key=f"grade_{student['id']}"
-                    )
+            # Saved grades for this class/subject/term, kept across reruns so
+            # only the cells changed in the grid are written back
+            book = st.session_state.get("gradebook")
+            if book is None or book["key"] != (selected_class, subject_id, term):
+                book = st.session_state.gradebook = {
+                    "key": (selected_class, subject_id, term),
+                    "data": gradebook(conn, selected_class, subject_id, term),
+                    "version": 0,
+                }
+            
+            if not book["data"].empty:
+                st.subheader(f"Enter Grades for {selected_subject} - {term}")
                 
-                remarks = st.text_input("Remarks", key=f"remarks_{student['id']}")
+                with st.form("gradebook_form"):
+                    edited = st.data_editor(
+                        book["data"],
+                        key=f"gradebook_grid_{book['version']}",
+                        column_config={
+                            "id": None,
+                            "name": "Name",
+                            "roll_no": "Roll Number",
+                            "grade": st.column_config.SelectboxColumn("Grade", options=GRADES),
+                            "remarks": st.column_config.TextColumn("Remarks"),
+                        },
+                        disabled=["name", "roll_no"],
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+                    submitted = st.form_submit_button("Save Grades")
                 
-                grades_data.append({
-                    'student_id': student['id'],
-                    'subject_id': subject_id,
-                    'term': term,
-                    'grade': grade,
-                    'remarks': remarks
-                })
-            
-            if st.button("Save Grades"):
-                for record in grades_data:
-                    c.execute('''
-                        INSERT INTO grades (student_id, subject_id, term, grade, remarks)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (record['student_id'], record['subject_id'], record['term'], record['grade'], record['remarks']))
-                conn.commit()
-                st.success("Grades saved successfully!")
+                if submitted:
+                    changes = gradebook_changes(book["data"], edited)
+                    changed = writer.run(
+                        save_grades, subject_id, term, list(zip(changes['id'], changes['grade'], changes['remarks']))
+                    )
+                    book["data"] = gradebook(conn, selected_class, subject_id, term)
+                    book["version"] += 1
+                    st.success(f"Grades saved successfully! ({changed} records changed)")
+            else:
+                st.warning("No students found in this class")
     
     elif operation == "View Grades":
-        selected_class = st.selectbox("Select Class", pd.read_sql("SELECT DISTINCT class FROM students", conn)['class'])
-        selected_student = st.selectbox("Select Student", 
-                                      pd.read_sql("SELECT name FROM students WHERE class=?", conn, params=(selected_class,))['name'])
+        selected_class = st.selectbox("Select Class", student_classes(conn))
+        students = class_students(conn, selected_class)
+        labels = dict(zip(students['id'], students['name'] + " (" + students['roll_no'] + ")"))
+        selected_student = st.selectbox("Select Student", list(labels), format_func=labels.get)
         
-        if selected_student and st.button("View Grades"):
-            grades = pd.read_sql('''
-                SELECT g.term, s.subject_name, g.grade, g.remarks
-                FROM grades g
-                JOIN subjects s ON g.subject_id = s.id
-                JOIN students st ON g.student_id = st.id
-                WHERE st.name = ?
-                ORDER BY g.term
-            ''', conn, params=(selected_student,))
+        if selected_student is not None and st.button("View Grades"):
+            grades = student_transcript(conn, selected_student)
             
             if not grades.empty:
                 st.dataframe(grades)
             else:
                 st.warning("No grades found for this student")
+    
+    elif operation == "Grade Analytics":
+        analytics = get_grade_analytics()
+        started = time.perf_counter()
+        recomputed = analytics.refresh(conn)
+        col1, col2 = st.columns(2)
+        selected_class = col1.selectbox("Class", ["All Classes"] + student_classes(conn))
+        term = col2.selectbox("Term", TERMS)
+        class_name = None if selected_class == "All Classes" else selected_class
+        
+        terms = analytics.student_terms(conn, class_name, term)
+        if terms.empty:
+            st.info("No grades entered for this selection yet")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Students Graded", len(terms))
+            col2.metric("Mean GPA", f"{terms['gpa'].mean():.2f}")
+            improved = terms["delta"].dropna()
+            col3.metric("Improved Since Last Term",
+                        f"{(improved > 0).mean():.0%}" if len(improved) else "-")
+            
+            st.subheader(f"{term} Ranking")
+            st.dataframe(terms[["class", "class_rank", "name", "roll_no", "gpa", "subjects", "delta"]],
+                         hide_index=True, use_container_width=True)
+            
+            st.subheader("Subjects")
+            subjects = analytics.subject_stats(conn, class_name, term)
+            st.dataframe(subjects, hide_index=True, use_container_width=True)
+            st.bar_chart(subjects.groupby("subject")[GRADES].sum())
+            
+            st.subheader("Cumulative GPA")
+            st.dataframe(analytics.student_gpa(conn, class_name), column_config={"student_id": None},
+                         hide_index=True, use_container_width=True)
+        st.caption(f"Recomputed {len(recomputed)} changed classes · "
+                   f"{(time.perf_counter() - started) * 1000:.0f} ms")
+    
+    elif operation == "Export Grades":
+        col1, col2, col3 = st.columns(3)
+        selected_class = col1.selectbox("Class", ["All Classes"] + student_classes(conn))
+        term = col2.selectbox("Term", ["All Terms"] + TERMS)
+        subject = col3.selectbox("Subject", ["All Subjects"] + subject_names(conn))
+        show_export("grades", {
+            "class_name": None if selected_class == "All Classes" else selected_class,
+            "term": None if term == "All Terms" else term,
+            "subject": None if subject == "All Subjects" else subject,
+        })
+    
+    elif operation == "Report Cards":
+        col1, col2 = st.columns(2)
+        selected_class = col1.selectbox("Class", ["All Classes"] + student_classes(conn))
+        term = col2.selectbox("Term", TERMS)
+        months = available_months(conn)
+        col1, col2 = st.columns(2)
+        month_from = col1.selectbox("Attendance From", months, index=max(0, len(months) - 4)) if months else None
+        month_to = col2.selectbox("Attendance To", months, index=len(months) - 1) if months else None
+        fmt = st.radio("Format", ["HTML", "PDF"], horizontal=True)
+        
+        if st.button("Generate Report Cards"):
+            bar = st.progress(0.0, text="Loading grades and attendance")
+            try:
+                result = generate_report_cards(
+                    conn, REPORT_CARDS_DIR, term, month_from, month_to,
+                    None if selected_class == "All Classes" else selected_class, fmt.lower(),
+                    progress=lambda r: bar.progress(r.written / r.students,
+                                                    text=f"{r.written} of {r.students} cards written"))
+            except ImportError:
+                st.error("PDF report cards need the weasyprint package")
+            else:
+                st.success(f"Wrote {result.written} report cards to {REPORT_CARDS_DIR}")
+                st.caption(f"{result.seconds:.1f} s ({result.per_second:.0f} cards/s, "
+                           f"data loaded in {result.load_seconds:.2f} s)")
 
-# Close connection when done
-conn.close()
-
-
-
+# Admin Page
+elif selected == "Admin":
+    st.title("🛠️ Admin")
+    
+    st.subheader("Query Trace")
+    col1, col2 = st.columns(2)
+    tracer.enabled = col1.toggle("Trace queries", value=tracer.enabled)
+    tracer.slow_ms = col2.number_input("Slow query threshold (ms)", min_value=0.0,
+                                       value=float(tracer.slow_ms), step=5.0)
+    # A fixed file: a path typed into the page could point the appends anywhere
+    log = st.checkbox(f"Also append records to {os.path.basename(TRACE_LOG_PATH)}",
+                      value=tracer.log_path == TRACE_LOG_PATH)
+    tracer.log_path = TRACE_LOG_PATH if log else None
+    
+    records = tracer.records()
+    slow = records[records["ms"] >= tracer.slow_ms]
+    scans = slow[slow["full_scans"].map(bool)]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Statements Recorded", len(records))
+    col2.metric("Slow Statements", len(slow))
+    col3.metric("Full Table Scans", len(scans))
+    
+    st.subheader("Statements by Total Time")
+    st.dataframe(tracer.summary(), hide_index=True, use_container_width=True)
+    
+    st.subheader("Slowest Statements")
+    for row in slow.sort_values("ms", ascending=False).head(20).itertuples():
+        with st.expander(f"{row.ms:.1f} ms, {row.rows} rows: {row.sql[:100]}"):
+            st.code(row.sql, language="sql")
+            st.caption(f"Parameters: {row.params or 'none'} · at {row.at:%H:%M:%S}")
+            if row.plan:
+                st.text("\n".join(row.plan))
+            if row.full_scans:
+                st.warning(f"Full table scan of {', '.join(row.full_scans)}")
+    
+    if st.button("Clear Trace"):
+        tracer.clear()
+        st.rerun()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Attendance rates, absence streaks and chronic absentees over a term.
+
+Rates are sums over the trigger-maintained rollups from migration 0008
+(attendance_class_daily and attendance_student_monthly), so a term-wide
+figure costs a few thousand small rows whatever the size of the raw
+attendance table. Student figures are kept by month, so student queries
+take a range of months; class figures are by day. Absence streaks need the
+day-by-day sequence and are read from raw attendance, one class at a time
+through the (student_id, date) index.
+"""
+
+import calendar
+
+from school_cache import cached_read_sql, cached_rows
+
+# Rollups are written by triggers on attendance, and joined to students
+ROLLUP_TABLES = ["attendance", "students"]
+
+# Absence rate at or above which a student is a chronic absentee
+CHRONIC_ABSENCE_RATE = 0.10
+
+
+def month_bounds(month_from, month_to):
+    """First and last day ('YYYY-MM-DD') of a range of 'YYYY-MM' months"""
+    year, month = (int(part) for part in month_to.split("-"))
+    last = calendar.monthrange(year, month)[1]
+    return f"{month_from}-01", f"{month_to}-{last:02d}"
+
+
+def available_months(conn):
+    """Months with any attendance, oldest first"""
+    return [row[0] for row in cached_rows(
+        conn, "SELECT DISTINCT substr(date, 1, 7) FROM attendance_class_daily ORDER BY 1",
+        ROLLUP_TABLES)]
+
+
+def class_rates(conn, date_from, date_to):
+    """Present, absent, days marked and attendance rate per class over a date range"""
+    return cached_read_sql(
+        conn,
+        """
+        SELECT class, COUNT(*) AS days, SUM(present) AS present, SUM(absent) AS absent,
+               ROUND(1.0 * SUM(present) / NULLIF(SUM(present) + SUM(absent), 0), 4) AS rate
+        FROM attendance_class_daily
+        WHERE date BETWEEN ? AND ?
+        GROUP BY class
+        ORDER BY rate
+        """,
+        ROLLUP_TABLES, (date_from, date_to),
+    )
+
+
+def class_trend(conn, class_name, date_from, date_to):
+    """Daily attendance rate of one class"""
+    return cached_read_sql(
+        conn,
+        """
+        SELECT date, present, absent,
+               ROUND(1.0 * present / NULLIF(present + absent, 0), 4) AS rate
+        FROM attendance_class_daily
+        WHERE class = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+        """,
+        ROLLUP_TABLES, (class_name, date_from, date_to),
+    )
+
+
+def student_rates(conn, month_from, month_to, class_name=None):
+    """Per-student present, absent and attendance rate over a range of months.
+
+    Limited to the students currently in class_name when one is given.
+    """
+    where = "AND s.class = ?" if class_name is not None else ""
+    params = (month_from, month_to) + ((class_name,) if class_name is not None else ())
+    return cached_read_sql(
+        conn,
+        f"""
+        SELECT s.id, s.name, s.roll_no, s.class, SUM(m.present) AS present,
+               SUM(m.absent) AS absent,
+               ROUND(1.0 * SUM(m.present) / NULLIF(SUM(m.present) + SUM(m.absent), 0), 4) AS rate
+        FROM attendance_student_monthly m
+        JOIN students s ON s.id = m.student_id
+        WHERE m.month BETWEEN ? AND ? {where}
+        GROUP BY s.id
+        ORDER BY rate, s.roll_no
+        """,
+        ROLLUP_TABLES, params,
+    )
+
+
+def chronic_absentees(conn, month_from, month_to, threshold=CHRONIC_ABSENCE_RATE,
+                      min_days=10, class_name=None):
+    """Students absent on at least threshold of at least min_days marked days"""
+    rates = student_rates(conn, month_from, month_to, class_name)
+    marked = rates["present"] + rates["absent"]
+    chronic = rates[(marked >= min_days) & (rates["absent"] >= threshold * marked)]
+    return chronic.assign(absence_rate=(chronic["absent"] / marked[chronic.index]).round(4))
+
+
+def absence_streaks(conn, class_name, date_from, date_to):
+    """Longest and current run of consecutive absences per student of a class.
+
+    Runs count marked days, so weekends and holidays don't break them. The
+    current streak is the run that includes the student's last marked day.
+    """
+    students = cached_read_sql(conn, "SELECT id, name, roll_no FROM students WHERE class = ?",
+                               ["students"], (class_name,))
+    days = cached_read_sql(
+        conn,
+        """
+        SELECT a.student_id, a.status IS 'Absent' AS absent
+        FROM students s
+        JOIN attendance a ON a.student_id = s.id
+        WHERE s.class = ? AND a.date BETWEEN ? AND ?
+        ORDER BY a.student_id, a.date
+        """,
+        ROLLUP_TABLES, (class_name, date_from, date_to),
+    )
+    student, absent = days["student_id"], days["absent"].astype(bool)
+    # A new run starts wherever the student or the absent flag changes
+    run = ((student != student.shift()) | (absent != absent.shift())).cumsum()
+    lengths = run[absent].value_counts()
+    longest = lengths.groupby(student[absent].groupby(run[absent]).first()).max()
+    last_run = run.groupby(student).last()
+    current = last_run.map(lengths).fillna(0)
+    streaks = students.assign(
+        longest_streak=students["id"].map(longest).fillna(0).astype(int),
+        current_streak=students["id"].map(current).fillna(0).astype(int),
+    )
+    return streaks.sort_values(["current_streak", "longest_streak", "roll_no"],
+                               ascending=[False, False, True], ignore_index=True)
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Compact bitmap storage for daily attendance.
+
+A class-day is one attendance_bitmaps row with two packed bitsets: bit i of
+marked is set when the student with ordinal i in class_roster has a record
+that day, bit i of present when that record is Present (any other status is
+stored as absent). A 2,000-student school then writes about 50 small rows
+a day instead of 2,000, and totals are popcounts: int.bit_count for a day,
+NumPy unpackbits over a stacked block of days for per-student totals.
+
+Row-format attendance stays the working store: the pages, rollups and
+analytics read it. Older periods can be archived into bitmaps (and deleted
+from the row table, which also takes them out of the rollups) and restored
+back:
+
+    python attendance_bitmap.py archive --to 2024-12-31 --delete
+    python attendance_bitmap.py restore --from 2024-01-01 --to 2024-12-31
+    python attendance_bitmap.py stats
+"""
+
+import argparse
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from school_db import DB_PATH, connect, iso_date, transaction
+from school_migrations import migrate
+from school_store import UPSERT_ATTENDANCE_SQL
+
+
+def _bits(blob, size):
+    """Bitset bytes as a bool array of length size"""
+    bits = np.zeros(size, dtype=bool)
+    unpacked = np.unpackbits(np.frombuffer(blob, dtype=np.uint8), bitorder="little")
+    n = min(size, len(unpacked))
+    bits[:n] = unpacked[:n]
+    return bits
+
+
+def _pack(bits):
+    """Bool array as bitset bytes, trailing zero bytes trimmed"""
+    return np.packbits(bits, bitorder="little").tobytes().rstrip(b"\0")
+
+
+def roster(conn, class_name):
+    """{student_id: ordinal} for everyone ever given an ordinal in the class"""
+    return dict(conn.execute("SELECT student_id, ordinal FROM class_roster WHERE class = ?",
+                             (class_name,)))
+
+
+def ensure_roster(conn, class_name, student_ids):
+    """Roster of the class, giving the next free ordinals to students not on it yet.
+
+    Must run inside the caller's transaction.
+    """
+    ordinals = roster(conn, class_name)
+    missing = [sid for sid in dict.fromkeys(int(s) for s in student_ids) if sid not in ordinals]
+    if missing:
+        start = max(ordinals.values(), default=-1) + 1
+        new = {sid: start + i for i, sid in enumerate(missing)}
+        conn.executemany("INSERT INTO class_roster (class, ordinal, student_id) VALUES (?, ?, ?)",
+                         [(class_name, ordinal, sid) for sid, ordinal in new.items()])
+        ordinals.update(new)
+    return ordinals
+
+
+def save_day(conn, class_name, date, statuses):
+    """Write (student_id, status) pairs into a class-day bitmap, merging with what is stored"""
+    statuses = [(int(sid), status) for sid, status in statuses]
+    day = iso_date(date)
+    with transaction(conn):
+        ordinals = ensure_roster(conn, class_name, [sid for sid, _ in statuses])
+        size = max(ordinals.values(), default=-1) + 1
+        stored = conn.execute("SELECT marked, present FROM attendance_bitmaps WHERE class = ? AND date = ?",
+                              (class_name, day)).fetchone()
+        marked = _bits(stored[0], size) if stored else np.zeros(size, dtype=bool)
+        present = _bits(stored[1], size) if stored else np.zeros(size, dtype=bool)
+        index = np.array([ordinals[sid] for sid, _ in statuses], dtype=np.int64)
+        marked[index] = True
+        present[index] = [status == "Present" for _, status in statuses]
+        conn.execute(
+            """INSERT INTO attendance_bitmaps (class, date, marked, present) VALUES (?, ?, ?, ?)
+            ON CONFLICT (class, date) DO UPDATE SET marked = excluded.marked, present = excluded.present""",
+            (class_name, day, _pack(marked), _pack(present)))
+
+
+def load_day(conn, class_name, date):
+    """A class-day bitmap in row format: DataFrame of student_id and status"""
+    stored = conn.execute("SELECT marked, present FROM attendance_bitmaps WHERE class = ? AND date = ?",
+                          (class_name, iso_date(date))).fetchone()
+    if stored is None:
+        return pd.DataFrame({"student_id": pd.Series(dtype=int), "status": pd.Series(dtype=str)})
+    by_ordinal = {ordinal: sid for sid, ordinal in roster(conn, class_name).items()}
+    size = max(by_ordinal, default=-1) + 1
+    marked, present = _bits(stored[0], size), _bits(stored[1], size)
+    ordinals = np.flatnonzero(marked)
+    return pd.DataFrame({
+        "student_id": [by_ordinal[o] for o in ordinals],
+        "status": np.where(present[ordinals], "Present", "Absent"),
+    })
+
+
+def _range_clause(date_from, date_to):
+    clauses, params = [], []
+    if date_from is not None:
+        clauses.append("date >= ?")
+        params.append(iso_date(date_from))
+    if date_to is not None:
+        clauses.append("date <= ?")
+        params.append(iso_date(date_to))
+    return clauses, params
+
+
+def day_counts(conn, class_name, date_from=None, date_to=None):
+    """Present and absent totals per day of a class, by popcount"""
+    clauses, params = _range_clause(date_from, date_to)
+    rows = conn.execute(
+        f"SELECT date, marked, present FROM attendance_bitmaps WHERE {' AND '.join(['class = ?'] + clauses)}"
+        " ORDER BY date", [class_name] + params).fetchall()
+    counts = []
+    for date, marked, present in rows:
+        marked_n = int.from_bytes(marked, "little").bit_count()
+        present_n = int.from_bytes(present, "little").bit_count()
+        counts.append((date, present_n, marked_n - present_n))
+    return pd.DataFrame(counts, columns=["date", "present", "absent"])
+
+
+def student_totals(conn, class_name, date_from=None, date_to=None):
+    """Present and absent days per student of a class over a date range.
+
+    The range's bitmaps are stacked into one byte matrix and unpacked at
+    once, so the work is a few NumPy calls however many days it spans.
+    """
+    clauses, params = _range_clause(date_from, date_to)
+    rows = conn.execute(
+        f"SELECT marked, present FROM attendance_bitmaps WHERE {' AND '.join(['class = ?'] + clauses)}",
+        [class_name] + params).fetchall()
+    by_ordinal = {ordinal: sid for sid, ordinal in roster(conn, class_name).items()}
+    size = max(by_ordinal, default=-1) + 1
+    if not rows or not size:
+        return pd.DataFrame(columns=["student_id", "present", "absent"])
+    width = (size + 7) // 8
+
+    def matrix(blobs):
+        block = b"".join(blob.ljust(width, b"\0")[:width] for blob in blobs)
+        bytes_ = np.frombuffer(block, dtype=np.uint8).reshape(len(blobs), width)
+        return np.unpackbits(bytes_, axis=1, bitorder="little")[:, :size].sum(axis=0)
+
+    marked = matrix([r[0] for r in rows])
+    present = matrix([r[1] for r in rows])
+    ordinals = np.flatnonzero(marked)
+    return pd.DataFrame({
+        "student_id": [by_ordinal[o] for o in ordinals],
+        "present": present[ordinals],
+        "absent": marked[ordinals] - present[ordinals],
+    })
+
+
+def rows_to_bitmaps(conn, date_from=None, date_to=None, delete=False):
+    """Archive row-format attendance into bitmaps, one transaction per day.
+
+    Students are filed under their current class. With delete the rows are
+    removed from the attendance table (and so from the rollups) as each day
+    is archived. Returns the number of class-days written.
+    """
+    clauses, params = _range_clause(date_from, date_to)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    # Dates come from the small per-day totals table rather than a scan
+    dates = [r[0] for r in conn.execute(
+        f"SELECT DISTINCT date FROM attendance_daily {where} ORDER BY date", params)]
+    written = 0
+    for day in dates:
+        rows = pd.read_sql(
+            """
+            SELECT COALESCE(s.class, '') AS class, a.student_id, a.status
+            FROM attendance a JOIN students s ON s.id = a.student_id
+            WHERE a.date = ?
+            """, conn, params=(day,))
+        with transaction(conn):
+            for class_name, group in rows.groupby("class"):
+                save_day(conn, class_name, day, zip(group["student_id"], group["status"]))
+                written += 1
+            if delete:
+                conn.execute("DELETE FROM attendance WHERE date = ? AND student_id IN (SELECT id FROM students)",
+                             (day,))
+    return written
+
+
+def bitmaps_to_rows(conn, class_name=None, date_from=None, date_to=None, delete=False):
+    """Restore bitmaps into the attendance table; returns the number of rows written"""
+    clauses, params = _range_clause(date_from, date_to)
+    if class_name is not None:
+        clauses.append("class = ?")
+        params.append(class_name)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    days = conn.execute(f"SELECT class, date FROM attendance_bitmaps {where} ORDER BY class, date",
+                        params).fetchall()
+    written = 0
+    for class_name, day in days:
+        rows = load_day(conn, class_name, day)
+        with transaction(conn):
+            conn.executemany(UPSERT_ATTENDANCE_SQL,
+                             [(int(sid), day, status) for sid, status in rows.itertuples(index=False)])
+            if delete:
+                conn.execute("DELETE FROM attendance_bitmaps WHERE class = ? AND date = ?",
+                             (class_name, day))
+        written += len(rows)
+    return written
+
+
+def storage_stats(conn):
+    """Bytes on disk of row-format and bitmap attendance, indexes included (needs dbstat)"""
+    sizes = dict(conn.execute(
+        """
+        SELECT CASE WHEN m.tbl_name = 'attendance' THEN 'rows' ELSE 'bitmaps' END, SUM(d.pgsize)
+        FROM dbstat d JOIN sqlite_master m ON m.name = d.name
+        WHERE m.tbl_name IN ('attendance', 'attendance_bitmaps', 'class_roster')
+        GROUP BY 1
+        """))
+    return {"rows": sizes.get("rows", 0), "bitmaps": sizes.get("bitmaps", 0)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive attendance into bitmaps and back")
+    parser.add_argument("command", choices=["archive", "restore", "stats"])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--from", dest="date_from", help="first date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="last date, YYYY-MM-DD")
+    parser.add_argument("--class", dest="class_name", help="restore one class only")
+    parser.add_argument("--delete", action="store_true",
+                        help="remove the source rows once converted")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    migrate(conn)
+    if args.command == "archive":
+        days = rows_to_bitmaps(conn, args.date_from, args.date_to, args.delete)
+        print(f"Archived {days} class-days")
+    elif args.command == "restore":
+        rows = bitmaps_to_rows(conn, args.class_name, args.date_from, args.date_to, args.delete)
+        print(f"Restored {rows} attendance rows")
+    try:
+        stats = storage_stats(conn)
+    except sqlite3.OperationalError:
+        # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB; the conversion itself is done
+        print("Storage sizes unavailable: this SQLite build has no dbstat table")
+    else:
+        print(f"Row-format attendance: {stats['rows'] / 1024:.0f} KiB, "
+              f"bitmaps: {stats['bitmaps'] / 1024:.0f} KiB")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Storage and aggregate cost of row-format attendance against bitmaps.
+
+Seeds a scratch school.db with a year of attendance, archives it into
+attendance_bitmaps, then compares bytes on disk and the time of a class's
+daily totals and per-student totals over the whole range, checking both
+formats give the same figures.
+
+    python benchmarks/bench_attendance_bitmap.py --students 2000 --days 200
+"""
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_bitmap import day_counts, rows_to_bitmaps, storage_stats, student_totals  # noqa: E402
+from school_db import connect  # noqa: E402
+from school_migrations import migrate  # noqa: E402
+
+CLASSES = [f"Grade {g}{s}" for g in range(1, 13) for s in "ABCD"]
+STATUSES = ["Present"] * 18 + ["Absent", "Late"]
+
+
+def seed(conn, students, days):
+    migrate(conn)
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO students (name, roll_no, class, section, dob, gender) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Student {i}", f"R{i:06d}", CLASSES[i % len(CLASSES)], "A", "2012-01-01", "Female")
+         for i in range(students)])
+    ids = [r[0] for r in conn.execute("SELECT id FROM students")]
+    start = datetime.date(2025, 1, 6)
+    for d in range(days):
+        day = (start + datetime.timedelta(days=d)).isoformat()
+        conn.executemany("INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
+                         [(sid, day, rng.choice(STATUSES)) for sid in ids])
+    conn.commit()
+
+
+def rows_day_counts(conn, class_name):
+    return pd.read_sql(
+        """
+        SELECT a.date, SUM(a.status = 'Present') AS present, SUM(a.status != 'Present') AS absent
+        FROM students s JOIN attendance a ON a.student_id = s.id
+        WHERE s.class = ?
+        GROUP BY a.date ORDER BY a.date
+        """, conn, params=(class_name,))
+
+
+def rows_student_totals(conn, class_name):
+    return pd.read_sql(
+        """
+        SELECT a.student_id, SUM(a.status = 'Present') AS present, SUM(a.status != 'Present') AS absent
+        FROM students s JOIN attendance a ON a.student_id = s.id
+        WHERE s.class = ?
+        GROUP BY a.student_id ORDER BY a.student_id
+        """, conn, params=(class_name,))
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "school.db"))
+        seed(conn, args.students, args.days)
+        start = time.perf_counter()
+        class_days = rows_to_bitmaps(conn)
+        print(f"Archived {class_days} class-days in {time.perf_counter() - start:.1f} s")
+
+        stats = storage_stats(conn)
+        print(f"Storage, {args.students} students x {args.days} days:")
+        print(f"  rows    {stats['rows'] / 1024:10.0f} KiB")
+        print(f"  bitmaps {stats['bitmaps'] / 1024:10.0f} KiB")
+
+        class_name = CLASSES[0]
+        rows = rows_day_counts(conn, class_name)
+        bits = day_counts(conn, class_name)
+        assert rows.equals(bits.astype(rows.dtypes)), "daily totals differ"
+        rows = rows_student_totals(conn, class_name)
+        bits = student_totals(conn, class_name).sort_values("student_id", ignore_index=True)
+        assert rows.equals(bits.astype(rows.dtypes)), "student totals differ"
+
+        print(f"Totals of {class_name} over the range:")
+        for label, fn_rows, fn_bits in [("daily", rows_day_counts, day_counts),
+                                        ("per student", rows_student_totals, student_totals)]:
+            print(f"  {label:12} rows {median_ms(lambda: fn_rows(conn, class_name), args.repeat):8.2f} ms"
+                  f"   bitmaps {median_ms(lambda: fn_bits(conn, class_name), args.repeat):8.2f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Rerun latency of the Mark Attendance page for large classes.
+
+Seeds a scratch school.db with one class of each size, opens the page with
+Streamlit's AppTest and times full reruns (what every widget click costs).
+AppTest cannot drive the option_menu component, so navigation is replaced
+by a selectbox in a small wrapper script.
+
+To compare against an older revision of the app:
+
+    git show <rev>:"School Database.py" > /tmp/old_school.py
+    python benchmarks/bench_attendance_page.py --baseline-app /tmp/old_school.py
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "School Database.py")
+sys.path.insert(0, REPO_ROOT)
+
+from school_migrations import migrate  # noqa: E402
+
+WRAPPER = """
+import runpy, sys
+import streamlit as st
+import streamlit_option_menu
+
+sys.path.insert(0, {repo!r})
+streamlit_option_menu.option_menu = (
+    lambda menu_title, options, **kwargs: st.selectbox(menu_title, options, key="nav"))
+runpy.run_path({app!r}, run_name="__main__")
+"""
+
+
+def seed(path, sizes):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    for size in sizes:
+        class_name = f"Class {size}"
+        conn.execute("INSERT INTO classes (class_name) VALUES (?)", (class_name,))
+        conn.executemany(
+            "INSERT INTO students (name, roll_no, class, dob, gender) VALUES (?, ?, ?, ?, ?)",
+            [(f"Student {size}-{i}", f"{size}-{i:05d}", class_name, "2012-01-01", "Male")
+             for i in range(size)])
+    conn.commit()
+    conn.close()
+
+
+def time_page(app_path, workdir, size, repeat):
+    from streamlit.testing.v1 import AppTest
+
+    wrapper = os.path.join(workdir, "wrapper.py")
+    with open(wrapper, "w", encoding="utf-8") as f:
+        f.write(WRAPPER.format(repo=REPO_ROOT, app=app_path))
+    at = AppTest.from_file(wrapper, default_timeout=300).run()
+    at.selectbox(key="nav").select("Attendance").run()
+    class_box = next(box for box in at.selectbox if box.label == "Select Class")
+    class_box.select(f"Class {size}").run()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline-app", help="older copy of the app to compare against")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        seed(os.path.join(tmp, "school.db"), args.sizes)
+        apps = [("before", os.path.abspath(args.baseline_app))] if args.baseline_app else []
+        apps.append(("after", APP_PATH))
+        print("Median rerun of Mark Attendance:")
+        for size in args.sizes:
+            line = f"  {size:>5} students"
+            for label, path in apps:
+                line += f"   {label} {time_page(path, tmp, size, args.repeat):8.1f} ms"
+            print(line)
+        os.chdir(REPO_ROOT)
+
+
+if __name__ == "__main__":
+    main()
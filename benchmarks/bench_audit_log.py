@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Append throughput and query latency of the verification audit log.
+
+Seeds a scratch audit database with synthetic verifications spread over a
+year, then times appends through AuditLog.record and the audit tab queries.
+
+    python benchmarks/bench_audit_log.py --rows 20000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verification_audit import INSERT_SQL, AuditLog, _connect  # noqa: E402
+
+OWNERS = [f"{a}{b}{c}U" for a in "MTCO" for b in "SGAE" for c in "KHLN"]
+
+
+def seed(path, rows, chunk=100_000):
+    """Bulk-load synthetic rows covering the last 365 days"""
+    rng = random.Random(0)
+    now_ms = int(time.time() * 1000)
+    year_ms = 365 * 24 * 3600 * 1000
+    conn = _connect(path)
+    for start in range(0, rows, chunk):
+        batch = []
+        for _ in range(min(chunk, rows - start)):
+            owner = rng.choice(OWNERS)
+            number = f"{owner}{rng.randrange(10**7):07d}"
+            ok = rng.random() > 0.1
+            batch.append((now_ms - rng.randrange(year_ms), number, owner, "manual", None,
+                          int(ok), "", int(ok), "", int(ok), rng.uniform(1, 50)))
+        with conn:
+            conn.executemany(INSERT_SQL, batch)
+    conn.close()
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<45} {best * 1000:9.2f} ms  ({len(result)} rows)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--appends", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audit.db")
+        log = AuditLog(path)
+
+        start = time.perf_counter()
+        seed(path, args.rows)
+        print(f"Seeded {args.rows:,} rows in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        for i in range(args.appends):
+            log.record("MSKU9876543", "manual", True, "", i % 10 != 0, "", 3.2)
+        queued = time.perf_counter() - start
+        log.close()
+        written = time.perf_counter() - start
+        print(f"Appends: {args.appends:,} queued in {queued * 1000:.0f} ms "
+              f"({queued / args.appends * 1e6:.2f} us each), all written after {written:.2f} s")
+
+        log = AuditLog(path)
+        week_ago = datetime.now() - timedelta(days=7)
+        print("Queries (best of 5):")
+        timed("failures for owner MSKU last week",
+              lambda: log.query(owner="MSKU", outcome="failed", since=week_ago))
+        timed("everything for owner MSKU last week",
+              lambda: log.query(owner="MSKU", since=week_ago))
+        timed("history of one container",
+              lambda: log.query(container_number="MSKU9876543"))
+        timed("all failures last week",
+              lambda: log.query(outcome="failed", since=week_ago))
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
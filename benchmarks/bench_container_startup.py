@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Cold start and rerun benchmark for the container validator.
+
+Cold start runs each import set in a fresh interpreter: "eager" is what the
+app used to import at the top of the script, "lazy" is what it imports now
+before any image is uploaded. Rerun time drives the app with Streamlit's
+AppTest through a manual-entry verification.
+
+To compare reruns against an older revision of the app:
+
+    git show <rev>:"container management.py" > /tmp/old_app.py
+    python benchmarks/bench_container_startup.py --baseline-app /tmp/old_app.py
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "container management.py")
+
+IMPORT_SETS = {
+    "eager": "import streamlit, cv2, numpy, PIL.Image, pytesseract, re, pandas",
+    "lazy": "import streamlit, container_validation, ocr_settings",
+}
+
+
+def time_cold_import(statement, repeat):
+    """Median wall time of importing `statement` in a fresh interpreter"""
+    timings = []
+    code = ("import time; t = time.perf_counter(); " + statement +
+            "; print(time.perf_counter() - t)")
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True,
+                             capture_output=True, text=True).stdout
+        timings.append(float(out.strip().splitlines()[-1]) * 1000)
+    return statistics.median(timings)
+
+
+def time_reruns(app_path, repeat):
+    """Median rerun time of a manual-entry verification, in milliseconds"""
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, REPO_ROOT)
+    at = AppTest.from_file(app_path, default_timeout=60).run()
+    at.text_input(key="manual_entry").input("TGHU1234565")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        verify = next(b for b in at.button if b.label == "Verify Container Number")
+        verify.click().run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline-app", help="older copy of the app to compare reruns against")
+    args = parser.parse_args(argv)
+
+    print("Cold start (median of fresh interpreters):")
+    for name, statement in IMPORT_SETS.items():
+        print(f"  {name:<6} {time_cold_import(statement, args.repeat):8.1f} ms")
+
+    print("Rerun, manual entry verification (median):")
+    if args.baseline_app:
+        print(f"  before {time_reruns(args.baseline_app, args.repeat):8.1f} ms")
+    print(f"  after  {time_reruns(APP_PATH, args.repeat):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
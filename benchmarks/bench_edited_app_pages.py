@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Rerun latency of the "Edited" app variants, page by page.
+
+Seeds a scratch school.db with a realistically sized school, opens each
+sidebar page of "School Database Edited.py" with Streamlit's AppTest and
+times full reruns (what every widget click costs). Only the open page
+runs, so the pages are timed one at a time; an app without navigation
+renders everything on every rerun and is timed once (the old single-script
+app stops at its first duplicate widget, so its time is a lower bound).
+
+To compare against an older revision of the app:
+
+    git show <rev>:"School Database Edited.py" > /tmp/old_edited.py
+    python benchmarks/bench_edited_app_pages.py --baseline-app /tmp/old_edited.py
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "School Database Edited.py")
+sys.path.insert(0, REPO_ROOT)
+
+from school_migrations import migrate  # noqa: E402
+
+PAGES = ["Dashboard", "Student", "Teacher", "Class", "Subject", "Attendance", "Grades"]
+
+
+def seed(path, students, class_size, teachers, subjects):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    classes = [f"Class {i + 1}" for i in range(max(1, students // class_size))]
+    conn.executemany("INSERT INTO classes (class_name, section, room_no) VALUES (?, 'A', ?)",
+                     [(name, str(100 + i)) for i, name in enumerate(classes)])
+    conn.executemany(
+        "INSERT INTO students (name, roll_no, class, section, dob, gender, address, parent_name,"
+        " parent_contact) VALUES (?, ?, ?, 'A', '2012-01-01', 'Male', 'Address', 'Parent', '0800')",
+        [(f"Student {i}", f"R{i:06d}", classes[i % len(classes)]) for i in range(students)])
+    conn.executemany(
+        "INSERT INTO teachers (name, emp_id, subject, qualification, dob, gender, address, contact)"
+        " VALUES (?, ?, 'Maths', 'B.Ed', '1985-01-01', 'Female', 'Address', '0800')",
+        [(f"Teacher {i}", f"E{i:04d}") for i in range(teachers)])
+    conn.executemany("INSERT INTO subjects (subject_name, subject_code) VALUES (?, ?)",
+                     [(f"Subject {i}", f"S{i:02d}") for i in range(subjects)])
+    conn.commit()
+    conn.close()
+
+
+def _timed_reruns(at, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def time_pages(app_path, repeat):
+    """{page: median rerun ms}, or {None: ms} for an app without st.navigation"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=300).run()
+    pages = {info["page_name"]: page_hash for page_hash, info in at._registered_pages.items()}
+    if not set(PAGES) <= set(pages):
+        return {None: _timed_reruns(at, repeat)}
+    timings = {}
+    for page in PAGES:
+        # AppTest.switch_page only finds file-based pages; these are functions
+        at._page_hash = pages[page]
+        at.run()
+        timings[page] = _timed_reruns(at, repeat)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--class-size", type=int, default=40)
+    parser.add_argument("--teachers", type=int, default=500)
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline-app", help="older copy of the app to compare against")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        seed(os.path.join(tmp, "school.db"), args.students, args.class_size, args.teachers,
+             args.subjects)
+        print(f"Median rerun, {args.students} students:")
+        if args.baseline_app:
+            before = time_pages(os.path.abspath(args.baseline_app), args.repeat)
+            for page, ms in before.items():
+                print(f"  before  {page or 'every page':<12} {ms:8.1f} ms")
+        for page, ms in time_pages(APP_PATH, args.repeat).items():
+            print(f"  after   {page or 'every page':<12} {ms:8.1f} ms")
+        os.chdir(REPO_ROOT)
+
+
+if __name__ == "__main__":
+    main()
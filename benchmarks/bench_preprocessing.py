@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Memory and latency comparison of preprocess_image against PreprocessEngine.
+
+Uses a synthetic quay-crane sized photo (20 megapixels by default). Peak
+memory is the tracemalloc peak of one call, which covers the NumPy arrays
+OpenCV returns; latency is the median of several warm calls. The last
+column counts pixels where the two outputs differ (tile seams in Edge
+Enhancement), unless --max-pixels makes the engine work at another size.
+
+    python benchmarks/bench_preprocessing.py --width 5472 --height 3648 --threads 4
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from container_ocr import PreprocessEngine, preprocess_image  # noqa: E402
+from ocr_settings import PREPROCESSING_METHODS  # noqa: E402
+
+
+def synthetic_photo(width, height, seed=0):
+    """Grey background with scattered container numbers and sensor noise"""
+    rng = np.random.default_rng(seed)
+    img = rng.normal(170, 12, (height, width, 3)).clip(0, 255).astype(np.uint8)
+    for _ in range(200):
+        x, y = int(rng.integers(0, width - 600)), int(rng.integers(60, height))
+        cv2.putText(img, "MSKU9876543", (x, y), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (30, 30, 30), 6)
+    return img
+
+
+def measure(fn, repeat):
+    """Return (median ms, peak MB) for fn()"""
+    fn()  # warm up: first call allocates the engine's buffers
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=5472)
+    parser.add_argument("--height", type=int, default=3648)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None,
+                        help="OpenCV worker threads for the engine")
+    parser.add_argument("--max-pixels", type=int, default=None,
+                        help="engine working-copy cap (default: keep full resolution)")
+    args = parser.parse_args(argv)
+
+    image = synthetic_photo(args.width, args.height)
+    engine = PreprocessEngine(max_pixels=args.max_pixels, threads=args.threads)
+    print(f"{args.width}x{args.height} image, OpenCV threads: {cv2.getNumThreads()}")
+    print(f"{'method':<18}{'current ms':>12}{'engine ms':>12}{'current MB':>12}{'engine MB':>12}"
+          f"{'differ px':>12}")
+    for method in PREPROCESSING_METHODS[1:]:
+        base_ms, base_mb = measure(lambda: preprocess_image(image, method), args.repeat)
+        new_ms, new_mb = measure(lambda: engine.release(engine.run(image, method)), args.repeat)
+        base, new = preprocess_image(image, method), engine.run(image, method)
+        differ = np.count_nonzero(base != new) if base.shape == new.shape else "n/a"
+        engine.release(new)
+        print(f"{method:<18}{base_ms:>12.1f}{new_ms:>12.1f}{base_mb:>12.1f}{new_mb:>12.1f}"
+              f"{differ:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of the lookup reads every rerun of the school app repeats.
+
+Times the dashboard figures, class list, distinct student classes and
+subject list as the pages used to run them (pd.read_sql each time) and
+through school_store's cached readers, then commits a write and checks the
+next cached read sees it.
+
+    python benchmarks/bench_query_cache.py --students 50000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from school_db import connect  # noqa: E402
+from school_migrations import migrate  # noqa: E402
+from school_store import class_names, dashboard_stats, student_classes, subject_names  # noqa: E402
+
+CLASSES = [f"Grade {g}{s}" for g in range(1, 13) for s in "ABCD"]
+
+
+def seed(conn, students):
+    migrate(conn)
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO students (name, roll_no, class, section, dob, gender) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Student {i}", f"R{i:06d}", rng.choice(CLASSES), "A", "2012-01-01", "Female")
+         for i in range(students)])
+    conn.executemany("INSERT INTO classes (class_name) VALUES (?)", [(c,) for c in CLASSES])
+    conn.executemany("INSERT INTO subjects (subject_name) VALUES (?)",
+                     [(f"Subject {i}",) for i in range(20)])
+    conn.commit()
+
+
+def uncached(conn):
+    for table in ("students", "teachers", "classes"):
+        conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+    pd.read_sql("SELECT class_name FROM classes", conn)
+    pd.read_sql("SELECT DISTINCT class FROM students", conn)
+    pd.read_sql("SELECT subject_name FROM subjects", conn)
+
+
+def cached(conn):
+    dashboard_stats(conn, "2025-09-01")
+    class_names(conn)
+    student_classes(conn)
+    subject_names(conn)
+
+
+def median_ms(fn, conn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(conn)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "school.db"))
+        seed(conn, args.students)
+        print(f"Lookup reads of one rerun, {args.students} students:")
+        print(f"  uncached {median_ms(uncached, conn, args.repeat):8.3f} ms")
+        print(f"  cached   {median_ms(cached, conn, args.repeat):8.3f} ms")
+
+        conn.execute("INSERT INTO classes (class_name) VALUES ('New Class')")
+        conn.commit()
+        assert "New Class" in class_names(conn), "write not visible through the cache"
+        print("  committed write visible on the next cached read")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
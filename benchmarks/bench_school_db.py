@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Rerun latency of the school app's database work under concurrent sessions.
+
+Each simulated session performs a series of reruns, every rerun on a new
+thread as Streamlit does. A rerun runs the dashboard queries and loads one
+class roster; one session in four also saves attendance. "before" opens a
+plain sqlite3 connection per rerun (rollback journal) and closes it at the
+end, running the CREATE TABLE IF NOT EXISTS statements each time; "after"
+leases a connection from school_db.ConnectionPool.
+
+    python benchmarks/bench_school_db.py --sessions 8 --reruns 50
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from school_db import ConnectionPool  # noqa: E402
+from school_migrations import load_migrations, migrate  # noqa: E402
+from school_store import save_attendance  # noqa: E402
+
+CLASSES = [f"Grade {g}{s}" for g in range(1, 13) for s in "ABCD"]
+# What the app used to run on every rerun before migrations
+BASE_TABLES_SQL = load_migrations()[0][2]
+
+
+def seed(path, students):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO students (name, roll_no, class, section, dob, gender) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Student {i}", f"R{i:06d}", rng.choice(CLASSES), "A", "2012-01-01", "Female")
+         for i in range(students)])
+    conn.executemany("INSERT INTO classes (class_name) VALUES (?)", [(c,) for c in CLASSES])
+    conn.commit()
+    conn.close()
+
+
+def rerun(conn, writer, rng):
+    """The database work of one rerun of the dashboard plus attendance page"""
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) FROM students").fetchone()
+    c.execute("SELECT COUNT(*) FROM teachers").fetchone()
+    c.execute("SELECT COUNT(*) FROM classes").fetchone()
+    c.execute("SELECT name, roll_no, class FROM students ORDER BY id DESC LIMIT 5").fetchall()
+    c.execute("SELECT class_name FROM classes").fetchall()
+    roster = c.execute("SELECT id, name, roll_no FROM students WHERE class=?",
+                       (rng.choice(CLASSES),)).fetchall()
+    if writer:
+        save_attendance(conn, "2025-09-01",
+                        [(student_id, rng.choice(["Present", "Absent"])) for student_id, _, _ in roster])
+
+
+def run_sessions(open_conn, close_conn, sessions, reruns):
+    timings, errors = [], []
+    lock = threading.Lock()
+
+    def one_rerun(session, i):
+        rng = random.Random(session * 1000 + i)
+        start = time.perf_counter()
+        try:
+            conn = open_conn()
+            rerun(conn, writer=session % 4 == 0, rng=rng)
+            close_conn(conn)
+        except sqlite3.OperationalError as exc:
+            with lock:
+                errors.append(str(exc))
+            return
+        with lock:
+            timings.append((time.perf_counter() - start) * 1000)
+
+    def session_loop(session):
+        for i in range(reruns):
+            t = threading.Thread(target=one_rerun, args=(session, i))
+            t.start()
+            t.join()
+
+    threads = [threading.Thread(target=session_loop, args=(s,)) for s in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return timings, errors
+
+
+def report(label, timings, errors):
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if timings else float("nan")
+    print(f"  {label:<7} median {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms   "
+          f"errors {len(errors)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--students", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        after_path = os.path.join(tmp, "after.db")
+        seed(before_path, args.students)
+        seed(after_path, args.students)
+
+        print(f"{args.sessions} concurrent sessions x {args.reruns} reruns, "
+              f"{args.students} students:")
+        def open_before():
+            conn = sqlite3.connect(before_path)
+            conn.executescript(BASE_TABLES_SQL)
+            return conn
+
+        report("before", *run_sessions(open_before, lambda conn: conn.close(),
+                                       args.sessions, args.reruns))
+        pool = ConnectionPool(after_path)
+        report("after", *run_sessions(pool.connection, lambda conn: None,
+                                      args.sessions, args.reruns))
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Time each school_store operation against a synthetic school.
+
+Seeds a school.db with --students students in classes of 40, --subjects
+subjects with a grade per student for the first term, and --days school
+days of attendance (a few rows unmarked, with no status), then runs every
+operation --repeat times and prints median and p95 milliseconds. Seeding the full size takes a few minutes;
+pass --db to keep the seeded file and reuse it on the next run.
+
+    python benchmarks/bench_school_store.py --students 50000 --days 200 --subjects 20
+"""
+
+import argparse
+import datetime
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_analytics import absence_streaks  # noqa: E402
+from school_db import connect  # noqa: E402
+from school_migrations import migrate  # noqa: E402
+from school_store import (  # noqa: E402
+    GRADES,
+    TERMS,
+    add_student,
+    attendance_sheet,
+    class_attendance,
+    class_students,
+    count_rows,
+    dashboard_stats,
+    delete_student,
+    get_student,
+    gradebook,
+    list_page,
+    pick_students,
+    save_attendance,
+    save_grades,
+    search_students,
+    student_transcript,
+    update_student,
+)
+
+CLASS_SIZE = 40
+FIRST_DAY = datetime.date(2025, 1, 6)
+
+
+def school_days(days):
+    """The first `days` weekdays from FIRST_DAY"""
+    day, result = FIRST_DAY, []
+    while len(result) < days:
+        if day.weekday() < 5:
+            result.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return result
+
+
+def seed(conn, students, days, subjects):
+    migrate(conn)
+    if conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]:
+        return  # reusing a seeded --db
+    rng = random.Random(0)
+    classes = [f"Class {i}" for i in range(max(1, students // CLASS_SIZE))]
+    conn.executemany("INSERT INTO classes (class_name) VALUES (?)", [(c,) for c in classes])
+    conn.executemany("INSERT INTO subjects (subject_name) VALUES (?)",
+                     [(f"Subject {i}",) for i in range(subjects)])
+    conn.executemany(
+        "INSERT INTO students (name, roll_no, class, section, dob, gender) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Student {i}", f"R{i:06d}", classes[i % len(classes)], "A", "2012-01-01", "Female")
+         for i in range(students)])
+    ids = [r[0] for r in conn.execute("SELECT id FROM students")]
+    subject_ids = [r[0] for r in conn.execute("SELECT id FROM subjects")]
+    for subject in subject_ids:
+        conn.executemany("INSERT INTO grades (student_id, subject_id, term, grade, remarks) VALUES (?, ?, ?, ?, '')",
+                         [(sid, subject, TERMS[0], rng.choice(GRADES)) for sid in ids])
+    conn.commit()
+    # None: rows saved without a status, which must not count as absences
+    statuses = ["Present"] * 18 + ["Absent"] * 2 + [None]
+    for day in school_days(days):
+        conn.executemany("INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
+                         [(sid, day, rng.choice(statuses)) for sid in ids])
+        conn.commit()
+
+
+def operations(conn, days):
+    """(name, callable) pairs; each call does one operation with fresh arguments"""
+    rng = random.Random(1)
+    classes = [r[0] for r in conn.execute("SELECT class_name FROM classes")]
+    subject_ids = [r[0] for r in conn.execute("SELECT id FROM subjects")]
+    student_ids = [r[0] for r in conn.execute("SELECT id FROM students")]
+    day_list = school_days(days)
+    # Above every id so far, so roll numbers stay unique on a reused --db
+    counter = itertools.count(conn.execute("SELECT MAX(id) FROM students").fetchone()[0] + 1)
+
+    def roster():
+        return class_students(conn, rng.choice(classes))["id"].tolist()
+
+    def added():
+        n = next(counter)
+        return add_student(conn, f"Bench {n}", f"BENCH{n:07d}", rng.choice(classes), "A", "2012-01-01", "Male")
+
+    def update():
+        student = get_student(conn, rng.choice(student_ids))
+        update_student(conn, student["id"], student["name"], student["roll_no"], student["class"],
+                       student["section"], student["dob"], student["gender"], "New address",
+                       student["parent_name"], student["parent_contact"])
+
+    return [
+        ("add_student", added),
+        ("update_student", update),
+        ("delete_student", lambda: delete_student(conn, added())),
+        ("get_student", lambda: get_student(conn, rng.choice(student_ids))),
+        ("class_students", roster),
+        ("attendance_sheet", lambda: attendance_sheet(conn, rng.choice(classes), rng.choice(day_list))),
+        ("save_attendance", lambda: save_attendance(
+            conn, rng.choice(day_list), [(sid, rng.choice(["Present", "Absent"])) for sid in roster()])),
+        ("class_attendance", lambda: class_attendance(conn, rng.choice(classes), rng.choice(day_list))),
+        ("absence_streaks", lambda: absence_streaks(conn, rng.choice(classes), day_list[0], day_list[-1])),
+        ("gradebook", lambda: gradebook(conn, rng.choice(classes), rng.choice(subject_ids), TERMS[0])),
+        ("save_grades", lambda: save_grades(
+            conn, rng.choice(subject_ids), TERMS[0], [(sid, rng.choice(GRADES), "") for sid in roster()])),
+        ("student_transcript", lambda: student_transcript(conn, rng.choice(student_ids))),
+        ("list_page", lambda: list_page(conn, "students", {"class": rng.choice(classes)})),
+        ("count_rows", lambda: count_rows(conn, "students", {"class": rng.choice(classes)})),
+        ("search_students", lambda: search_students(conn, f"R{rng.randrange(len(student_ids)):06d}")),
+        ("pick_students", lambda: pick_students(conn, f"student {rng.randrange(1, 100)}")),
+        ("dashboard_stats", lambda: dashboard_stats(conn, rng.choice(day_list))),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=200)
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--db", help="seed into (or reuse) this file instead of a temporary one")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(args.db or os.path.join(tmp, "school.db"))
+        start = time.perf_counter()
+        seed(conn, args.students, args.days, args.subjects)
+        print(f"{args.students} students, {args.days} days, {args.subjects} subjects "
+              f"(ready in {time.perf_counter() - start:.0f} s):")
+        for name, operation in operations(conn, args.days):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                operation()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            print(f"  {name:<18} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
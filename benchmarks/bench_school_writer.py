@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Concurrent attendance saves: each session committing on its own connection
+against all sessions going through one SchoolWriter.
+
+Every teacher thread saves its class's attendance for a run of days, as
+at the start of a school day. Reports save latency, errors ("database is
+locked") and, for the writer, how many saves shared a transaction.
+
+    python benchmarks/bench_school_writer.py --teachers 32 --saves 20
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from school_db import connect  # noqa: E402
+from school_migrations import migrate  # noqa: E402
+from school_store import save_attendance  # noqa: E402
+from school_writer import SchoolWriter  # noqa: E402
+
+
+def seed(path, teachers, class_size):
+    conn = connect(path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO students (name, roll_no, class, section, dob, gender) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Student {i}", f"R{i:06d}", f"Class {i % teachers}", "A", "2012-01-01", "Male")
+         for i in range(teachers * class_size)])
+    conn.commit()
+    rosters = {}
+    for student_id, class_name in conn.execute("SELECT id, class FROM students"):
+        rosters.setdefault(class_name, []).append(student_id)
+    conn.close()
+    return list(rosters.items())
+
+
+def run_teachers(rosters, saves, save):
+    """save(class_name, day, statuses) from one thread per class; (latencies ms, errors, seconds)"""
+    timings, errors = [], []
+    lock = threading.Lock()
+
+    def teacher(index, class_name, roster):
+        rng = random.Random(index)
+        for i in range(saves):
+            statuses = [(sid, rng.choice(["Present", "Absent"])) for sid in roster]
+            start = time.perf_counter()
+            try:
+                save(class_name, f"2025-09-{i + 1:02d}", statuses)
+            except sqlite3.OperationalError as exc:
+                with lock:
+                    errors.append(str(exc))
+                continue
+            with lock:
+                timings.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=teacher, args=(i, name, roster))
+               for i, (name, roster) in enumerate(rosters)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return timings, errors, time.perf_counter() - start
+
+
+def report(label, timings, errors, seconds):
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if timings else float("nan")
+    print(f"  {label:<7} median {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms   "
+          f"{len(timings) / seconds:6.0f} saves/s   errors {len(errors)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--teachers", type=int, default=32)
+    parser.add_argument("--saves", type=int, default=20)
+    parser.add_argument("--class-size", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.teachers} teachers x {args.saves} saves of {args.class_size} students:")
+
+        direct_path = os.path.join(tmp, "direct.db")
+        rosters = seed(direct_path, args.teachers, args.class_size)
+        local = threading.local()
+
+        def save_direct(class_name, day, statuses):
+            if not hasattr(local, "conn"):
+                local.conn = connect(direct_path)
+            save_attendance(local.conn, day, statuses, class_name)
+
+        report("direct", *run_teachers(rosters, args.saves, save_direct))
+
+        writer_path = os.path.join(tmp, "writer.db")
+        rosters = seed(writer_path, args.teachers, args.class_size)
+        writer = SchoolWriter(writer_path)
+        report("writer", *run_teachers(
+            rosters, args.saves,
+            lambda class_name, day, statuses: writer.run(save_attendance, day, statuses, class_name)))
+        stats = writer.stats()
+        writer.close()
+        print(f"  writer ran {stats['jobs']} saves in {stats['batches']} transactions "
+              f"(mean {stats['mean_batch']} per transaction, {stats['retries']} retries)")
+
+
+if __name__ == "__main__":
+    main()
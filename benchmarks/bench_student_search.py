@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Student search latency: the old LIKE '%term%' scan against the FTS5 index.
+
+Seeds a scratch school.db with synthetic students (100,000 by default) and
+times a few typical search-box inputs with both approaches.
+
+    python benchmarks/bench_student_search.py --students 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from school_db import connect  # noqa: E402
+from school_migrations import migrate  # noqa: E402
+from school_store import search_students  # noqa: E402
+
+FIRST = ["Adebayo", "Chinedu", "Fatima", "Ngozi", "Ibrahim", "Aisha", "Tunde", "Zainab",
+         "Emeka", "Halima", "Kelechi", "Yusuf", "Amaka", "Musa", "Funke", "Sani"]
+LAST = ["Okafor", "Bello", "Adeyemi", "Eze", "Abubakar", "Ogunleye", "Nwosu", "Danjuma",
+        "Olawale", "Umar", "Chukwu", "Lawal"]
+TERMS = ["ad", "ade", "Fatima Bello", "R004217", "nwos", "0803", "0803123"]
+
+
+def seed(conn, students):
+    rng = random.Random(0)
+    rows = []
+    for i in range(students):
+        last = rng.choice(LAST)
+        rows.append((f"{rng.choice(FIRST)} {last}", f"R{i:06d}", f"JSS{rng.randint(1, 3)}",
+                     f"{rng.choice(FIRST)} {last}", f"0803{rng.randrange(10**7):07d}"))
+    with conn:
+        conn.executemany(
+            "INSERT INTO students (name, roll_no, class, parent_name, parent_contact) "
+            "VALUES (?, ?, ?, ?, ?)", rows)
+
+
+def like_search(conn, term):
+    return conn.execute("SELECT * FROM students WHERE name LIKE ? OR roll_no LIKE ?",
+                        (f"%{term}%", f"%{term}%")).fetchall()
+
+
+def best_ms(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "school.db"))
+        migrate(conn)
+        seed(conn, args.students)
+        print(f"{args.students:,} students, best of 5:")
+        print(f"  {'term':<14}{'LIKE ms':>10}{'FTS5 ms':>10}")
+        for term in TERMS:
+            like_ms = best_ms(lambda: like_search(conn, term))
+            fts_ms = best_ms(lambda: search_students(conn, term))
+            print(f"  {term:<14}{like_ms:>10.2f}{fts_ms:>10.2f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,14 @@ Created on Sun Aug 10 13:59:52 2025
 """
 
 import streamlit as st
-import cv2
-import numpy as np
-from PIL import Image
-import pytesseract
-import re
-import pandas as pd
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+
+# The OCR stack (OpenCV, NumPy, Pillow, Tesseract) is imported on first image
+# upload, so manual entry never pays for it
+from container_validation import check_against_database, validate_container_number
+from ocr_settings import PREPROCESSING_METHODS, load_ocr_profile
+from verification_audit import AuditLog
 
 # Set page config
 st.set_page_config(page_title="Container Number Validator", layout="wide")
@@ -24,92 +25,42 @@ Validate container numbers against ISO 6346 standards and terminal database.
 Upload an image or manually enter a container number for verification.
 """)
 
-# Constants
-CONTAINER_PATTERN = r"^[A-Z]{3}[UJZ][0-9]{6}[0-9]$"
-LETTER_VALUES = {
-    'A': 10, 'B': 12, 'C': 13, 'D': 14, 'E': 15, 'F': 16, 'G': 17, 'H': 18,
-    'I': 19, 'J': 20, 'K': 21, 'L': 23, 'M': 24, 'N': 25, 'O': 26, 'P': 27,
-    'Q': 28, 'R': 29, 'S': 30, 'T': 31, 'U': 32, 'V': 34, 'W': 35, 'X': 36,
-    'Y': 37, 'Z': 38
-}
-
-# Sample database - replace with your actual database connection
-CONTAINER_DB = pd.DataFrame({
-    'container_number': ['TGHU1234565', 'MSKU9876543', 'ABCD1234561'],
-    'status': ['In Yard', 'Departed', 'Invalid'],
-    'last_seen': ['2023-10-15', '2023-09-20', '2023-01-01']
-})
+@st.cache_resource
+def get_ocr_profile():
+    """Load the tuned OCR profile once per server process"""
+    return load_ocr_profile()
+
+ocr_profile = get_ocr_profile()
+
+@st.cache_resource
+def get_preprocess_engine():
+    """Create the shared preprocessing engine on first image upload"""
+    from container_ocr import PreprocessEngine
+    return PreprocessEngine()
+
+@st.cache_resource
+def get_audit_log():
+    """Shared audit log; its writer thread serves every session"""
+    return AuditLog()
+
+audit_log = get_audit_log()
 
 # Sidebar for additional options
 with st.sidebar:
     st.header("Verification Settings")
     check_digit_validation = st.checkbox("Enable Check Digit Validation", True)
     db_validation = st.checkbox("Check Against Terminal Database", True)
+    operator = st.text_input("Operator", key="operator").strip() or None
     
     st.header("OCR Settings")
     preprocessing_method = st.selectbox(
         "Image Preprocessing",
-        ["None", "Grayscale", "Threshold", "Edge Enhancement"]
+        PREPROCESSING_METHODS,
+        index=PREPROCESSING_METHODS.index(ocr_profile["preprocessing"])
     )
 
 # Tab interface
-tab1, tab2, tab3 = st.tabs(["Image Upload", "Manual Entry", "Report Issues"])
-
-def calculate_check_digit(container_num):
-    """Calculate the ISO 6346 check digit"""
-    total = 0
-    for i, char in enumerate(container_num[:10]):
-        # Letters have specific values, numbers use their face value
-        value = LETTER_VALUES[char] if char.isalpha() else int(char)
-        # Weighting: each position is multiplied by 2^position (0-9)
-        total += value * (2 ** i)
-    
-    check_digit = total % 11
-    return str(check_digit) if check_digit < 10 else '0'
-
-def validate_container_number(container_num, check_digit=True):
-    """Validate container number format and check digit"""
-    # Basic format validation
-    if not re.match(CONTAINER_PATTERN, container_num):
-        return False, "Format does not match XXXU1234567 pattern"
-    
-    # Check digit validation
-    if check_digit:
-        calculated_digit = calculate_check_digit(container_num[:-1])
-        if container_num[-1] != calculated_digit:
-            return False, f"Check digit invalid (should be {calculated_digit})"
-    
-    return True, "Valid container number"
-
-def check_against_database(container_num):
-    """Check if container exists in terminal database"""
-    if container_num in CONTAINER_DB['container_number'].values:
-        record = CONTAINER_DB[CONTAINER_DB['container_number'] == container_num].iloc[0]
-        return True, f"Found in database (Status: {record['status']}, Last seen: {record['last_seen']})"
-    return False, "Not found in terminal database"
-
-def preprocess_image(image, method):
-    """Apply selected preprocessing to the image"""
-    img_array = np.array(image)
-    
-    if method == "Grayscale":
-        return cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-    elif method == "Threshold":
-        gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-        return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-    elif method == "Edge Enhancement":
-        gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 100, 200)
-        return cv2.addWeighted(gray, 0.7, edges, 0.3, 0)
-    else:
-        return img_array
-
-def extract_text_from_image(image):
-    """Use OCR to extract text from image"""
-    custom_config = r'--oem 3 --psm 6'
-    text = pytesseract.image_to_string(image, config=custom_config)
-    potential_numbers = re.findall(r"[A-Z]{3}[UJZ][0-9]{6}[0-9]?", text.upper().replace(" ", ""))
-    return potential_numbers[0] if potential_numbers else None
+tab1, tab2, tab3, tab4 = st.tabs(["Image Upload", "Manual Entry", "Report Issues", "Audit Log"])
 
 # Image Upload Tab
 with tab1:
@@ -121,16 +72,23 @@ with tab1:
     )
     
     if uploaded_file is not None:
+        from PIL import Image
+        from container_ocr import extract_text_from_image
+
         image = Image.open(uploaded_file)
         st.image(image, caption="Uploaded Image", use_column_width=True)
         
-        processed_image = preprocess_image(image, preprocessing_method)
+        engine = get_preprocess_engine()
+        processed_image = engine.run(
+            image, preprocessing_method, ocr_profile["target_height"]
+        )
         if preprocessing_method != "None":
             st.image(processed_image, caption="Processed Image", use_column_width=True)
         
         if st.button("Verify Container Number from Image"):
+            started = time.perf_counter()
             with st.spinner("Processing image..."):
-                container_number = extract_text_from_image(processed_image)
+                container_number = extract_text_from_image(processed_image, ocr_profile)
             
             if container_number:
                 st.session_state.container_number = container_number
@@ -146,6 +104,10 @@ with tab1:
                 if db_validation and format_valid:
                     db_valid, db_msg = check_against_database(container_number)
                 
+                audit_log.record(container_number, "image", format_valid, format_msg,
+                                 db_valid, db_msg, (time.perf_counter() - started) * 1000,
+                                 operator)
+                
                 # Display results
                 st.subheader("Verification Results")
                 col1, col2 = st.columns(2)
@@ -165,6 +127,9 @@ with tab1:
             else:
                 st.error("Could not detect a container number in the image")
 
+        # st.image has already encoded it, so the buffer can go back to the pool
+        engine.release(processed_image)
+
 # Manual Entry Tab
 with tab2:
     st.header("Manual Verification")
@@ -177,6 +142,7 @@ with tab2:
     
     if st.button("Verify Container Number"):
         if container_number:
+            started = time.perf_counter()
             # Perform validations
             format_valid, format_msg = validate_container_number(
                 container_number, 
@@ -187,6 +153,10 @@ with tab2:
             if db_validation and format_valid:
                 db_valid, db_msg = check_against_database(container_number)
             
+            audit_log.record(container_number, "manual", format_valid, format_msg,
+                             db_valid, db_msg, (time.perf_counter() - started) * 1000,
+                             operator)
+            
             # Display results
             st.subheader("Verification Results")
             col1, col2 = st.columns(2)
@@ -232,6 +202,38 @@ with tab3:
         st.info(f"Last report submitted: {st.session_state.last_report['number']} "
                f"at {st.session_state.last_report['timestamp']}")
 
+# Audit Log Tab
+with tab4:
+    st.header("Verification Audit Log")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        owner_filter = st.text_input("Owner Code", placeholder="e.g. MSKU").upper().strip()
+    with col2:
+        number_filter = st.text_input("Container Number", key="audit_number").upper().strip()
+    with col3:
+        outcome_filter = st.selectbox("Outcome", ["All", "Failed", "Passed"])
+    with col4:
+        date_range = st.date_input(
+            "Date Range",
+            (datetime.now().date() - timedelta(days=7), datetime.now().date())
+        )
+    
+    # The date picker returns a single date while the range is being chosen
+    if isinstance(date_range, tuple) and len(date_range) == 2:
+        since = datetime.combine(date_range[0], datetime.min.time())
+        until = datetime.combine(date_range[1] + timedelta(days=1), datetime.min.time())
+        rows = audit_log.query(
+            owner=owner_filter,
+            container_number=number_filter,
+            outcome=None if outcome_filter == "All" else outcome_filter.lower(),
+            since=since,
+            until=until,
+        )
+        for row in rows:
+            row["ts"] = datetime.fromtimestamp(row["ts"] / 1000).strftime("%Y-%m-%d %H:%M:%S")
+        st.caption(f"Showing the {len(rows)} most recent matching verifications")
+        st.dataframe(rows, use_container_width=True)
+
 # Add documentation
 st.sidebar.markdown("""
 ### Container Number Format:
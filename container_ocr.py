@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+OCR stack for the container validator: OpenCV preprocessing and Tesseract
+text extraction.
+
+Importing this module loads OpenCV, NumPy and pytesseract, so the app only
+imports it once an image is uploaded. Profile handling lives in
+ocr_settings.py.
+"""
+
+import math
+import re
+import threading
+import weakref
+
+import cv2
+import numpy as np
+import pytesseract
+
+from ocr_settings import DEFAULT_OCR_PROFILE, build_tesseract_config
+
+CONTAINER_TEXT_PATTERN = re.compile(r"[A-Z]{3}[UJZ][0-9]{6}[0-9]?")
+
+# Largest working copy handed to OCR; bigger photos are downsampled first
+MAX_WORKING_PIXELS = 8_000_000
+# Rows processed per tile, and extra rows read around each tile so Canny sees
+# the same neighbourhood as on the full image
+TILE_ROWS = 512
+TILE_OVERLAP = 8
+# Free buffers an engine keeps between calls, oldest dropped first
+MAX_POOLED_BUFFERS = 8
+
+
+def resize_to_height(img_array, target_height):
+    """Scale the image so its height matches target_height (keeps aspect ratio)"""
+    if not target_height or img_array.shape[0] == target_height:
+        return img_array
+    scale = target_height / img_array.shape[0]
+    # INTER_AREA for shrinking, INTER_CUBIC for enlarging small crops
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(img_array, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def preprocess_image(image, method, target_height=None):
+    """Apply selected preprocessing to the image"""
+    img_array = resize_to_height(np.array(image), target_height)
+
+    if method == "Grayscale":
+        return cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+    elif method == "Threshold":
+        gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+        return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+    elif method == "Edge Enhancement":
+        gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(gray, 100, 200)
+        return cv2.addWeighted(gray, 0.7, edges, 0.3, 0)
+    else:
+        return img_array
+
+
+class PreprocessEngine:
+    """Tiled preprocessing that reuses its output buffers between calls.
+
+    Follows preprocess_image, but works on a downsampled copy of photos over
+    max_pixels, processes tall images in horizontal tiles and writes every stage into buffers borrowed from a pool on the engine, so a
+    20 megapixel upload does not allocate a full-size array per stage. The
+    pool is shared by all threads, which matters in the app: Streamlit runs
+    each rerun on a new thread. The returned array is a pooled buffer; hand
+    it back with release() once done with it so later calls can reuse it
+    (an array that is never released is simply garbage collected).
+
+    Below the pixel cap, Grayscale and Threshold give exactly the images of
+    preprocess_image. Edge Enhancement can differ near tile seams: Canny's
+    hysteresis may follow an edge further than the TILE_OVERLAP extra rows
+    a tile reads. benchmarks/bench_preprocessing.py counts the differing
+    pixels.
+    """
+
+    def __init__(self, max_pixels=MAX_WORKING_PIXELS, tile_rows=TILE_ROWS, threads=None):
+        self.max_pixels = max_pixels
+        self.tile_rows = tile_rows
+        if threads is not None:
+            # OpenCV's own parallel backend splits each call across threads
+            cv2.setNumThreads(threads)
+        self._lock = threading.Lock()
+        self._free = []  # [((shape, dtype), buffer)], oldest first
+        self._issued = weakref.WeakValueDictionary()  # id -> buffer out on loan
+
+    def _buffer(self, shape, dtype=np.uint8):
+        """Borrow a free buffer of this shape and dtype, allocating one if none is free"""
+        key = (shape, np.dtype(dtype))
+        with self._lock:
+            for i, (free_key, buf) in enumerate(self._free):
+                if free_key == key:
+                    del self._free[i]
+                    break
+            else:
+                buf = np.empty(shape, dtype)
+            self._issued[id(buf)] = buf
+        return buf
+
+    def release(self, *arrays):
+        """Return buffers handed out by run() to the pool; other arrays are ignored"""
+        with self._lock:
+            for arr in arrays:
+                if self._issued.get(id(arr)) is arr:
+                    del self._issued[id(arr)]
+                    self._free.append(((arr.shape, arr.dtype), arr))
+            del self._free[:-MAX_POOLED_BUFFERS]
+
+    def working_copy(self, image, target_height=None):
+        """Return the image as an array, scaled to target_height and the pixel cap"""
+        img_array = np.asarray(image)
+        height, width = img_array.shape[:2]
+        scale = target_height / height if target_height else 1.0
+        if self.max_pixels and height * width * scale * scale > self.max_pixels:
+            # Whole-number decimation keeps INTER_AREA on its fast path
+            scale = 1 / math.ceil(math.sqrt(height * width / self.max_pixels))
+        if scale == 1.0:
+            return img_array
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        dst = self._buffer((size[1], size[0]) + img_array.shape[2:])
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+        # Pass the scale factors rather than dsize so the result matches resize_to_height
+        return cv2.resize(img_array, (0, 0), dst=dst, fx=scale, fy=scale,
+                          interpolation=interpolation)
+
+    def _to_gray(self, src, dst):
+        """Grayscale conversion into dst (same conversion as preprocess_image)"""
+        if src.ndim == 2:
+            np.copyto(dst, src)
+        elif src.shape[2] == 4:
+            cv2.cvtColor(src, cv2.COLOR_BGRA2GRAY, dst=dst)
+        else:
+            cv2.cvtColor(src, cv2.COLOR_BGR2GRAY, dst=dst)
+
+    def run(self, image, method, target_height=None):
+        """Apply the selected preprocessing, tile by tile"""
+        img_array = self.working_copy(image, target_height)
+        if method not in ("Grayscale", "Threshold", "Edge Enhancement"):
+            return img_array
+
+        height, width = img_array.shape[:2]
+        out = self._buffer((height, width))
+        rows = self.tile_rows
+        # The working copy and tiles are scratch; only out goes to the caller
+        scratch = [img_array]
+        try:
+            if method in ("Grayscale", "Threshold"):
+                for y0 in range(0, height, rows):
+                    self._to_gray(img_array[y0:y0 + rows], out[y0:y0 + rows])
+                if method == "Threshold":
+                    # Otsu needs the histogram of the whole image, so threshold in place
+                    cv2.threshold(out, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
+                return out
+
+            # Edge Enhancement: grayscale, Canny and blend fused per tile, with the
+            # tile extended by TILE_OVERLAP rows so edges at the seams match
+            tile_gray = self._buffer((min(height, rows + 2 * TILE_OVERLAP), width))
+            tile_edges = self._buffer(tile_gray.shape)
+            scratch += [tile_gray, tile_edges]
+            for y0 in range(0, height, rows):
+                y1 = min(y0 + rows, height)
+                top = max(0, y0 - TILE_OVERLAP)
+                bottom = min(height, y1 + TILE_OVERLAP)
+                gray = tile_gray[:bottom - top]
+                edges = tile_edges[:bottom - top]
+                self._to_gray(img_array[top:bottom], gray)
+                cv2.Canny(gray, 100, 200, edges=edges)
+                inner = slice(y0 - top, y1 - top)
+                cv2.addWeighted(gray[inner], 0.7, edges[inner], 0.3, 0, dst=out[y0:y1])
+            return out
+        finally:
+            self.release(*scratch)
+
+
+def extract_text_from_image(image, profile=None):
+    """Use OCR to extract text from image"""
+    profile = profile or DEFAULT_OCR_PROFILE
+    custom_config = build_tesseract_config(profile["oem"], profile["psm"], profile["whitelist"])
+    text = pytesseract.image_to_string(image, config=custom_config)
+    potential_numbers = CONTAINER_TEXT_PATTERN.findall(text.upper().replace(" ", ""))
+    return potential_numbers[0] if potential_numbers else None
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Pure-Python container number validation (ISO 6346) and terminal lookup.
+
+Kept free of the OCR stack (OpenCV, Tesseract, NumPy, Pillow) and pandas so
+the validator app can start and verify manually entered numbers without
+importing any of them.
+"""
+
+import re
+
+# Constants
+CONTAINER_PATTERN = re.compile(r"^[A-Z]{3}[UJZ][0-9]{6}[0-9]$")
+LETTER_VALUES = {
+    'A': 10, 'B': 12, 'C': 13, 'D': 14, 'E': 15, 'F': 16, 'G': 17, 'H': 18,
+    'I': 19, 'J': 20, 'K': 21, 'L': 23, 'M': 24, 'N': 25, 'O': 26, 'P': 27,
+    'Q': 28, 'R': 29, 'S': 30, 'T': 31, 'U': 32, 'V': 34, 'W': 35, 'X': 36,
+    'Y': 37, 'Z': 38
+}
+
+# Sample database - replace with your actual database connection
+CONTAINER_DB = {
+    'TGHU1234565': {'status': 'In Yard', 'last_seen': '2023-10-15'},
+    'MSKU9876543': {'status': 'Departed', 'last_seen': '2023-09-20'},
+    'ABCD1234561': {'status': 'Invalid', 'last_seen': '2023-01-01'},
+}
+
+
+def calculate_check_digit(container_num):
+    """Calculate the ISO 6346 check digit"""
+    total = 0
+    for i, char in enumerate(container_num[:10]):
+        # Letters have specific values, numbers use their face value
+        value = LETTER_VALUES[char] if char.isalpha() else int(char)
+        # Weighting: each position is multiplied by 2^position (0-9)
+        total += value * (2 ** i)
+
+    check_digit = total % 11
+    return str(check_digit) if check_digit < 10 else '0'
+
+
+def validate_container_number(container_num, check_digit=True):
+    """Validate container number format and check digit"""
+    # Basic format validation
+    if not CONTAINER_PATTERN.match(container_num):
+        return False, "Format does not match XXXU1234567 pattern"
+
+    # Check digit validation
+    if check_digit:
+        calculated_digit = calculate_check_digit(container_num[:-1])
+        if container_num[-1] != calculated_digit:
+            return False, f"Check digit invalid (should be {calculated_digit})"
+
+    return True, "Valid container number"
+
+
+def check_against_database(container_num):
+    """Check if container exists in terminal database"""
+    record = CONTAINER_DB.get(container_num)
+    if record is not None:
+        return True, f"Found in database (Status: {record['status']}, Last seen: {record['last_seen']})"
+    return False, "Not found in terminal database"
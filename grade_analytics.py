@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Grade analytics: GPA, class rank, subject statistics and term deltas.
+
+Letter grades map to points in SQL, and one query with window functions
+computes every student's term GPA, rank within the class and change since
+the previous term for all the classes that need it; subject means and
+grade distributions come from a grouped count reshaped with pandas.
+Results are kept per class together with the class's version from
+migration 0009's grade_class_versions, which triggers bump on every grade
+write, so a refresh recomputes only the classes whose grades changed.
+Students without a class are left out.
+"""
+
+import json
+import threading
+
+import pandas as pd
+
+from school_store import GRADES, TERMS
+
+GRADE_POINTS = {"A+": 4.0, "A": 3.7, "B+": 3.3, "B": 3.0, "C+": 2.3, "C": 2.0, "D": 1.0, "F": 0.0}
+
+
+def _case(column, mapping):
+    """SQL CASE expression mapping the literal keys of mapping to its values"""
+    whens = " ".join(f"WHEN '{key}' THEN {value!r}" for key, value in mapping.items())
+    return f"CASE {column} {whens} END"
+
+
+# CASE expressions rather than joins to VALUES tables, which the planner
+# would put in the outer loop and scan once per grade
+STUDENT_TERMS_SQL = f"""
+WITH gpa AS (
+    SELECT s.class, s.id AS student_id, s.name, s.roll_no, g.term,
+           {_case("g.term", {term: i for i, term in enumerate(TERMS)})} AS term_order,
+           AVG({_case("g.grade", GRADE_POINTS)}) AS gpa, COUNT(*) AS subjects
+    FROM students s
+    JOIN grades g ON g.student_id = s.id
+    WHERE s.class IN (SELECT value FROM json_each(?))
+        AND g.grade IN ({", ".join(f"'{grade}'" for grade in GRADE_POINTS)})
+        AND g.term IN ({", ".join(f"'{term}'" for term in TERMS)})
+    GROUP BY s.id, g.term
+)
+SELECT class, student_id, name, roll_no, term, term_order, ROUND(gpa, 3) AS gpa, subjects,
+       RANK() OVER (PARTITION BY class, term ORDER BY gpa DESC) AS class_rank,
+       ROUND(gpa - LAG(gpa) OVER (PARTITION BY student_id ORDER BY term_order), 3) AS delta
+FROM gpa
+ORDER BY class, term_order, class_rank
+"""
+
+SUBJECT_COUNTS_SQL = """
+SELECT s.class, g.term, sub.subject_name AS subject, g.grade, COUNT(*) AS n
+FROM students s
+JOIN grades g ON g.student_id = s.id
+JOIN subjects sub ON sub.id = g.subject_id
+WHERE s.class IN (SELECT value FROM json_each(?))
+GROUP BY 1, 2, g.subject_id, g.grade
+"""
+
+
+def compute_frames(conn, classes):
+    """(student terms, subject statistics) DataFrames covering the given classes"""
+    params = (json.dumps(list(classes)),)
+    students = pd.read_sql(STUDENT_TERMS_SQL, conn, params=params)
+
+    counts = pd.read_sql(SUBJECT_COUNTS_SQL, conn, params=params)
+    counts = counts[counts["grade"].isin(GRADES)]
+    distribution = counts.pivot_table(index=["class", "term", "subject"], columns="grade",
+                                      values="n", aggfunc="sum", fill_value=0)
+    distribution = distribution.reindex(columns=GRADES, fill_value=0)
+    graded = distribution.sum(axis=1)
+    points = pd.Series(GRADE_POINTS).reindex(GRADES)
+    subjects = distribution.assign(
+        graded=graded,
+        mean_points=(distribution @ points / graded).round(3),
+        pass_rate=(1 - distribution["F"] / graded).round(4),
+    ).reset_index()
+    subjects.columns.name = None
+    return students, subjects
+
+
+def compute(conn, classes):
+    """Analytics for the given classes: {class: {"students": df, "subjects": df}}"""
+    students, subjects = compute_frames(conn, classes)
+    by_class = {
+        "students": dict(tuple(students.groupby("class"))),
+        "subjects": dict(tuple(subjects.groupby("class"))),
+    }
+    return {
+        name: {key: frames.get(name, (students if key == "students" else subjects).iloc[0:0])
+                        .reset_index(drop=True)
+               for key, frames in by_class.items()}
+        for name in classes
+    }
+
+
+class GradeAnalytics:
+    """Per-class analytics results, recomputed only for classes whose grades changed"""
+
+    def __init__(self):
+        self._results = {}  # class -> (version, {"students": df, "subjects": df})
+        self._lock = threading.Lock()
+
+    def refresh(self, conn):
+        """Recompute stale classes; returns the names of those recomputed"""
+        versions = dict(conn.execute("SELECT class, version FROM grade_class_versions"))
+        with self._lock:
+            stale = [name for name, version in versions.items()
+                     if self._results.get(name, (None,))[0] != version]
+            for name in set(self._results) - set(versions):
+                del self._results[name]
+        if stale:
+            fresh = compute(conn, stale)
+            with self._lock:
+                for name in stale:
+                    self._results[name] = (versions[name], fresh[name])
+        return stale
+
+    def _frames(self, conn, key, class_name):
+        self.refresh(conn)
+        with self._lock:
+            if class_name is not None:
+                result = self._results.get(class_name)
+                frames = [result[1][key]] if result else []
+            else:
+                frames = [result[key] for _, result in self._results.values()]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            # Empty frames with the right columns
+            return compute_frames(conn, [])[0 if key == "students" else 1]
+        return pd.concat(frames, ignore_index=True)
+
+    def student_terms(self, conn, class_name=None, term=None):
+        """Term GPA, class rank and change from the previous term per student"""
+        frame = self._frames(conn, "students", class_name)
+        if term is not None:
+            frame = frame[frame["term"] == term]
+        return frame.sort_values(["class", "term_order", "class_rank"], ignore_index=True)
+
+    def student_gpa(self, conn, class_name=None):
+        """Cumulative GPA over all terms, weighted by subjects graded, with class rank"""
+        terms = self._frames(conn, "students", class_name)
+        totals = (terms.assign(points=terms["gpa"] * terms["subjects"])
+                  .groupby(["class", "student_id", "name", "roll_no"], as_index=False)
+                  [["points", "subjects"]].sum())
+        totals["gpa"] = (totals["points"] / totals["subjects"]).round(3)
+        totals["class_rank"] = (totals.groupby("class")["gpa"]
+                                .rank(method="min", ascending=False).astype(int))
+        return (totals.drop(columns="points")
+                .sort_values(["class", "class_rank", "roll_no"], ignore_index=True))
+
+    def subject_stats(self, conn, class_name=None, term=None):
+        """Mean points, pass rate and grade distribution per subject"""
+        frame = self._frames(conn, "subjects", class_name)
+        if term is not None:
+            frame = frame[frame["term"] == term]
+        return frame.reset_index(drop=True)
@@ -0,0 +1,54 @@
+-- Tables as created by the original init_db. IF NOT EXISTS keeps this a
+-- no-op on school.db files that predate migrations.
+
+CREATE TABLE IF NOT EXISTS students
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    roll_no TEXT UNIQUE,
+    class TEXT,
+    section TEXT,
+    dob DATE,
+    gender TEXT,
+    address TEXT,
+    parent_name TEXT,
+    parent_contact TEXT);
+
+CREATE TABLE IF NOT EXISTS teachers
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    emp_id TEXT UNIQUE,
+    subject TEXT,
+    qualification TEXT,
+    dob DATE,
+    gender TEXT,
+    address TEXT,
+    contact TEXT);
+
+CREATE TABLE IF NOT EXISTS classes
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    class_name TEXT UNIQUE,
+    section TEXT,
+    class_teacher_id INTEGER,
+    room_no TEXT);
+
+CREATE TABLE IF NOT EXISTS subjects
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject_name TEXT UNIQUE,
+    subject_code TEXT);
+
+CREATE TABLE IF NOT EXISTS attendance
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER,
+    date DATE,
+    status TEXT,
+    FOREIGN KEY(student_id) REFERENCES students(id));
+
+CREATE TABLE IF NOT EXISTS grades
+    (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER,
+    subject_id INTEGER,
+    term TEXT,
+    grade TEXT,
+    remarks TEXT,
+    FOREIGN KEY(student_id) REFERENCES students(id),
+    FOREIGN KEY(subject_id) REFERENCES subjects(id));
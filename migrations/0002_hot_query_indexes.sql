@@ -0,0 +1,10 @@
+-- Secondary indexes for the queries every page runs.
+
+-- View Attendance: WHERE a.date = ? joined to the class roster
+CREATE INDEX IF NOT EXISTS ix_attendance_date_student ON attendance (date, student_id);
+
+-- Attendance and Grades rosters: students WHERE class = ?
+CREATE INDEX IF NOT EXISTS ix_students_class ON students (class);
+
+-- View Grades joins and per-student lookups
+CREATE INDEX IF NOT EXISTS ix_grades_student_subject_term ON grades (student_id, subject_id, term);
@@ -0,0 +1,7 @@
+-- One attendance row per student per day. Earlier saves of the same day
+-- (double clicks, re-marking) are dropped, keeping the most recent one.
+
+DELETE FROM attendance
+WHERE id NOT IN (SELECT MAX(id) FROM attendance GROUP BY student_id, date);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_attendance_student_date ON attendance (student_id, date);
@@ -0,0 +1,10 @@
+-- One grade per student, subject and term. Re-saving a class used to insert
+-- every row again; keep the most recent entry and enforce uniqueness.
+
+DELETE FROM grades
+WHERE id NOT IN (SELECT MAX(id) FROM grades GROUP BY student_id, subject_id, term);
+
+DROP INDEX IF EXISTS ix_grades_student_subject_term;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_grades_student_subject_term
+    ON grades (student_id, subject_id, term);
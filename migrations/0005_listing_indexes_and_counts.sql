@@ -0,0 +1,80 @@
+-- Keyset-paginated listings: sort indexes, plus row counts grouped by the
+-- listing filters and kept current by triggers, so a filtered total is a sum
+-- over a handful of rows instead of a COUNT(*) scan. NULL filter values are
+-- counted under ''.
+
+CREATE INDEX IF NOT EXISTS ix_students_name ON students (name);
+CREATE INDEX IF NOT EXISTS ix_students_class_name ON students (class, name);
+DROP INDEX IF EXISTS ix_students_class;
+CREATE INDEX IF NOT EXISTS ix_teachers_name ON teachers (name);
+
+CREATE TABLE IF NOT EXISTS student_counts
+    (class TEXT NOT NULL,
+    section TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (class, section, gender)) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS teacher_counts
+    (subject TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (subject, gender)) WITHOUT ROWID;
+
+INSERT INTO student_counts (class, section, gender, n)
+SELECT COALESCE(class, ''), COALESCE(section, ''), COALESCE(gender, ''), COUNT(*)
+FROM students GROUP BY 1, 2, 3;
+
+INSERT INTO teacher_counts (subject, gender, n)
+SELECT COALESCE(subject, ''), COALESCE(gender, ''), COUNT(*)
+FROM teachers GROUP BY 1, 2;
+
+CREATE TRIGGER IF NOT EXISTS tr_student_counts_insert AFTER INSERT ON students
+BEGIN
+    INSERT INTO student_counts (class, section, gender, n)
+    VALUES (COALESCE(NEW.class, ''), COALESCE(NEW.section, ''), COALESCE(NEW.gender, ''), 1)
+    ON CONFLICT (class, section, gender) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_student_counts_delete AFTER DELETE ON students
+BEGIN
+    UPDATE student_counts SET n = n - 1
+    WHERE class = COALESCE(OLD.class, '') AND section = COALESCE(OLD.section, '')
+        AND gender = COALESCE(OLD.gender, '');
+    DELETE FROM student_counts WHERE n <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_student_counts_update AFTER UPDATE OF class, section, gender ON students
+BEGIN
+    UPDATE student_counts SET n = n - 1
+    WHERE class = COALESCE(OLD.class, '') AND section = COALESCE(OLD.section, '')
+        AND gender = COALESCE(OLD.gender, '');
+    INSERT INTO student_counts (class, section, gender, n)
+    VALUES (COALESCE(NEW.class, ''), COALESCE(NEW.section, ''), COALESCE(NEW.gender, ''), 1)
+    ON CONFLICT (class, section, gender) DO UPDATE SET n = n + 1;
+    DELETE FROM student_counts WHERE n <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_teacher_counts_insert AFTER INSERT ON teachers
+BEGIN
+    INSERT INTO teacher_counts (subject, gender, n)
+    VALUES (COALESCE(NEW.subject, ''), COALESCE(NEW.gender, ''), 1)
+    ON CONFLICT (subject, gender) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_teacher_counts_delete AFTER DELETE ON teachers
+BEGIN
+    UPDATE teacher_counts SET n = n - 1
+    WHERE subject = COALESCE(OLD.subject, '') AND gender = COALESCE(OLD.gender, '');
+    DELETE FROM teacher_counts WHERE n <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_teacher_counts_update AFTER UPDATE OF subject, gender ON teachers
+BEGIN
+    UPDATE teacher_counts SET n = n - 1
+    WHERE subject = COALESCE(OLD.subject, '') AND gender = COALESCE(OLD.gender, '');
+    INSERT INTO teacher_counts (subject, gender, n)
+    VALUES (COALESCE(NEW.subject, ''), COALESCE(NEW.gender, ''), 1)
+    ON CONFLICT (subject, gender) DO UPDATE SET n = n + 1;
+    DELETE FROM teacher_counts WHERE n <= 0;
+END;
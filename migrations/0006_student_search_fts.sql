@@ -0,0 +1,34 @@
+-- Full-text index over the student fields the search box looks at. It is an
+-- external-content table (the text lives in students only), kept in sync by
+-- triggers. prefix='2 3 4' adds prefix indexes so typing-as-you-search queries
+-- like "ade*" don't scan the whole term list.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+    name, roll_no, parent_name, parent_contact,
+    content='students', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3 4'
+);
+
+INSERT INTO students_fts (students_fts) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS tr_students_fts_insert AFTER INSERT ON students
+BEGIN
+    INSERT INTO students_fts (rowid, name, roll_no, parent_name, parent_contact)
+    VALUES (NEW.id, NEW.name, NEW.roll_no, NEW.parent_name, NEW.parent_contact);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_students_fts_delete AFTER DELETE ON students
+BEGIN
+    INSERT INTO students_fts (students_fts, rowid, name, roll_no, parent_name, parent_contact)
+    VALUES ('delete', OLD.id, OLD.name, OLD.roll_no, OLD.parent_name, OLD.parent_contact);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_students_fts_update
+AFTER UPDATE OF name, roll_no, parent_name, parent_contact ON students
+BEGIN
+    INSERT INTO students_fts (students_fts, rowid, name, roll_no, parent_name, parent_contact)
+    VALUES ('delete', OLD.id, OLD.name, OLD.roll_no, OLD.parent_name, OLD.parent_contact);
+    INSERT INTO students_fts (rowid, name, roll_no, parent_name, parent_contact)
+    VALUES (NEW.id, NEW.name, NEW.roll_no, NEW.parent_name, NEW.parent_contact);
+END;
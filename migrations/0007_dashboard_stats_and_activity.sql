@@ -0,0 +1,207 @@
+-- Dashboard figures kept current by triggers, so the dashboard reads a few
+-- rows instead of counting whole tables: entity totals, attendance totals
+-- per day and status, and grades entered per term. activity_log is the
+-- recent-activity feed: one row per student, teacher, class or subject
+-- change (written here by triggers) and one per attendance or grades save
+-- (written by school_store, so a batch of hundreds of rows is one entry).
+
+CREATE TABLE IF NOT EXISTS school_stats
+    (name TEXT PRIMARY KEY,
+    n INTEGER NOT NULL) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS attendance_daily
+    (date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (date, status)) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS grade_term_counts
+    (term TEXT PRIMARY KEY,
+    n INTEGER NOT NULL) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS activity_log
+    (id INTEGER PRIMARY KEY,
+    at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    entity TEXT NOT NULL,
+    action TEXT NOT NULL,
+    summary TEXT NOT NULL);
+
+INSERT INTO school_stats (name, n)
+SELECT 'students', COUNT(*) FROM students
+UNION ALL SELECT 'teachers', COUNT(*) FROM teachers
+UNION ALL SELECT 'classes', COUNT(*) FROM classes
+UNION ALL SELECT 'subjects', COUNT(*) FROM subjects;
+
+-- Rows without a date are not counted (see 0013)
+INSERT INTO attendance_daily (date, status, n)
+SELECT date, COALESCE(status, ''), COUNT(*) FROM attendance WHERE date IS NOT NULL GROUP BY 1, 2;
+
+INSERT INTO grade_term_counts (term, n)
+SELECT COALESCE(term, ''), COUNT(*) FROM grades GROUP BY 1;
+
+-- Entity totals
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_students_insert AFTER INSERT ON students
+BEGIN
+    UPDATE school_stats SET n = n + 1 WHERE name = 'students';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_students_delete AFTER DELETE ON students
+BEGIN
+    UPDATE school_stats SET n = n - 1 WHERE name = 'students';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_teachers_insert AFTER INSERT ON teachers
+BEGIN
+    UPDATE school_stats SET n = n + 1 WHERE name = 'teachers';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_teachers_delete AFTER DELETE ON teachers
+BEGIN
+    UPDATE school_stats SET n = n - 1 WHERE name = 'teachers';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_classes_insert AFTER INSERT ON classes
+BEGIN
+    UPDATE school_stats SET n = n + 1 WHERE name = 'classes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_classes_delete AFTER DELETE ON classes
+BEGIN
+    UPDATE school_stats SET n = n - 1 WHERE name = 'classes';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_subjects_insert AFTER INSERT ON subjects
+BEGIN
+    UPDATE school_stats SET n = n + 1 WHERE name = 'subjects';
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_stats_subjects_delete AFTER DELETE ON subjects
+BEGIN
+    UPDATE school_stats SET n = n - 1 WHERE name = 'subjects';
+END;
+
+-- Attendance totals per day and status
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_daily_insert AFTER INSERT ON attendance
+BEGIN
+    INSERT INTO attendance_daily (date, status, n)
+    VALUES (NEW.date, COALESCE(NEW.status, ''), 1)
+    ON CONFLICT (date, status) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_daily_delete AFTER DELETE ON attendance
+BEGIN
+    UPDATE attendance_daily SET n = n - 1
+    WHERE date = OLD.date AND status = COALESCE(OLD.status, '');
+    DELETE FROM attendance_daily WHERE date = OLD.date AND n <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_daily_update AFTER UPDATE OF date, status ON attendance
+BEGIN
+    UPDATE attendance_daily SET n = n - 1
+    WHERE date = OLD.date AND status = COALESCE(OLD.status, '');
+    INSERT INTO attendance_daily (date, status, n)
+    VALUES (NEW.date, COALESCE(NEW.status, ''), 1)
+    ON CONFLICT (date, status) DO UPDATE SET n = n + 1;
+    DELETE FROM attendance_daily WHERE date = OLD.date AND n <= 0;
+END;
+
+-- Grades entered per term
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_term_counts_insert AFTER INSERT ON grades
+BEGIN
+    INSERT INTO grade_term_counts (term, n) VALUES (COALESCE(NEW.term, ''), 1)
+    ON CONFLICT (term) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_term_counts_delete AFTER DELETE ON grades
+BEGIN
+    UPDATE grade_term_counts SET n = n - 1 WHERE term = COALESCE(OLD.term, '');
+    DELETE FROM grade_term_counts WHERE n <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_term_counts_update AFTER UPDATE OF term ON grades
+BEGIN
+    UPDATE grade_term_counts SET n = n - 1 WHERE term = COALESCE(OLD.term, '');
+    INSERT INTO grade_term_counts (term, n) VALUES (COALESCE(NEW.term, ''), 1)
+    ON CONFLICT (term) DO UPDATE SET n = n + 1;
+    DELETE FROM grade_term_counts WHERE n <= 0;
+END;
+
+-- Recent activity, trimmed to the latest 1000 entries
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_log_trim AFTER INSERT ON activity_log
+BEGIN
+    DELETE FROM activity_log WHERE id <= NEW.id - 1000;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_students_insert AFTER INSERT ON students
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('student', 'added', 'Added student ' || COALESCE(NEW.name, '')
+            || ' (' || COALESCE(NEW.roll_no, '') || ', ' || COALESCE(NEW.class, '') || ')');
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_students_update AFTER UPDATE ON students
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('student', 'updated', 'Updated student ' || COALESCE(NEW.name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_students_delete AFTER DELETE ON students
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('student', 'deleted', 'Deleted student ' || COALESCE(OLD.name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_teachers_insert AFTER INSERT ON teachers
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('teacher', 'added', 'Added teacher ' || COALESCE(NEW.name, '')
+            || ' (' || COALESCE(NEW.subject, '') || ')');
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_teachers_update AFTER UPDATE ON teachers
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('teacher', 'updated', 'Updated teacher ' || COALESCE(NEW.name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_teachers_delete AFTER DELETE ON teachers
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('teacher', 'deleted', 'Deleted teacher ' || COALESCE(OLD.name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_classes_insert AFTER INSERT ON classes
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('class', 'added', 'Added class ' || COALESCE(NEW.class_name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_classes_teacher AFTER UPDATE OF class_teacher_id ON classes
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('class', 'updated', 'Assigned '
+            || COALESCE((SELECT name FROM teachers WHERE id = NEW.class_teacher_id), 'no teacher')
+            || ' as class teacher for ' || COALESCE(NEW.class_name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_classes_delete AFTER DELETE ON classes
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('class', 'deleted', 'Deleted class ' || COALESCE(OLD.class_name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_subjects_insert AFTER INSERT ON subjects
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('subject', 'added', 'Added subject ' || COALESCE(NEW.subject_name, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_activity_subjects_delete AFTER DELETE ON subjects
+BEGIN
+    INSERT INTO activity_log (entity, action, summary)
+    VALUES ('subject', 'deleted', 'Deleted subject ' || COALESCE(OLD.subject_name, ''));
+END;
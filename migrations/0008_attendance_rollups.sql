@@ -0,0 +1,100 @@
+-- Attendance rollups kept current by triggers: present/absent totals per
+-- class and day, and per student and month (YYYY-MM). Term-wide rates and
+-- chronic-absentee lists are sums over these instead of scans of the raw
+-- attendance table. Class figures follow each student's current class: when
+-- a student changes class, their attendance moves with them.
+
+CREATE TABLE IF NOT EXISTS attendance_class_daily
+    (class TEXT NOT NULL,
+    date TEXT NOT NULL,
+    present INTEGER NOT NULL,
+    absent INTEGER NOT NULL,
+    PRIMARY KEY (class, date)) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS attendance_student_monthly
+    (student_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    present INTEGER NOT NULL,
+    absent INTEGER NOT NULL,
+    PRIMARY KEY (student_id, month)) WITHOUT ROWID;
+
+INSERT INTO attendance_class_daily (class, date, present, absent)
+SELECT COALESCE(s.class, ''), a.date, SUM(a.status IS 'Present'), SUM(a.status IS 'Absent')
+FROM attendance a LEFT JOIN students s ON s.id = a.student_id
+WHERE a.date IS NOT NULL
+GROUP BY 1, 2;
+
+INSERT INTO attendance_student_monthly (student_id, month, present, absent)
+SELECT student_id, substr(date, 1, 7), SUM(status IS 'Present'), SUM(status IS 'Absent')
+FROM attendance
+WHERE student_id IS NOT NULL AND date IS NOT NULL
+GROUP BY 1, 2;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_rollups_insert AFTER INSERT ON attendance
+BEGIN
+    INSERT INTO attendance_class_daily (class, date, present, absent)
+    VALUES (COALESCE((SELECT class FROM students WHERE id = NEW.student_id), ''), NEW.date,
+            NEW.status IS 'Present', NEW.status IS 'Absent')
+    ON CONFLICT (class, date) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+
+    INSERT INTO attendance_student_monthly (student_id, month, present, absent)
+    VALUES (NEW.student_id, substr(NEW.date, 1, 7), NEW.status IS 'Present', NEW.status IS 'Absent')
+    ON CONFLICT (student_id, month) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_rollups_class_change AFTER UPDATE OF class ON students
+WHEN OLD.class IS NOT NEW.class
+BEGIN
+    UPDATE attendance_class_daily
+    SET present = present - (SELECT COUNT(*) FROM attendance a
+                             WHERE a.student_id = NEW.id AND a.date = attendance_class_daily.date
+                                 AND a.status IS 'Present'),
+        absent = absent - (SELECT COUNT(*) FROM attendance a
+                           WHERE a.student_id = NEW.id AND a.date = attendance_class_daily.date
+                               AND a.status IS 'Absent')
+    WHERE class = COALESCE(OLD.class, '')
+        AND date IN (SELECT date FROM attendance WHERE student_id = NEW.id);
+
+    INSERT INTO attendance_class_daily (class, date, present, absent)
+    SELECT COALESCE(NEW.class, ''), date, SUM(status IS 'Present'), SUM(status IS 'Absent')
+    FROM attendance WHERE student_id = NEW.id AND date IS NOT NULL
+    GROUP BY date
+    ON CONFLICT (class, date) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_rollups_delete AFTER DELETE ON attendance
+BEGIN
+    UPDATE attendance_class_daily
+    SET present = present - (OLD.status IS 'Present'), absent = absent - (OLD.status IS 'Absent')
+    WHERE class = COALESCE((SELECT class FROM students WHERE id = OLD.student_id), '')
+        AND date = OLD.date;
+
+    UPDATE attendance_student_monthly
+    SET present = present - (OLD.status IS 'Present'), absent = absent - (OLD.status IS 'Absent')
+    WHERE student_id = OLD.student_id AND month = substr(OLD.date, 1, 7);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_rollups_update
+AFTER UPDATE OF student_id, date, status ON attendance
+BEGIN
+    UPDATE attendance_class_daily
+    SET present = present - (OLD.status IS 'Present'), absent = absent - (OLD.status IS 'Absent')
+    WHERE class = COALESCE((SELECT class FROM students WHERE id = OLD.student_id), '')
+        AND date = OLD.date;
+    INSERT INTO attendance_class_daily (class, date, present, absent)
+    VALUES (COALESCE((SELECT class FROM students WHERE id = NEW.student_id), ''), NEW.date,
+            NEW.status IS 'Present', NEW.status IS 'Absent')
+    ON CONFLICT (class, date) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+
+    UPDATE attendance_student_monthly
+    SET present = present - (OLD.status IS 'Present'), absent = absent - (OLD.status IS 'Absent')
+    WHERE student_id = OLD.student_id AND month = substr(OLD.date, 1, 7);
+    INSERT INTO attendance_student_monthly (student_id, month, present, absent)
+    VALUES (NEW.student_id, substr(NEW.date, 1, 7), NEW.status IS 'Present', NEW.status IS 'Absent')
+    ON CONFLICT (student_id, month) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+END;
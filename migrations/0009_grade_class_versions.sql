@@ -0,0 +1,56 @@
+-- A version number per class, bumped by triggers whenever a grade of one
+-- of its students is written or the class's students change. Grade
+-- analytics keep results per class and recompute only the classes whose
+-- version moved since they were computed.
+
+CREATE TABLE IF NOT EXISTS grade_class_versions
+    (class TEXT PRIMARY KEY,
+    version INTEGER NOT NULL) WITHOUT ROWID;
+
+INSERT INTO grade_class_versions (class, version)
+SELECT DISTINCT COALESCE(s.class, ''), 1
+FROM grades g JOIN students s ON s.id = g.student_id;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_versions_insert AFTER INSERT ON grades
+BEGIN
+    INSERT INTO grade_class_versions (class, version)
+    VALUES (COALESCE((SELECT class FROM students WHERE id = NEW.student_id), ''), 1)
+    ON CONFLICT (class) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_versions_delete AFTER DELETE ON grades
+BEGIN
+    INSERT INTO grade_class_versions (class, version)
+    VALUES (COALESCE((SELECT class FROM students WHERE id = OLD.student_id), ''), 1)
+    ON CONFLICT (class) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_versions_update AFTER UPDATE ON grades
+BEGIN
+    INSERT INTO grade_class_versions (class, version)
+    VALUES (COALESCE((SELECT class FROM students WHERE id = OLD.student_id), ''), 1)
+    ON CONFLICT (class) DO UPDATE SET version = version + 1;
+    INSERT INTO grade_class_versions (class, version)
+    SELECT COALESCE((SELECT class FROM students WHERE id = NEW.student_id), ''), 1
+    WHERE NEW.student_id IS NOT OLD.student_id
+    ON CONFLICT (class) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_versions_student_update
+AFTER UPDATE OF name, roll_no, class ON students
+BEGIN
+    INSERT INTO grade_class_versions (class, version)
+    VALUES (COALESCE(OLD.class, ''), 1)
+    ON CONFLICT (class) DO UPDATE SET version = version + 1;
+    INSERT INTO grade_class_versions (class, version)
+    SELECT COALESCE(NEW.class, ''), 1
+    WHERE NEW.class IS NOT OLD.class
+    ON CONFLICT (class) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_versions_student_delete AFTER DELETE ON students
+BEGIN
+    INSERT INTO grade_class_versions (class, version)
+    VALUES (COALESCE(OLD.class, ''), 1)
+    ON CONFLICT (class) DO UPDATE SET version = version + 1;
+END;
@@ -0,0 +1,19 @@
+-- Compact attendance storage (see attendance_bitmap.py): one row per class
+-- and day holding two packed bitsets, the students marked that day and the
+-- students present, indexed by each student's ordinal in the class roster.
+-- Ordinals are assigned once and never reused, so old bitmaps keep their
+-- meaning when students join or leave a class.
+
+CREATE TABLE IF NOT EXISTS class_roster
+    (class TEXT NOT NULL,
+    ordinal INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    PRIMARY KEY (class, ordinal),
+    UNIQUE (class, student_id)) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS attendance_bitmaps
+    (class TEXT NOT NULL,
+    date TEXT NOT NULL,
+    marked BLOB NOT NULL,
+    present BLOB NOT NULL,
+    PRIMARY KEY (class, date)) WITHOUT ROWID;
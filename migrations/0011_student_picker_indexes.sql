@@ -0,0 +1,6 @@
+-- Case-insensitive indexes for the student picker, which looks students up
+-- by roll number or name prefix. A range on `column COLLATE NOCASE` can only
+-- use an index with the same collation, and then reads just the rows in range.
+
+CREATE INDEX IF NOT EXISTS ix_students_roll_no_nocase ON students (roll_no COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS ix_students_name_nocase ON students (name COLLATE NOCASE);
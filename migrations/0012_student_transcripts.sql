@@ -0,0 +1,37 @@
+-- Transcripts by student id. The index covers the transcript query, so a
+-- student's grades are read from one index range without touching the
+-- table. grade_student_versions is bumped by triggers whenever one of the
+-- student's grades is written; cached transcripts are keyed by it, so a
+-- grade write only makes that student's transcript stale.
+
+CREATE INDEX IF NOT EXISTS ix_grades_transcript
+    ON grades (student_id, term, subject_id, grade, remarks);
+
+CREATE TABLE IF NOT EXISTS grade_student_versions
+    (student_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL);
+
+INSERT INTO grade_student_versions (student_id, version)
+SELECT DISTINCT student_id, 1 FROM grades WHERE student_id IS NOT NULL;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_student_versions_insert AFTER INSERT ON grades
+BEGIN
+    INSERT INTO grade_student_versions (student_id, version) VALUES (NEW.student_id, 1)
+    ON CONFLICT (student_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_student_versions_delete AFTER DELETE ON grades
+BEGIN
+    INSERT INTO grade_student_versions (student_id, version) VALUES (OLD.student_id, 1)
+    ON CONFLICT (student_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_grade_student_versions_update AFTER UPDATE ON grades
+BEGIN
+    INSERT INTO grade_student_versions (student_id, version) VALUES (OLD.student_id, 1)
+    ON CONFLICT (student_id) DO UPDATE SET version = version + 1;
+    INSERT INTO grade_student_versions (student_id, version)
+    SELECT NEW.student_id, 1
+    WHERE NEW.student_id IS NOT OLD.student_id
+    ON CONFLICT (student_id) DO UPDATE SET version = version + 1;
+END;
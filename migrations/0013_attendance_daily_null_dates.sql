@@ -0,0 +1,25 @@
+-- Attendance rows without a date are left out of attendance_daily, whose
+-- date is NOT NULL: the 0007 triggers copied NEW.date as is, so inserting
+-- or updating such a row failed. They are recreated to skip those rows.
+
+DROP TRIGGER IF EXISTS tr_attendance_daily_insert;
+DROP TRIGGER IF EXISTS tr_attendance_daily_update;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_daily_insert AFTER INSERT ON attendance
+WHEN NEW.date IS NOT NULL
+BEGIN
+    INSERT INTO attendance_daily (date, status, n)
+    VALUES (NEW.date, COALESCE(NEW.status, ''), 1)
+    ON CONFLICT (date, status) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_daily_update AFTER UPDATE OF date, status ON attendance
+BEGIN
+    UPDATE attendance_daily SET n = n - 1
+    WHERE date = OLD.date AND status = COALESCE(OLD.status, '');
+    INSERT INTO attendance_daily (date, status, n)
+    SELECT NEW.date, COALESCE(NEW.status, ''), 1
+    WHERE NEW.date IS NOT NULL
+    ON CONFLICT (date, status) DO UPDATE SET n = n + 1;
+    DELETE FROM attendance_daily WHERE date = OLD.date AND n <= 0;
+END;
@@ -0,0 +1,47 @@
+-- The 0008 rollup triggers copied NEW.date and NEW.student_id as is into
+-- NOT NULL columns, so inserting or updating an attendance row without a
+-- date (or student) failed. They are recreated to leave such rows out, as
+-- the 0008 backfill already does.
+
+DROP TRIGGER IF EXISTS tr_attendance_rollups_insert;
+DROP TRIGGER IF EXISTS tr_attendance_rollups_update;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_rollups_insert AFTER INSERT ON attendance
+WHEN NEW.date IS NOT NULL
+BEGIN
+    INSERT INTO attendance_class_daily (class, date, present, absent)
+    VALUES (COALESCE((SELECT class FROM students WHERE id = NEW.student_id), ''), NEW.date,
+            NEW.status IS 'Present', NEW.status IS 'Absent')
+    ON CONFLICT (class, date) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+
+    INSERT INTO attendance_student_monthly (student_id, month, present, absent)
+    SELECT NEW.student_id, substr(NEW.date, 1, 7), NEW.status IS 'Present', NEW.status IS 'Absent'
+    WHERE NEW.student_id IS NOT NULL
+    ON CONFLICT (student_id, month) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tr_attendance_rollups_update
+AFTER UPDATE OF student_id, date, status ON attendance
+BEGIN
+    UPDATE attendance_class_daily
+    SET present = present - (OLD.status IS 'Present'), absent = absent - (OLD.status IS 'Absent')
+    WHERE class = COALESCE((SELECT class FROM students WHERE id = OLD.student_id), '')
+        AND date = OLD.date;
+    INSERT INTO attendance_class_daily (class, date, present, absent)
+    SELECT COALESCE((SELECT class FROM students WHERE id = NEW.student_id), ''), NEW.date,
+           NEW.status IS 'Present', NEW.status IS 'Absent'
+    WHERE NEW.date IS NOT NULL
+    ON CONFLICT (class, date) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+
+    UPDATE attendance_student_monthly
+    SET present = present - (OLD.status IS 'Present'), absent = absent - (OLD.status IS 'Absent')
+    WHERE student_id = OLD.student_id AND month = substr(OLD.date, 1, 7);
+    INSERT INTO attendance_student_monthly (student_id, month, present, absent)
+    SELECT NEW.student_id, substr(NEW.date, 1, 7), NEW.status IS 'Present', NEW.status IS 'Absent'
+    WHERE NEW.student_id IS NOT NULL AND NEW.date IS NOT NULL
+    ON CONFLICT (student_id, month) DO UPDATE
+    SET present = present + excluded.present, absent = absent + excluded.absent;
+END;
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+OCR profile settings for the container validator.
+
+The profile (preprocessing method, Tesseract engine/page segmentation modes,
+character whitelist and working resolution) is stored in ocr_profile.json,
+which is written by ocr_tuner.py. This module only uses the standard library
+so the app can read the profile without loading the OCR stack.
+"""
+
+import json
+import os
+
+OCR_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_profile.json")
+
+PREPROCESSING_METHODS = ["None", "Grayscale", "Threshold", "Edge Enhancement"]
+CONTAINER_CHARSET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# Settings used before any tuning has been done
+DEFAULT_OCR_PROFILE = {
+    "preprocessing": "None",
+    "oem": 3,
+    "psm": 6,
+    "whitelist": "",
+    "target_height": None,
+}
+
+
+def load_ocr_profile(path=OCR_PROFILE_PATH):
+    """Load the OCR profile, falling back to the defaults for missing keys"""
+    profile = dict(DEFAULT_OCR_PROFILE)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            profile.update(json.load(f))
+    if profile["preprocessing"] not in PREPROCESSING_METHODS:
+        profile["preprocessing"] = DEFAULT_OCR_PROFILE["preprocessing"]
+    return profile
+
+
+def save_ocr_profile(profile, path=OCR_PROFILE_PATH):
+    """Write the OCR profile as JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def build_tesseract_config(oem=3, psm=6, whitelist=""):
+    """Build the Tesseract command line options for a profile"""
+    config = f"--oem {oem} --psm {psm}"
+    if whitelist:
+        config += f" -c tessedit_char_whitelist={whitelist}"
+    return config
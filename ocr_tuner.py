@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+OCR configuration autotuner for the container validator.
+
+Runs a grid of preprocessing methods, Tesseract OEM/PSM modes, character
+whitelists and working resolutions over a labelled corpus of container
+photos, reports accuracy against milliseconds per image, and writes the
+chosen configuration to ocr_profile.json for the app to load at startup.
+
+The corpus is a folder of images plus a CSV file with the columns
+``filename,container_number``:
+
+    python ocr_tuner.py photos/ photos/labels.csv --max-ms 400
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from container_ocr import PreprocessEngine, extract_text_from_image
+from ocr_settings import (
+    CONTAINER_CHARSET,
+    OCR_PROFILE_PATH,
+    PREPROCESSING_METHODS,
+    save_ocr_profile,
+)
+
+DEFAULT_OEMS = [1, 3]
+DEFAULT_PSMS = [6, 7, 11]
+DEFAULT_HEIGHTS = [0, 480, 720]
+
+# Grid and preprocessing engine set up once per worker process by _init_worker
+_grid = None
+_engine = None
+
+
+def read_labels(labels_path, image_dir):
+    """Read (image path, expected container number) pairs from the labels CSV"""
+    samples = []
+    with open(labels_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            path = os.path.join(image_dir, row["filename"])
+            samples.append((path, row["container_number"].strip().upper()))
+    return samples
+
+
+def build_grid(methods, oems, psms, whitelists, heights):
+    """Expand the search space into a list of OCR profiles"""
+    return [
+        {
+            "preprocessing": method,
+            "oem": oem,
+            "psm": psm,
+            "whitelist": whitelist,
+            "target_height": height or None,
+        }
+        for method, oem, psm, whitelist, height in itertools.product(
+            methods, oems, psms, whitelists, heights
+        )
+    ]
+
+
+def _init_worker(grid):
+    global _grid, _engine
+    _grid = grid
+    _engine = PreprocessEngine()
+
+
+def evaluate_image(sample):
+    """Run every profile of the grid on one image; [(correct, seconds)] per profile.
+
+    The work is split by image so a worker decodes each photo once and
+    holds only that one in memory; full-resolution crane photos are tens
+    of megabytes each once decoded.
+    """
+    path, label = sample
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+    outcomes = []
+    for profile in _grid:
+        start = time.perf_counter()
+        processed = _engine.run(image, profile["preprocessing"], profile["target_height"])
+        correct = extract_text_from_image(processed, profile) == label
+        _engine.release(processed)
+        outcomes.append((correct, time.perf_counter() - start))
+    return outcomes
+
+
+def pareto_front(results):
+    """Keep the results that no other result beats on both accuracy and speed"""
+    front = []
+    best_accuracy = -1.0
+    for result in sorted(results, key=lambda r: (r["ms_per_image"], -r["accuracy"])):
+        if result["accuracy"] > best_accuracy:
+            front.append(result)
+            best_accuracy = result["accuracy"]
+    return front
+
+
+def choose_profile(front, max_ms=None):
+    """Pick the most accurate profile on the front within the latency budget"""
+    candidates = [r for r in front if max_ms is None or r["ms_per_image"] <= max_ms]
+    if not candidates:
+        # Nothing fits the budget, fall back to the fastest configuration
+        candidates = front[:1]
+    return max(candidates, key=lambda r: (r["accuracy"], -r["ms_per_image"]))
+
+
+def run_grid(samples, grid, workers=None):
+    """Evaluate every profile in the grid across a process pool, one image per task"""
+    correct = [0] * len(grid)
+    seconds = [0.0] * len(grid)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(grid,)) as pool:
+        for outcomes in pool.map(evaluate_image, samples):
+            for i, (ok, elapsed) in enumerate(outcomes):
+                correct[i] += ok
+                seconds[i] += elapsed
+    return [
+        {
+            "profile": profile,
+            "accuracy": correct[i] / len(samples),
+            "ms_per_image": seconds[i] * 1000 / len(samples),
+        }
+        for i, profile in enumerate(grid)
+    ]
+
+
+def describe(profile):
+    """Short one-line description of a profile for the report"""
+    height = profile["target_height"] or "orig"
+    whitelist = "charset" if profile["whitelist"] else "any"
+    return (f"{profile['preprocessing']:<16} oem={profile['oem']} psm={profile['psm']:<2} "
+            f"chars={whitelist:<7} height={height}")
+
+
+def write_results(results, path):
+    """Write every evaluated profile to CSV for offline analysis"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["preprocessing", "oem", "psm", "whitelist", "target_height",
+                         "accuracy", "ms_per_image"])
+        for r in results:
+            p = r["profile"]
+            writer.writerow([p["preprocessing"], p["oem"], p["psm"], p["whitelist"],
+                             p["target_height"] or "", f"{r['accuracy']:.4f}",
+                             f"{r['ms_per_image']:.1f}"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune OCR settings against a labelled corpus")
+    parser.add_argument("image_dir", help="folder containing the container photos")
+    parser.add_argument("labels", help="CSV with filename,container_number columns")
+    parser.add_argument("--methods", nargs="+", default=PREPROCESSING_METHODS,
+                        choices=PREPROCESSING_METHODS)
+    parser.add_argument("--oem", nargs="+", type=int, default=DEFAULT_OEMS)
+    parser.add_argument("--psm", nargs="+", type=int, default=DEFAULT_PSMS)
+    parser.add_argument("--heights", nargs="+", type=int, default=DEFAULT_HEIGHTS,
+                        help="working image heights in pixels (0 keeps the original size)")
+    parser.add_argument("--no-whitelist", action="store_true",
+                        help="only try unrestricted character sets")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="latency budget in milliseconds per image for the chosen profile")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--results", help="also write every result to this CSV file")
+    parser.add_argument("--output", default=OCR_PROFILE_PATH,
+                        help="where to write the chosen profile")
+    args = parser.parse_args(argv)
+
+    samples = read_labels(args.labels, args.image_dir)
+    if not samples:
+        parser.error("the labels file does not list any images")
+
+    whitelists = [""] if args.no_whitelist else ["", CONTAINER_CHARSET]
+    grid = build_grid(args.methods, args.oem, args.psm, whitelists, args.heights)
+    print(f"Evaluating {len(grid)} configurations on {len(samples)} images...")
+
+    results = run_grid(samples, grid, args.workers)
+    if args.results:
+        write_results(results, args.results)
+
+    front = pareto_front(results)
+    print("\nPareto front (accuracy vs. ms/image):")
+    for r in front:
+        print(f"  {r['accuracy']:6.1%}  {r['ms_per_image']:8.1f} ms  {describe(r['profile'])}")
+
+    chosen = choose_profile(front, args.max_ms)
+    save_ocr_profile(chosen["profile"], args.output)
+    print(f"\nChosen: {describe(chosen['profile'])}")
+    print(f"Saved profile to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
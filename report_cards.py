@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Batch report cards for a term, for one class or the whole school.
+
+Everything a card needs comes from three set-based queries (students,
+the term's grades, attendance from the monthly rollup of migration 0008)
+grouped with pandas into one small dict per student. The cards are then
+rendered and written by a spawned process pool, a batch of cards per task, so the
+parent only ships plain data and never the rendered pages. Cards are HTML;
+PDF needs the optional weasyprint package.
+
+    python report_cards.py "Final Term" report_cards --from 2025-09 --to 2025-12
+"""
+
+import argparse
+import html
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from grade_analytics import GRADE_POINTS
+from school_db import DB_PATH, connect
+from school_migrations import migrate
+
+BATCH_SIZE = 200
+# Where the app writes cards; only the command line takes another directory
+REPORT_CARDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_cards")
+
+CARD_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Report Card - {name}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; width: 100%; margin: 1em 0; }}
+th, td {{ border: 1px solid #999; padding: 4px 8px; text-align: left; }}
+</style></head><body>
+<h1>Report Card</h1>
+<h2>{term}</h2>
+<p><b>Name:</b> {name} &nbsp; <b>Roll No:</b> {roll_no} &nbsp; <b>Class:</b> {class_name} {section}</p>
+<table><tr><th>Subject</th><th>Grade</th><th>Remarks</th></tr>
+{grade_rows}
+</table>
+<p><b>GPA:</b> {gpa} &nbsp; <b>Class rank:</b> {rank}</p>
+<p><b>Attendance:</b> {present} present, {absent} absent ({rate})</p>
+</body></html>
+"""
+
+
+class BatchResult:
+    """Counts and timing of one report-card run"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.students = 0
+        self.written = 0
+        self.load_seconds = 0.0
+        self.seconds = 0.0
+
+    @property
+    def per_second(self):
+        return self.written / self.seconds if self.seconds else 0.0
+
+
+def load_cards(conn, term, month_from=None, month_to=None, class_name=None):
+    """One dict per student with everything printed on the card.
+
+    Attendance counts months month_from to month_to ('YYYY-MM', either end
+    open when None).
+    """
+    clauses, params = [], []
+    if class_name is not None:
+        clauses.append("s.class = ?")
+        params.append(class_name)
+    students = pd.read_sql(
+        f"""
+        SELECT s.id, s.name, s.roll_no, s.class AS class_name, s.section
+        FROM students s WHERE {" AND ".join(clauses) or "1"}
+        """, conn, params=params)
+    grades = conn.execute(
+        f"""
+        SELECT g.student_id, sub.subject_name, g.grade, g.remarks
+        FROM students s
+        JOIN grades g ON g.student_id = s.id
+        JOIN subjects sub ON sub.id = g.subject_id
+        WHERE {" AND ".join(clauses + ["g.term = ?"])}
+        ORDER BY g.student_id, sub.subject_name
+        """, params + [term])
+    # Grouped in plain Python: a pandas groupby over thousands of tiny
+    # groups costs more than the queries
+    by_student, points = {}, {}
+    for sid, subject, grade, remarks in grades:
+        by_student.setdefault(sid, []).append((subject, grade, remarks))
+        if grade in GRADE_POINTS:
+            points.setdefault(sid, []).append(GRADE_POINTS[grade])
+
+    month_clauses, month_params = [], []
+    if month_from is not None:
+        month_clauses.append("m.month >= ?")
+        month_params.append(month_from)
+    if month_to is not None:
+        month_clauses.append("m.month <= ?")
+        month_params.append(month_to)
+    attendance = pd.read_sql(
+        f"""
+        SELECT m.student_id, SUM(m.present) AS present, SUM(m.absent) AS absent
+        FROM students s
+        JOIN attendance_student_monthly m ON m.student_id = s.id
+        WHERE {" AND ".join(clauses + month_clauses) or "1"}
+        GROUP BY m.student_id
+        """, conn, params=params + month_params).set_index("student_id")
+
+    students["gpa"] = students["id"].map({sid: round(sum(p) / len(p), 2) for sid, p in points.items()})
+    students["rank"] = students.groupby("class_name")["gpa"].rank(method="min", ascending=False)
+    for column in ("present", "absent"):
+        students[column] = students["id"].map(attendance[column]).fillna(0).astype(int)
+
+    cards = []
+    for s in students.itertuples(index=False):
+        cards.append({
+            "id": int(s.id), "name": s.name, "roll_no": s.roll_no, "class": s.class_name,
+            "section": s.section, "term": term, "grades": by_student.get(s.id, []),
+            "gpa": None if pd.isna(s.gpa) else float(s.gpa),
+            "rank": None if pd.isna(s.rank) else int(s.rank),
+            "present": int(s.present), "absent": int(s.absent),
+        })
+    return cards
+
+
+def _text(value):
+    return "" if value is None or (isinstance(value, float) and pd.isna(value)) else html.escape(str(value))
+
+
+def render_html(card):
+    """A report card as a standalone HTML page"""
+    grade_rows = "\n".join(f"<tr><td>{_text(subject)}</td><td>{_text(grade)}</td><td>{_text(remarks)}</td></tr>"
+                           for subject, grade, remarks in card["grades"])
+    marked = card["present"] + card["absent"]
+    return CARD_TEMPLATE.format(
+        name=_text(card["name"]), roll_no=_text(card["roll_no"]), class_name=_text(card["class"]),
+        section=_text(card["section"]), term=_text(card["term"]),
+        grade_rows=grade_rows or '<tr><td colspan="3">No grades recorded</td></tr>',
+        gpa="-" if card["gpa"] is None else f"{card['gpa']:.2f}",
+        rank="-" if card["rank"] is None else card["rank"],
+        present=card["present"], absent=card["absent"],
+        rate=f"{card['present'] / marked:.1%}" if marked else "no days marked",
+    )
+
+
+def _safe(name):
+    """Text usable as a file or directory name"""
+    return re.sub(r"[^\w.-]+", "_", str(name or "")).strip("_") or "unnamed"
+
+
+def card_path(out_dir, card, fmt):
+    """out_dir/<class>/<roll no>_<id>.<fmt>, or <id>.<fmt> without a roll number
+
+    The id keeps names unique: _safe maps roll numbers like A/1 and A_1 to
+    the same text, and one card would overwrite the other.
+    """
+    name = f"{_safe(card['roll_no'])}_{card['id']}" if card["roll_no"] else str(card["id"])
+    return os.path.join(out_dir, _safe(card["class"]), f"{name}.{fmt}")
+
+
+def write_batch(cards, out_dir, fmt="html"):
+    """Render and write a batch of cards; returns the number written.
+
+    Runs in the pool's worker processes.
+    """
+    if fmt == "pdf":
+        from weasyprint import HTML
+    for card in cards:
+        path = card_path(out_dir, card, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        page = render_html(card)
+        if fmt == "pdf":
+            HTML(string=page).write_pdf(path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(page)
+    return len(cards)
+
+
+def generate(conn, out_dir, term, month_from=None, month_to=None, class_name=None,
+             fmt="html", workers=None, batch_size=BATCH_SIZE, progress=None):
+    """Write report cards for every student (of class_name, if given); returns a BatchResult.
+
+    progress, if given, is called with the result after each batch.
+    """
+    if fmt not in ("html", "pdf"):
+        raise ValueError(f"Unknown report card format {fmt}")
+    result = BatchResult(out_dir)
+    start = time.perf_counter()
+    cards = load_cards(conn, term, month_from, month_to, class_name)
+    result.students = len(cards)
+    result.load_seconds = time.perf_counter() - start
+
+    batches = [cards[i:i + batch_size] for i in range(0, len(cards), batch_size)]
+    if batches:
+        # Spawned, not forked: the Streamlit server is multithreaded, and a
+        # forked worker can inherit a lock another thread was holding
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            for written in pool.map(write_batch, batches, [out_dir] * len(batches),
+                                    [fmt] * len(batches)):
+                result.written += written
+                if progress:
+                    progress(result)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write report cards for a term")
+    parser.add_argument("term")
+    parser.add_argument("out_dir", help="directory for the cards, one folder per class")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--class", dest="class_name")
+    parser.add_argument("--from", dest="month_from", help="first attendance month, YYYY-MM")
+    parser.add_argument("--to", dest="month_to", help="last attendance month, YYYY-MM")
+    parser.add_argument("--format", dest="fmt", choices=["html", "pdf"], default="html")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    migrate(conn)
+    result = generate(conn, args.out_dir, args.term, args.month_from, args.month_to,
+                      args.class_name, args.fmt, args.workers,
+                      progress=lambda r: print(f"  {r.written}/{r.students} cards", end="\r"))
+    conn.close()
+    print(f"Wrote {result.written} report cards to {args.out_dir} in {result.seconds:.1f} s "
+          f"({result.per_second:.0f} cards/s, data loaded in {result.load_seconds:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Memoized read queries for school.db.
+
+Results are cached per database, SQL text and parameters, together with
+the generation of every table the query reads. school_db.SchoolConnection
+bumps a table's generation each time a commit has inserted, updated or
+deleted rows in it, so a cached result is served only while none of its
+tables has been written since it was loaded, and a write is visible on the
+very next read. Entries also expire after MAX_AGE seconds, which bounds how
+long writes made by other processes (scripts, command line tools) can go
+unseen.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+MAX_ENTRIES = 256
+MAX_AGE = 300.0  # seconds
+
+
+class QueryCache:
+    """LRU of query results tagged with the generations of the tables they read"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_age=MAX_AGE):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._generations = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, database, tables):
+        """Bump the generation of each table, making cached reads of it stale"""
+        with self._lock:
+            for table in tables:
+                key = (database, table.lower())
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def get(self, database, key, tables, load):
+        """Cached value for key, calling load() when it is missing or stale"""
+        now = time.monotonic()
+        with self._lock:
+            seen = tuple(self._generations.get((database, t.lower()), 0) for t in tables)
+            entry = self._entries.get((database, key))
+            if entry is not None and entry[0] == seen and now - entry[1] < self.max_age:
+                self._entries.move_to_end((database, key))
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        # Tagged with the generations seen before loading, so a commit that
+        # lands while the query runs leaves this entry stale, not wrongly fresh
+        value = load()
+        with self._lock:
+            self._entries[(database, key)] = (seen, now, value)
+            self._entries.move_to_end((database, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+query_cache = QueryCache()
+
+
+def _cached(conn, key, tables, load):
+    # A connection with uncommitted writes to these tables must see them
+    if not conn.changed_tables.isdisjoint(t.lower() for t in tables):
+        return load()
+    return query_cache.get(conn.database, key, tables, load)
+
+
+def cached_read_sql(conn, sql, tables, params=()):
+    """pd.read_sql through the query cache; tables lists every table the query reads.
+
+    conn must be a school_db connection so its commits invalidate the cache.
+    Returns a copy, so callers may modify the frame.
+    """
+    params = tuple(params)
+    return _cached(conn, ("frame", sql, params), tables,
+                   lambda: pd.read_sql(sql, conn, params=params)).copy()
+
+
+def cached_rows(conn, sql, tables, params=()):
+    """conn.execute(sql, params).fetchall() through the query cache"""
+    params = tuple(params)
+    return _cached(conn, ("rows", sql, params), tables,
+                   lambda: conn.execute(sql, params).fetchall())
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Connection management for school.db.
+
+ConnectionPool hands each thread its own configured connection (WAL journal,
+busy timeout, cache and mmap pragmas) and takes it back when the thread
+finishes. Streamlit runs every rerun on a fresh thread, so connections, and
+the statements sqlite3 has already prepared on them, are reused across
+reruns instead of reconnecting each time.
+
+Connections note which tables their INSERT, UPDATE and DELETE statements
+write and, once the transaction commits, invalidate the cached reads of
+those tables (see school_cache).
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+
+from school_cache import query_cache
+
+DB_PATH = "school.db"
+
+BUSY_TIMEOUT = 5.0  # seconds to wait for a lock before "database is locked"
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+MAX_IDLE_CONNECTIONS = 8
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # safe with WAL; fsync only at checkpoints
+    "cache_size": -32000,  # KiB, i.e. 32 MB page cache per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+WRITE_STATEMENT = re.compile(
+    r"^\s*(?:--[^\n]*\n\s*)*(?:INSERT|REPLACE|UPDATE|DELETE)\b(?:\s+OR\s+\w+)?\s+"
+    r"(?:INTO\s+|FROM\s+)?[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=1024)
+def written_table(sql):
+    """Table an INSERT, REPLACE, UPDATE or DELETE statement writes to, else None"""
+    match = WRITE_STATEMENT.match(sql)
+    return match.group(1).lower() if match else None
+
+
+class SchoolCursor(sqlite3.Cursor):
+    """Cursor that reports written tables to its connection"""
+
+    def execute(self, sql, parameters=()):
+        self.connection._track(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection._track(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class SchoolConnection(sqlite3.Connection):
+    """Connection that invalidates the query cache for the tables each commit changed.
+
+    Tables written through triggers are not tracked: cached reads of a
+    trigger-maintained table list its base table instead.
+    """
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.database = (f":memory:{id(self)}" if database == ":memory:"
+                         else os.path.abspath(database))
+        self.changed_tables = set()
+
+    def _track(self, sql):
+        table = written_table(sql)
+        if table is not None:
+            self.changed_tables.add(table)
+
+    def cursor(self, factory=SchoolCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        self._track(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._track(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        super().commit()
+        if self.changed_tables:
+            tables, self.changed_tables = self.changed_tables, set()
+            query_cache.invalidate(self.database, tables)
+
+    def rollback(self):
+        super().rollback()
+        self.changed_tables.clear()
+
+
+def connect(path=DB_PATH, factory=SchoolConnection):
+    """Open a connection to the school database with the standard pragmas.
+
+    factory must be SchoolConnection or a subclass (e.g. school_trace's
+    TracingConnection).
+    """
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,  # the pool guarantees one thread at a time
+        factory=factory,
+    )
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+def iso_date(day):
+    """A date as stored in school.db: YYYY-MM-DD text (strings pass through)"""
+    return day.isoformat() if hasattr(day, "isoformat") else str(day)
+
+
+@contextmanager
+def transaction(conn):
+    """Run the block atomically: BEGIN IMMEDIATE, or a savepoint when nested"""
+    if conn.in_transaction:
+        # Savepoint names may repeat; ROLLBACK TO / RELEASE use the innermost
+        conn.execute("SAVEPOINT nested")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO nested")
+            conn.execute("RELEASE nested")
+            raise
+        conn.execute("RELEASE nested")
+        return
+
+    # IMMEDIATE takes the write lock up front instead of failing to upgrade
+    # a read lock halfway through the block
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+class _Lease:
+    """Ties a pooled connection to the thread-local slot holding it"""
+
+    def __init__(self, pool, conn):
+        self.conn = conn
+        # Runs when the owning thread exits and its locals are dropped
+        weakref.finalize(self, pool._release, conn)
+
+
+class ConnectionPool:
+    """Per-thread connections to one database file, reused across threads"""
+
+    def __init__(self, path=DB_PATH, max_idle=MAX_IDLE_CONNECTIONS, factory=SchoolConnection):
+        self.path = path
+        self.max_idle = max_idle
+        self.factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def connection(self):
+        """Return the calling thread's connection, leasing one if needed"""
+        lease = getattr(self._local, "lease", None)
+        if lease is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = connect(self.path, self.factory)
+            lease = self._local.lease = _Lease(self, conn)
+        return lease.conn
+
+    def _release(self, conn):
+        """Take a connection back from a finished thread"""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close the idle connections (leased ones close as their threads end)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.max_idle = 0
+        for conn in idle:
+            conn.close()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming exports of attendance and grades to CSV or Parquet.
+
+Rows are fetched from SQLite FETCH_SIZE at a time and written straight to
+the output (csv.writer, or one Parquet row group per chunk through
+pyarrow's ParquetWriter), so exporting years of attendance only ever holds
+one chunk in memory. Queries follow the attendance (date, student_id) and
+grades (student_id, subject_id, term) indexes, so SQLite returns rows in
+index order without sorting the whole result first.
+
+    python school_export.py attendance attendance_2025.parquet --from 2025-01-01 --to 2025-12-31
+"""
+
+import argparse
+import csv
+import io
+import os
+
+from school_db import DB_PATH, connect, iso_date
+
+FETCH_SIZE = 10000
+
+EXPORTS = {
+    "attendance": {
+        "columns": ["date", "class", "roll_no", "name", "status"],
+        "sql": """
+            SELECT a.date, s.class, s.roll_no, s.name, a.status
+            FROM attendance a
+            JOIN students s ON s.id = a.student_id
+            WHERE {where}
+            ORDER BY a.date, a.student_id
+        """,
+    },
+    "grades": {
+        "columns": ["term", "class", "roll_no", "name", "subject", "grade", "remarks"],
+        "sql": """
+            SELECT g.term, s.class, s.roll_no, s.name, sub.subject_name, g.grade, g.remarks
+            FROM grades g
+            JOIN students s ON s.id = g.student_id
+            JOIN subjects sub ON sub.id = g.subject_id
+            WHERE {where}
+            ORDER BY g.student_id, g.subject_id, g.term
+        """,
+    },
+}
+
+
+def export_query(kind, class_name=None, date_from=None, date_to=None, term=None, subject=None):
+    """SQL and parameters for an export; filters left as None are not applied.
+
+    Attendance is filtered by class and date range, grades by class, term
+    and subject name.
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"Cannot export {kind}")
+    clauses, params = [], []
+    # Starts from the class's students on ix_students_class_name and sorts
+    # their rows, far cheaper than walking the whole table in index order
+    if class_name is not None:
+        clauses.append("s.class = ?")
+        params.append(class_name)
+    if kind == "attendance":
+        if date_from is not None:
+            clauses.append("a.date >= ?")
+            params.append(iso_date(date_from))
+        if date_to is not None:
+            clauses.append("a.date <= ?")
+            params.append(iso_date(date_to))
+    else:
+        if term is not None:
+            clauses.append("g.term = ?")
+            params.append(term)
+        if subject is not None:
+            clauses.append("sub.subject_name = ?")
+            params.append(subject)
+    return EXPORTS[kind]["sql"].format(where=" AND ".join(clauses) or "1"), params
+
+
+def iter_chunks(conn, kind, fetch_size=FETCH_SIZE, **filters):
+    """Yield lists of up to fetch_size row tuples for an export"""
+    sql, params = export_query(kind, **filters)
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+def write_csv(chunks, columns, out):
+    """Write chunks of rows to a binary file object as UTF-8 CSV; returns the row count"""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    count = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        count += len(rows)
+    text.flush()
+    text.detach()  # leave out open for the caller
+    return count
+
+
+def write_parquet(chunks, columns, out):
+    """Write chunks of rows to a path or binary file object as Parquet, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    count = 0
+    with pq.ParquetWriter(out, schema, compression="zstd") as writer:
+        for rows in chunks:
+            # Older rows may hold numbers in text columns (e.g. a numeric roll_no)
+            arrays = [pa.array([v if v is None or isinstance(v, str) else str(v) for v in values],
+                               type=pa.string())
+                      for values in zip(*rows)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    return count
+
+
+def export(conn, kind, out, fmt="csv", fetch_size=FETCH_SIZE, **filters):
+    """Stream an attendance or grades export to out (path or binary file); returns the row count"""
+    if kind not in EXPORTS:
+        raise ValueError(f"Cannot export {kind}")
+    columns = EXPORTS[kind]["columns"]
+    chunks = iter_chunks(conn, kind, fetch_size, **filters)
+    if fmt == "parquet":
+        return write_parquet(chunks, columns, out)
+    if fmt != "csv":
+        raise ValueError(f"Unknown export format {fmt}")
+    if isinstance(out, (str, os.PathLike)):
+        with open(out, "wb") as f:
+            return write_csv(chunks, columns, f)
+    return write_csv(chunks, columns, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export attendance or grades to CSV or Parquet")
+    parser.add_argument("kind", choices=sorted(EXPORTS))
+    parser.add_argument("output", help="output file; .parquet writes Parquet, anything else CSV")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--class", dest="class_name")
+    parser.add_argument("--from", dest="date_from", help="first date, YYYY-MM-DD (attendance)")
+    parser.add_argument("--to", dest="date_to", help="last date, YYYY-MM-DD (attendance)")
+    parser.add_argument("--term", help="grades only")
+    parser.add_argument("--subject", help="grades only")
+    args = parser.parse_args(argv)
+
+    if args.kind == "attendance":
+        filters = {"date_from": args.date_from, "date_to": args.date_to}
+    else:
+        filters = {"term": args.term, "subject": args.subject}
+    fmt = "parquet" if args.output.lower().endswith(".parquet") else "csv"
+    conn = connect(args.db)
+    count = export(conn, args.kind, args.output, fmt, class_name=args.class_name, **filters)
+    conn.close()
+    print(f"Wrote {count} {args.kind} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk import of students and teachers from CSV or Excel files.
+
+Files are read in chunks (pandas for CSV, openpyxl's read-only mode for
+Excel) so memory stays flat however long the file is. Each chunk is
+validated with vectorised pandas checks (required fields, dates, gender,
+key repeated in the file or already in the database) and its valid rows
+are inserted with executemany in one transaction. In the app every chunk
+is a job on the SchoolWriter, so an import shares the write lock with
+interactive saves instead of competing for it. Rejected rows are kept
+with their line number and reason for the error report.
+
+    python school_import.py students new_students.csv --errors rejected.csv
+"""
+
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from school_db import DB_PATH, connect, transaction
+from school_migrations import migrate
+from school_store import log_activity
+
+CHUNK_SIZE = 5000
+GENDERS = ["Male", "Female", "Other"]
+
+# Columns accepted per table, the required ones (as on the Add forms) and
+# the unique key
+IMPORTS = {
+    "students": {
+        "columns": ["name", "roll_no", "class", "section", "dob", "gender", "address",
+                    "parent_name", "parent_contact"],
+        "required": ["name", "roll_no", "class"],
+        "key": "roll_no",
+    },
+    "teachers": {
+        "columns": ["name", "emp_id", "subject", "qualification", "dob", "gender", "address",
+                    "contact"],
+        "required": ["name", "emp_id"],
+        "key": "emp_id",
+    },
+}
+
+
+class ImportResult:
+    """Counts and rejected rows of one import"""
+
+    def __init__(self, table):
+        self.table = table
+        self.read = 0
+        self.inserted = 0
+        self.seconds = 0.0
+        self._rejected = []
+
+    @property
+    def rejected(self):
+        """DataFrame of rejected rows: line, reason, then the row as read"""
+        if not self._rejected:
+            return pd.DataFrame(columns=["line", "reason"] + IMPORTS[self.table]["columns"])
+        return pd.concat(self._rejected, ignore_index=True)
+
+    def error_report(self, path_or_buffer=None):
+        """Write the rejected rows as CSV; returns the text when no path is given"""
+        return self.rejected.to_csv(path_or_buffer, index=False)
+
+
+def _header(name):
+    """'Roll No' -> 'roll_no'"""
+    return str(name).strip().lower().replace(" ", "_")
+
+
+def _cell(value):
+    """Excel cell value as the text a CSV would hold"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "date"):
+        return value.date().isoformat()
+    return str(value)
+
+
+def read_chunks(source, chunk_size=CHUNK_SIZE, filename=None):
+    """Yield DataFrames of up to chunk_size rows, every cell as text or None.
+
+    source is a path or a binary file object (e.g. a Streamlit upload);
+    .xlsx and .xlsm files are read as Excel, anything else as CSV. The index
+    of each chunk is the row's line number in the file.
+    """
+    filename = filename or getattr(source, "name", None) or str(source)
+    if os.path.splitext(filename)[1].lower() in (".xlsx", ".xlsm"):
+        yield from _read_excel_chunks(source, chunk_size)
+        return
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                         skipinitialspace=True)
+    for chunk in reader:
+        chunk.columns = [_header(c) for c in chunk.columns]
+        chunk.index = chunk.index + 2  # line 1 is the header
+        yield chunk
+
+
+def _read_excel_chunks(source, chunk_size):
+    from openpyxl import load_workbook
+
+    # read_only streams rows from the zip instead of loading the whole sheet
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_header(c) for c in next(rows, ())]
+        line, batch = 2, []
+        for row in rows:
+            batch.append([_cell(v) for v in row[:len(header)]])
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=header, index=range(line, line + len(batch)))
+                line, batch = line + len(batch), []
+        if batch:
+            yield pd.DataFrame(batch, columns=header, index=range(line, line + len(batch)))
+    finally:
+        workbook.close()
+
+
+def validate_chunk(conn, table, chunk, seen_keys):
+    """Split a chunk into (valid rows, rejected rows with a reason column, keys).
+
+    seen_keys holds the keys of earlier chunks and is left unchanged, so a
+    retried chunk validates the same way; the caller adds the returned keys
+    once the chunk is committed.
+    """
+    spec = IMPORTS[table]
+    key = spec["key"]
+    # Object columns: isin() against the large seen_keys set then uses a
+    # hash table instead of converting the set for every Arrow string column
+    rows = chunk.reindex(columns=spec["columns"]).astype(object)
+    rows = rows.apply(lambda col: col.str.strip()).replace("", None)
+
+    reasons = pd.Series("", index=rows.index)
+
+    def reject(mask, reason):
+        reasons[mask & (reasons == "")] = reason
+
+    for column in spec["required"]:
+        reject(rows[column].isna(), f"missing {column}")
+
+    dob = pd.to_datetime(rows["dob"], errors="coerce", format="mixed")
+    reject(rows["dob"].notna() & dob.isna(), "invalid dob")
+    rows["dob"] = dob.dt.strftime("%Y-%m-%d").where(dob.notna(), None)
+
+    gender = rows["gender"].str.capitalize()
+    reject(gender.notna() & ~gender.isin(GENDERS), "invalid gender")
+    rows["gender"] = gender
+
+    reject(rows[key].duplicated(keep="first") | rows[key].isin(seen_keys),
+           f"duplicate {key} in file")
+    keys = rows.loc[rows[key].notna(), key].unique().tolist()
+    existing = {r[0] for r in conn.execute(
+        f"SELECT {key} FROM {table} WHERE {key} IN (SELECT value FROM json_each(?))",
+        (json.dumps(keys),))}
+    reject(rows[key].isin(existing), f"{key} already exists")
+
+    ok = reasons == ""
+    rejected = chunk.reindex(columns=spec["columns"])[~ok]
+    rejected.insert(0, "reason", reasons[~ok])
+    rejected.insert(0, "line", rejected.index)
+    return rows[ok], rejected, keys
+
+
+def import_chunk(conn, table, chunk, seen_keys):
+    """Validate one chunk and insert its valid rows; returns validate_chunk's result.
+
+    Does not commit, so it can run as a SchoolWriter job.
+    """
+    spec = IMPORTS[table]
+    placeholders = ", ".join("?" * len(spec["columns"]))
+    valid, rejected, keys = validate_chunk(conn, table, chunk, seen_keys)
+    # None rather than NaN, so empty cells are stored as NULL
+    rows = valid.astype(object).where(valid.notna(), None).itertuples(index=False)
+    conn.executemany(f"INSERT INTO {table} ({', '.join(spec['columns'])}) VALUES ({placeholders})",
+                     rows)
+    return valid, rejected, keys
+
+
+def import_file(conn, table, source, chunk_size=CHUNK_SIZE, filename=None, progress=None,
+                writer=None):
+    """Import students or teachers from a CSV or Excel file; returns an ImportResult.
+
+    Each chunk is validated and inserted in its own transaction, taken
+    before the database key check so a concurrent insert can't slip in
+    between. With a writer (a SchoolWriter), each chunk is one job on it
+    and conn is not used; otherwise the chunks are written on conn.
+    progress, if given, is called with the result after each chunk.
+    """
+    if table not in IMPORTS:
+        raise ValueError(f"Cannot import {table}")
+    spec = IMPORTS[table]
+    result = ImportResult(table)
+    start = time.perf_counter()
+    seen_keys = set()
+
+    for chunk in read_chunks(source, chunk_size, filename):
+        missing = [c for c in spec["required"] if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"File has no {', '.join(missing)} column")
+        if writer is not None:
+            valid, rejected, keys = writer.run(import_chunk, table, chunk, seen_keys)
+        else:
+            with transaction(conn):
+                valid, rejected, keys = import_chunk(conn, table, chunk, seen_keys)
+        seen_keys.update(keys)
+        result.read += len(chunk)
+        result.inserted += len(valid)
+        if not rejected.empty:
+            result._rejected.append(rejected)
+        if progress:
+            progress(result)
+
+    result.seconds = time.perf_counter() - start
+    if result.inserted:
+        description = f"Imported {result.inserted} {table}" + (f" from {filename}" if filename else "")
+        if writer is not None:
+            writer.run(log_activity, table, "imported", description)
+        else:
+            with transaction(conn):
+                log_activity(conn, table, "imported", description)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import students or teachers from CSV or Excel")
+    parser.add_argument("table", choices=sorted(IMPORTS))
+    parser.add_argument("file", help="CSV or .xlsx file with a header row")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--errors", help="write rejected rows to this CSV file")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    migrate(conn)
+    result = import_file(conn, args.table, args.file, args.chunk_size,
+                         filename=os.path.basename(args.file),
+                         progress=lambda r: print(f"  {r.read} rows read", end="\r"))
+    conn.close()
+    print(f"Imported {result.inserted} of {result.read} {args.table} "
+          f"in {result.seconds:.1f} s ({result.read - result.inserted} rejected)")
+    if args.errors and result.read > result.inserted:
+        result.error_report(args.errors)
+        print(f"Rejected rows written to {args.errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned schema migrations for school.db.
+
+Migrations are the numbered scripts in migrations/ (NNNN_description.sql),
+applied in order, each in its own transaction, and recorded in the
+schema_version table so every script runs exactly once per database.
+Applied scripts must never be edited: change the schema by adding a new
+script, using ALTER TABLE or a copy-and-swap of the table so existing
+school.db files keep their data.
+
+The one exception is the attendance_daily backfill in 0007, which was
+changed after release to skip attendance rows without a date. As first
+written it failed on such rows, and a later script can't run ahead of it,
+so a database holding them could never get past 0007. A database that
+did apply 0007 had no such rows at the time, so the edited script would
+have left it with the same tables. Its triggers were fixed in a new
+script (0013), as usual.
+
+    python school_migrations.py [path/to/school.db]
+"""
+
+import os
+import re
+import sqlite3
+import sys
+
+from school_db import DB_PATH, connect
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Return [(version, name, sql)] sorted by version"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                migrations.append((int(match.group(1)), match.group(2), f.read()))
+    migrations.sort()
+    versions = [m[0] for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration numbers in {directory}")
+    return migrations
+
+
+def split_statements(sql):
+    """Split a script into complete statements (trigger bodies stay whole)"""
+    statements, current = [], ""
+    for line in sql.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    leftover = [l for l in current.splitlines() if l.strip() and not l.strip().startswith("--")]
+    if leftover:
+        raise ValueError(f"Incomplete SQL statement: {leftover[0].strip()[:60]}")
+    return statements
+
+
+def current_version(conn):
+    """Highest applied migration, 0 for a new or pre-migration database"""
+    conn.execute("""CREATE TABLE IF NOT EXISTS schema_version
+                    (version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)""")
+    conn.commit()
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn, migrations=None):
+    """Apply every pending migration; returns the names of those applied"""
+    migrations = load_migrations() if migrations is None else migrations
+    if current_version(conn) >= (migrations[-1][0] if migrations else 0):
+        return []
+
+    applied = []
+    for version, name, sql in migrations:
+        # IMMEDIATE takes the write lock first, so when two processes start
+        # together the second one sees the version the first one recorded
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute("SELECT 1 FROM schema_version WHERE version = ?",
+                                (version,)).fetchone()
+            if not done:
+                for statement in split_statements(sql):
+                    conn.execute(statement)
+                conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                             (version, name))
+                applied.append(name)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if applied:
+        # Refresh planner statistics for the new indexes
+        conn.execute("PRAGMA optimize")
+    return applied
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = connect(path)
+    names = migrate(conn)
+    print(f"Applied {len(names)} migration(s)" + (": " + ", ".join(names) if names else ""))
+    print(f"{path} is at schema version {current_version(conn)}")
+    conn.close()
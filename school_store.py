@@ -0,0 +1,523 @@
+# -*- coding: utf-8 -*-
+"""
+Read and write operations on school.db used by the School DBMS pages.
+
+Each function takes an open connection (see school_db) so it can be used
+from the Streamlit app, scripts and benchmarks alike. Writes run in
+transaction(), so they nest as savepoints when called from a SchoolWriter
+job. Statements are fixed strings (values always bound as parameters), so
+each is prepared once per connection and then reused from sqlite3's
+statement cache.
+"""
+
+import re
+import sys
+
+import pandas as pd
+
+from school_cache import cached_read_sql, cached_rows, query_cache
+from school_db import iso_date, transaction
+
+GRADES = ["A+", "A", "B+", "B", "C+", "C", "D", "F"]
+TERMS = ["First Term", "Mid Term", "Final Term"]
+
+UPSERT_ATTENDANCE_SQL = """
+INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)
+ON CONFLICT (student_id, date) DO UPDATE SET status = excluded.status
+WHERE attendance.status IS NOT excluded.status
+"""
+
+# Keyset-paginated listings: filterable columns, sortable columns and the
+# trigger-maintained table holding row counts grouped by the filter columns
+LISTINGS = {
+    "students": {
+        "filters": ["class", "section", "gender"],
+        "sorts": ["name", "roll_no", "id"],
+        "counts": "student_counts",
+    },
+    "teachers": {
+        "filters": ["subject", "gender"],
+        "sorts": ["name", "emp_id", "id"],
+        "counts": "teacher_counts",
+    },
+}
+
+# bm25 column weights for student search: name, roll_no, parent_name, parent_contact
+SEARCH_WEIGHTS = (5.0, 10.0, 2.0, 1.0)
+# Rank by relevance only when a search matches at most this many students
+SEARCH_RANK_LIMIT = 2000
+# Students offered by the picker for one prefix
+PICK_LIMIT = 20
+
+STUDENT_FIELDS = ["name", "roll_no", "class", "section", "dob", "gender", "address",
+                  "parent_name", "parent_contact"]
+TEACHER_FIELDS = ["name", "emp_id", "subject", "qualification", "dob", "gender", "address",
+                  "contact"]
+
+INSERT_STUDENT_SQL = (f"INSERT INTO students ({', '.join(STUDENT_FIELDS)}) "
+                      f"VALUES ({', '.join('?' * len(STUDENT_FIELDS))})")
+UPDATE_STUDENT_SQL = f"UPDATE students SET {', '.join(f'{f} = ?' for f in STUDENT_FIELDS)} WHERE id = ?"
+INSERT_TEACHER_SQL = (f"INSERT INTO teachers ({', '.join(TEACHER_FIELDS)}) "
+                      f"VALUES ({', '.join('?' * len(TEACHER_FIELDS))})")
+
+UPSERT_GRADE_SQL = """
+INSERT INTO grades (student_id, subject_id, term, grade, remarks) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (student_id, subject_id, term) DO UPDATE
+SET grade = excluded.grade, remarks = excluded.remarks
+WHERE grades.grade IS NOT excluded.grade OR grades.remarks IS NOT excluded.remarks
+"""
+
+
+def class_names(conn):
+    """Names of all classes, in the order they were added"""
+    return [row[0] for row in cached_rows(conn, "SELECT class_name FROM classes", ["classes"])]
+
+
+def student_classes(conn):
+    """Distinct classes that have students enrolled"""
+    return [row[0] for row in cached_rows(conn, "SELECT DISTINCT class FROM students", ["students"])]
+
+
+def subject_names(conn):
+    """Names of all subjects, in the order they were added"""
+    return [row[0] for row in cached_rows(conn, "SELECT subject_name FROM subjects", ["subjects"])]
+
+
+def dashboard_stats(conn, day):
+    """Dashboard figures, read from the trigger-maintained stats tables.
+
+    Returns a dict with students, teachers, classes and subjects totals,
+    attendance ({status: count} on day) and grades ({term: count}).
+    """
+    stats = dict(cached_rows(conn, "SELECT name, n FROM school_stats",
+                             ["students", "teachers", "classes", "subjects"]))
+    stats["attendance"] = dict(cached_rows(
+        conn, "SELECT status, n FROM attendance_daily WHERE date = ?", ["attendance"], (iso_date(day),)))
+    stats["grades"] = dict(cached_rows(conn, "SELECT term, n FROM grade_term_counts", ["grades"]))
+    return stats
+
+
+def log_activity(conn, entity, action, summary):
+    """Add an entry to the recent-activity feed (part of the caller's transaction)"""
+    conn.execute("INSERT INTO activity_log (entity, action, summary) VALUES (?, ?, ?)",
+                 (entity, action, summary))
+
+
+def recent_activity(conn, limit=10):
+    """Latest entries of the activity feed, newest first"""
+    # Entity changes are logged by triggers, which the cache doesn't see
+    return cached_read_sql(
+        conn, "SELECT at, summary FROM activity_log ORDER BY id DESC LIMIT ?",
+        ["activity_log", "students", "teachers", "classes", "subjects"], (int(limit),))
+
+
+def _optional_date(day):
+    return None if day is None else iso_date(day)
+
+
+def add_student(conn, name, roll_no, class_name, section=None, dob=None, gender=None,
+                address=None, parent_name=None, parent_contact=None):
+    """Insert a student; returns the new id. Raises IntegrityError if roll_no is taken."""
+    with transaction(conn):
+        return conn.execute(INSERT_STUDENT_SQL, (name, roll_no, class_name, section,
+                                                 _optional_date(dob), gender, address,
+                                                 parent_name, parent_contact)).lastrowid
+
+
+def update_student(conn, student_id, name, roll_no, class_name, section=None, dob=None,
+                   gender=None, address=None, parent_name=None, parent_contact=None):
+    """Overwrite every field of a student; returns the number of rows updated"""
+    with transaction(conn):
+        return conn.execute(UPDATE_STUDENT_SQL, (name, roll_no, class_name, section,
+                                                 _optional_date(dob), gender, address,
+                                                 parent_name, parent_contact,
+                                                 int(student_id))).rowcount
+
+
+def delete_student(conn, student_id):
+    """Delete a student; returns the number of rows deleted"""
+    with transaction(conn):
+        return conn.execute("DELETE FROM students WHERE id = ?", (int(student_id),)).rowcount
+
+
+def get_student(conn, student_id):
+    """A student's row as a dict of column values, or None"""
+    cursor = conn.execute("SELECT * FROM students WHERE id = ?", (int(student_id),))
+    row = cursor.fetchone()
+    return None if row is None else dict(zip([d[0] for d in cursor.description], row))
+
+
+def _prefix_range(prefix):
+    """[low, high) bounds of the strings starting with prefix under NOCASE.
+
+    NOCASE only folds ASCII letters, so only those are lowered here. high is
+    None when nothing sorts after the matches (prefix of highest code points).
+    """
+    low = "".join(ch.lower() if ch.isascii() else ch for ch in prefix)
+    head = low.rstrip(chr(sys.maxunicode))
+    if not head:
+        return low, None
+    code = ord(head[-1]) + 1
+    if ord("A") <= code <= ord("Z"):
+        # The bound is folded too, so "A" would compare as "a"; "[" is the
+        # next character above "@" once letters are folded
+        code = ord("[")
+    elif 0xD800 <= code <= 0xDFFF:
+        code = 0xE000  # surrogates can't be encoded as UTF-8
+    return low, head[:-1] + chr(code)
+
+
+def pick_students(conn, prefix, limit=PICK_LIMIT):
+    """{id: "name (roll_no)"} of students whose roll number or name starts with prefix.
+
+    Case-insensitive range queries on the NOCASE indexes of migration 0011,
+    roll number matches first, so a lookup reads at most limit rows from
+    each index however large the roster is.
+    """
+    prefix = prefix.strip()
+    if not prefix:
+        return {}
+    low, high = _prefix_range(prefix)
+    bounds = (low,) if high is None else (low, high)
+    matches = {}
+    for column in ("roll_no", "name"):
+        upper = "" if high is None else f"AND {column} COLLATE NOCASE < ?"
+        rows = conn.execute(
+            f"""
+            SELECT id, name, roll_no FROM students
+            WHERE {column} COLLATE NOCASE >= ? {upper}
+            ORDER BY {column} COLLATE NOCASE LIMIT ?
+            """, (*bounds, int(limit)))
+        for sid, name, roll_no in rows:
+            matches.setdefault(sid, f"{name} ({roll_no})")
+    return dict(list(matches.items())[:limit])
+
+
+def class_students(conn, class_name):
+    """id, name and roll_no of the students in a class, by roll number"""
+    return cached_read_sql(conn, "SELECT id, name, roll_no FROM students WHERE class = ? ORDER BY roll_no",
+                           ["students"], (class_name,))
+
+
+def add_teacher(conn, name, emp_id, subject=None, qualification=None, dob=None, gender=None,
+                address=None, contact=None):
+    """Insert a teacher; returns the new id. Raises IntegrityError if emp_id is taken."""
+    with transaction(conn):
+        return conn.execute(INSERT_TEACHER_SQL, (name, emp_id, subject, qualification,
+                                                 _optional_date(dob), gender, address,
+                                                 contact)).lastrowid
+
+
+def teacher_list(conn):
+    """id and name of every teacher"""
+    return cached_read_sql(conn, "SELECT id, name FROM teachers", ["teachers"])
+
+
+def add_class(conn, class_name, section=None, room_no=None):
+    """Insert a class; returns the new id. Raises IntegrityError if the name is taken."""
+    with transaction(conn):
+        return conn.execute("INSERT INTO classes (class_name, section, room_no) VALUES (?, ?, ?)",
+                            (class_name, section, room_no)).lastrowid
+
+
+def class_table(conn):
+    """Every class with all its columns"""
+    return cached_read_sql(conn, "SELECT * FROM classes", ["classes"])
+
+
+def assign_class_teacher(conn, class_id, teacher_id):
+    """Make a teacher the class teacher of a class"""
+    with transaction(conn):
+        conn.execute("UPDATE classes SET class_teacher_id = ? WHERE id = ?",
+                     (int(teacher_id), int(class_id)))
+
+
+def add_subject(conn, subject_name, subject_code=None):
+    """Insert a subject; returns the new id. Raises IntegrityError if the name is taken."""
+    with transaction(conn):
+        return conn.execute("INSERT INTO subjects (subject_name, subject_code) VALUES (?, ?)",
+                            (subject_name, subject_code)).lastrowid
+
+
+def subject_table(conn):
+    """Every subject with all its columns"""
+    return cached_read_sql(conn, "SELECT * FROM subjects", ["subjects"])
+
+
+def subject_id_by_name(conn, subject_name):
+    """Id of the subject with this name, or None"""
+    rows = cached_rows(conn, "SELECT id FROM subjects WHERE subject_name = ?", ["subjects"],
+                       (subject_name,))
+    return rows[0][0] if rows else None
+
+
+def attendance_sheet(conn, class_name, date):
+    """Roster of a class with each student's saved status for the day.
+
+    Returns a DataFrame with id, name, roll_no and a boolean present column;
+    students not yet marked that day default to present.
+    """
+    sheet = pd.read_sql(
+        """
+        SELECT s.id, s.name, s.roll_no, COALESCE(a.status, 'Present') = 'Present' AS present
+        FROM students s
+        LEFT JOIN attendance a ON a.student_id = s.id AND a.date = ?
+        WHERE s.class = ?
+        ORDER BY s.roll_no
+        """,
+        conn, params=(iso_date(date), class_name),
+    )
+    sheet["present"] = sheet["present"].astype(bool)
+    return sheet
+
+
+def save_attendance(conn, date, statuses, class_name=None):
+    """Upsert one day's attendance for many students in a single transaction.
+
+    statuses is an iterable of (student_id, status) pairs. Saving the same
+    day again only touches rows whose status changed. Returns the number of
+    rows inserted or updated.
+    """
+    day = iso_date(date)
+    rows = [(int(student_id), day, status) for student_id, status in statuses]
+    with transaction(conn):
+        changed = max(conn.executemany(UPSERT_ATTENDANCE_SQL, rows).rowcount, 0)
+        if changed:
+            where = f"{class_name} on {day}" if class_name else day
+            log_activity(conn, "attendance", "saved",
+                         f"Marked attendance for {where} ({changed} records changed)")
+    return changed
+
+
+def class_attendance(conn, class_name, date):
+    """Name, roll number and status of each student of a class marked on a day"""
+    # CROSS JOIN keeps the class's few students as the outer loop; left to
+    # itself the planner walks every attendance row of the day instead
+    return pd.read_sql(
+        """
+        SELECT s.name, s.roll_no, a.status
+        FROM students s
+        CROSS JOIN attendance a ON a.student_id = s.id AND a.date = ?
+        WHERE s.class = ?
+        """,
+        conn, params=(iso_date(date), class_name),
+    )
+
+
+def gradebook(conn, class_name, subject_id, term):
+    """Roster of a class with each student's saved grade and remarks.
+
+    Returns a DataFrame with id, name, roll_no, grade and remarks; grade is
+    None for students not graded yet in this subject and term.
+    """
+    return pd.read_sql(
+        """
+        SELECT s.id, s.name, s.roll_no, g.grade, COALESCE(g.remarks, '') AS remarks
+        FROM students s
+        LEFT JOIN grades g ON g.student_id = s.id AND g.subject_id = ? AND g.term = ?
+        WHERE s.class = ?
+        ORDER BY s.roll_no
+        """,
+        conn, params=(int(subject_id), term, class_name),
+    )
+
+
+def student_transcript(conn, student_id):
+    """Term, subject, grade and remarks of every grade of a student, by term and subject.
+
+    Grades come from the covering index of migration 0012. Results are
+    cached under the student's grade_student_versions entry, which triggers
+    bump on every write to their grades, so a write leaves the other
+    students' transcripts cached.
+    """
+    student_id = int(student_id)
+
+    def load():
+        return pd.read_sql(
+            """
+            SELECT g.term, s.subject_name, g.grade, g.remarks
+            FROM grades g
+            JOIN subjects s ON g.subject_id = s.id
+            WHERE g.student_id = ?
+            ORDER BY g.term, s.subject_name
+            """,
+            conn, params=(student_id,),
+        )
+
+    # Uncommitted grade writes may yet be rolled back, and their version reused
+    if "grades" in conn.changed_tables:
+        return load()
+    row = conn.execute("SELECT version FROM grade_student_versions WHERE student_id = ?",
+                       (student_id,)).fetchone()
+    key = ("transcript", student_id, row[0] if row else 0)
+    return query_cache.get(conn.database, key, ["subjects"], load).copy()
+
+
+def gradebook_changes(original, edited):
+    """Rows of an edited gradebook whose grade or remarks differ from the original"""
+    before = original[["grade", "remarks"]].fillna("")
+    after = edited[["grade", "remarks"]].fillna("")
+    changed = (before != after).any(axis=1) & edited["grade"].notna()
+    return edited[changed]
+
+
+def save_grades(conn, subject_id, term, grades):
+    """Upsert grades for one subject and term in a single transaction.
+
+    grades is an iterable of (student_id, grade, remarks). Rows identical to
+    what is stored are skipped. Returns the number of rows inserted or updated.
+    """
+    rows = [(int(student_id), int(subject_id), term, grade, remarks or "")
+            for student_id, grade, remarks in grades]
+    if not rows:
+        return 0
+    with transaction(conn):
+        changed = max(conn.executemany(UPSERT_GRADE_SQL, rows).rowcount, 0)
+        if changed:
+            subject = conn.execute("SELECT subject_name FROM subjects WHERE id = ?",
+                                   (int(subject_id),)).fetchone()
+            log_activity(conn, "grades", "saved",
+                         f"Saved {changed} {term} grades for {subject[0] if subject else subject_id}")
+    return changed
+
+
+def _filter_clause(listing, filters):
+    """WHERE fragments and parameters for equality filters on allowed columns"""
+    clauses, params = [], []
+    for column, value in (filters or {}).items():
+        if column not in listing["filters"]:
+            raise ValueError(f"Cannot filter on {column}")
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return clauses, params
+
+
+def _keyset_segments(column, descending, after):
+    """Conditions, in page order, for the rows after a (sort value, id) cursor.
+
+    Rows are ordered by column then id, with NULLs first ascending and last
+    descending as SQLite does. Rows with a value are matched with a row-value
+    comparison so the sort index is entered at the cursor instead of scanned
+    from the start; rows with a NULL sort value are a separate segment.
+    """
+    value, last_id = after if after is not None else (None, None)
+    op = "<" if descending else ">"
+    nulls = (f"{column} IS NULL", [])
+    if last_id is not None and value is None:
+        nulls = (f"{column} IS NULL AND id {op} ?", [last_id])
+    values = (f"{column} IS NOT NULL", [])
+    if value is not None:
+        values = (f"({column}, id) {op} (?, ?)", [value, last_id])
+
+    if descending:
+        return [values, nulls] if value is not None or after is None else [nulls]
+    return [values] if value is not None else [nulls, values]
+
+
+def list_page(conn, table, filters=None, sort="name", descending=False, after=None, limit=50):
+    """One page of the students or teachers listing.
+
+    filters maps filterable columns to required values, after is the
+    (sort value, id) of the last row of the previous page (None for the
+    first page). Ordering is by the sort column then id, so the sort
+    indexes serve both the ORDER BY and the page boundary.
+    """
+    listing = LISTINGS[table]
+    if sort not in listing["sorts"]:
+        raise ValueError(f"Cannot sort on {sort}")
+    filter_clauses, filter_params = _filter_clause(listing, filters)
+    direction = "DESC" if descending else "ASC"
+    if sort == "id":
+        segments = [(f"id {'<' if descending else '>'} ?", [after[1]]) if after else ("1", [])]
+        order = f"id {direction}"
+    else:
+        segments = _keyset_segments(sort, descending, after)
+        order = f"{sort} {direction}, id {direction}"
+
+    pages = []
+    remaining = int(limit)
+    for clause, params in segments:
+        where = " AND ".join(filter_clauses + [clause])
+        page = pd.read_sql(f"SELECT * FROM {table} WHERE {where} ORDER BY {order} LIMIT ?",
+                           conn, params=filter_params + params + [remaining])
+        pages.append(page)
+        remaining -= len(page)
+        if remaining <= 0:
+            break
+    pages = [page for page in pages if not page.empty] or pages[:1]
+    return pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+
+
+def page_cursor(page, sort):
+    """The (sort value, id) cursor after the last row of a page"""
+    last = page.iloc[-1]
+    value = None if pd.isna(last[sort]) else last[sort]
+    # NumPy scalars from pandas can't be bound as SQLite parameters
+    value = value.item() if hasattr(value, "item") else value
+    return value, int(last["id"])
+
+
+def count_rows(conn, table, filters=None):
+    """Total rows in a listing, read from its trigger-maintained counts table"""
+    listing = LISTINGS[table]
+    clauses, params = _filter_clause(listing, filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    # Counts tables are written by triggers, so the cache watches the base table
+    return cached_rows(conn, f"SELECT COALESCE(SUM(n), 0) FROM {listing['counts']} {where}",
+                       [table], params)[0][0]
+
+
+def filter_options(conn, table):
+    """Distinct non-empty values of each filter column, from the counts table"""
+    listing = LISTINGS[table]
+    return {
+        column: [row[0] for row in cached_rows(
+            conn, f"SELECT DISTINCT {column} FROM {listing['counts']} WHERE {column} != '' ORDER BY 1",
+            [table])]
+        for column in listing["filters"]
+    }
+
+
+def student_search_query(term):
+    """FTS5 query matching every word of term as a prefix, e.g. 'ade ok' -> '"ade"* "ok"*'"""
+    words = re.findall(r"\w+", term)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_students(conn, term, limit=50):
+    """Students whose name, roll number, parent name or contact match term.
+
+    Returns (DataFrame, ranked). When at most SEARCH_RANK_LIMIT students
+    match, they are ordered by bm25 relevance. Broader terms (a two-letter
+    prefix, say) would have to score every hit, so the first matches are
+    returned unranked instead and ranked is False.
+    """
+    query = student_search_query(term)
+    if not query:
+        return pd.read_sql("SELECT * FROM students WHERE 0", conn), True
+    candidates = conn.execute(
+        "SELECT COUNT(*) FROM (SELECT rowid FROM students_fts WHERE students_fts MATCH ? LIMIT ?)",
+        (query, SEARCH_RANK_LIMIT + 1),
+    ).fetchone()[0]
+    if candidates > SEARCH_RANK_LIMIT:
+        return pd.read_sql(
+            """
+            SELECT s.*
+            FROM (SELECT rowid FROM students_fts WHERE students_fts MATCH ? LIMIT ?) f
+            JOIN students s ON s.id = f.rowid
+            """,
+            conn, params=(query, int(limit)),
+        ), False
+    weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+    return pd.read_sql(
+        f"""
+        SELECT s.*
+        FROM students_fts
+        JOIN students s ON s.id = students_fts.rowid
+        WHERE students_fts MATCH ?
+        ORDER BY bm25(students_fts, {weights})
+        LIMIT ?
+        """,
+        conn, params=(query, int(limit)),
+    ), True
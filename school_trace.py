@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Statement tracing for school.db.
+
+TracingConnection (a school_db.SchoolConnection, so the query cache keeps
+working) hands out TracingCursors, which time every statement from execute
+until its last row is fetched, pd.read_sql included, and record the SQL,
+the shape of its parameters (types, never values), the duration and the
+row count with the module's QueryTracer. Statements slower than the
+tracer's threshold get their EXPLAIN QUERY PLAN captured, and plans that
+read a whole table (a SCAN without an index) are flagged. Records are kept
+in memory for the Admin page and, when a log path is set, appended to a
+JSON-lines file for offline analysis:
+
+    pd.read_json("school_trace.jsonl", lines=True)
+
+Tracing is off until enabled, from the Admin page or with
+tracer.enabled = True; while off, statements go straight through.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from school_db import SchoolConnection, SchoolCursor
+
+TRACE_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "school_trace.jsonl")
+SLOW_MS = 20.0
+MAX_RECORDS = 5000
+ITER_BATCH = 256
+
+EXPLAINABLE = re.compile(r"^\s*(?:SELECT|WITH|INSERT|REPLACE|UPDATE|DELETE)\b", re.IGNORECASE)
+# "SCAN students", but not "SCAN students USING INDEX ..." or a virtual table
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+
+def _shape(parameters):
+    """Parameter types without their values, e.g. 'int, str' or 'name: str'"""
+    if isinstance(parameters, dict):
+        return ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items())
+    return ", ".join(type(v).__name__ for v in parameters)
+
+
+def full_scans(plan):
+    """Tables read in full according to EXPLAIN QUERY PLAN detail lines"""
+    return [m.group(1) for m in (FULL_SCAN.match(line) for line in plan) if m]
+
+
+class QueryTracer:
+    """Recent statement records, with plans captured for slow ones"""
+
+    def __init__(self, slow_ms=SLOW_MS, max_records=MAX_RECORDS, log_path=None):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_name = None
+
+    def record(self, conn, sql, shape, parameters, seconds, rows):
+        """Store one finished statement; explains it when it was slow"""
+        entry = {
+            "at": time.time(),
+            "sql": " ".join(sql.split()),
+            "params": shape,
+            "ms": round(seconds * 1000, 3),
+            "rows": rows,
+            "plan": None,
+            "full_scans": [],
+        }
+        if entry["ms"] >= self.slow_ms and EXPLAINABLE.match(sql):
+            entry["plan"] = self.explain(conn, sql, parameters)
+            entry["full_scans"] = full_scans(entry["plan"] or [])
+        with self._lock:
+            self._records.append(entry)
+            if self.log_path:
+                if self._log_name != self.log_path:
+                    if self._log is not None:
+                        self._log.close()
+                    self._log = open(self.log_path, "a", encoding="utf-8")
+                    self._log_name = self.log_path
+                self._log.write(json.dumps(entry) + "\n")
+                self._log.flush()
+
+    @staticmethod
+    def explain(conn, sql, parameters):
+        """EXPLAIN QUERY PLAN detail lines, or None when the plan can't be had"""
+        try:
+            # The base class execute, so explaining is not traced itself
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        except sqlite3.Error:
+            return None
+        return [row[3] for row in rows]
+
+    def records(self):
+        """DataFrame of the recorded statements, oldest first"""
+        with self._lock:
+            records = list(self._records)
+        frame = pd.DataFrame(records, columns=["at", "sql", "params", "ms", "rows", "plan",
+                                               "full_scans"])
+        frame["at"] = pd.to_datetime(frame["at"], unit="s")
+        return frame
+
+    def summary(self):
+        """Per statement text: calls, total, mean and max ms, rows, and any full scans"""
+        frame = self.records()
+        frame["full_scan"] = frame["full_scans"].map(bool)
+        return (frame.groupby("sql", as_index=False)
+                .agg(calls=("ms", "size"), total_ms=("ms", "sum"), mean_ms=("ms", "mean"),
+                     max_ms=("ms", "max"), rows=("rows", "sum"), full_scan=("full_scan", "any"))
+                .round({"total_ms": 2, "mean_ms": 3})
+                .sort_values("total_ms", ascending=False, ignore_index=True))
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+            self._log = self._log_name = None
+
+
+tracer = QueryTracer()
+
+
+class TracingCursor(SchoolCursor):
+    """Cursor that times each statement through to its last fetched row"""
+
+    _trace = None  # [sql, shape, parameters, seconds, rows] of the running statement
+
+    def _finish(self):
+        trace, self._trace = self._trace, None
+        if trace is not None:
+            tracer.record(self.connection, *trace)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        if not tracer.enabled:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        trace = [sql, _shape(parameters), parameters, time.perf_counter() - start, 0]
+        if self.description is None:
+            trace[4] = max(self.rowcount, 0)
+            tracer.record(self.connection, *trace)
+        else:
+            self._trace = trace  # finished once its rows are fetched
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        if not tracer.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        first, count = [], 0
+
+        def counted():
+            nonlocal count
+            for parameters in seq_of_parameters:
+                if not first:
+                    first.append(parameters)
+                count += 1
+                yield parameters
+
+        start = time.perf_counter()
+        super().executemany(sql, counted())
+        seconds = time.perf_counter() - start
+        shape = f"{count} x ({_shape(first[0]) if first else ''})"
+        tracer.record(self.connection, sql, shape, first[0] if first else (), seconds,
+                      max(self.rowcount, 0))
+        return self
+
+    def _fetched(self, start, rows, done):
+        if self._trace is not None:
+            self._trace[3] += time.perf_counter() - start
+            self._trace[4] += rows
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        if self._trace is None:
+            return self
+        # Fetched in batches: timing every row would cost more than reading it
+        return self._batches()
+
+    def _batches(self):
+        while True:
+            rows = self.fetchmany(ITER_BATCH)
+            yield from rows
+            if len(rows) < ITER_BATCH:
+                return
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # A cursor dropped before its last row (e.g. execute(...).fetchone())
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class TracingConnection(SchoolConnection):
+    """SchoolConnection whose statements are recorded with the module's tracer"""
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # Through a cursor, so fetches on the returned cursor are timed too
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Single writer for school.db.
+
+Sessions hand their writes to one SchoolWriter instead of committing on
+their own connections. A background thread owns the only write
+connection, takes whatever jobs are queued (up to MAX_BATCH) and runs them
+in one BEGIN IMMEDIATE transaction, each job inside its own savepoint so a
+failing job is rolled back and reported without affecting the rest. When
+many teachers save at once they share a commit instead of queueing on the
+database lock; readers keep their own WAL connections from the pool.
+
+A job is a function taking the connection first, e.g.
+writer.run(save_attendance, date, statuses, class_name). Jobs must not
+commit, and may run again if the batch is retried: a batch that finds the
+database locked or busy (another process writing) is rolled back and
+retried with exponential backoff.
+"""
+
+import queue
+import random
+import sqlite3
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from school_db import DB_PATH, SchoolConnection, connect, transaction
+
+MAX_BATCH = 64  # jobs per transaction
+LINGER = 0.002  # seconds to wait for more jobs once one has arrived
+RETRIES = 5
+BACKOFF = 0.05  # seconds before the first retry, doubled for each one after
+LATENCY_SAMPLES = 1000
+
+
+def _locked(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future", "submitted")
+
+    def __init__(self, fn, args, kwargs):
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class SchoolWriter:
+    """Queue of write jobs run in batched transactions by one thread"""
+
+    def __init__(self, path=DB_PATH, max_batch=MAX_BATCH, linger=LINGER, retries=RETRIES,
+                 backoff=BACKOFF, factory=SchoolConnection):
+        self.path = path
+        self.max_batch = max_batch
+        self.linger = linger
+        self.retries = retries
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._counts = {"jobs": 0, "failed": 0, "batches": 0, "retries": 0}
+        self._lock = threading.Lock()
+        self._conn = connect(path, factory)
+        self._thread = threading.Thread(target=self._loop, name="school-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(conn, *args, **kwargs); returns a Future of its result"""
+        if not self._thread.is_alive():
+            raise RuntimeError("SchoolWriter is closed")
+        job = _Job(fn, args, kwargs)
+        self._queue.put(job)
+        return job.future
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn(conn, *args, **kwargs) on the writer and wait for its result"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def execute(self, sql, parameters=()):
+        """Run one statement on the writer; returns the cursor's rowcount"""
+        return self.run(lambda conn: conn.execute(sql, parameters).rowcount)
+
+    def stats(self):
+        """Job, batch and retry counts, and latency percentiles (ms) of recent jobs"""
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = sorted(self._latencies)
+        counts["queued"] = self._queue.qsize()
+        counts["mean_batch"] = round(counts["jobs"] / counts["batches"], 2) if counts["batches"] else 0.0
+        if len(latencies) >= 2:
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+            counts.update(p50_ms=round(cuts[49], 2), p95_ms=round(cuts[94], 2),
+                          max_ms=round(latencies[-1], 2))
+        return counts
+
+    def close(self):
+        """Finish the queued jobs and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._conn.close()
+
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs = [job]
+            deadline = time.perf_counter() + self.linger
+            while len(jobs) < self.max_batch:
+                try:
+                    job = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self._run_batch(jobs)
+                    return
+                jobs.append(job)
+            self._run_batch(jobs)
+
+    def _run_batch(self, jobs):
+        for attempt in range(self.retries + 1):
+            try:
+                outcomes = self._attempt(jobs)
+                break
+            except sqlite3.OperationalError as e:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                if not _locked(e) or attempt == self.retries:
+                    outcomes = [(False, e)] * len(jobs)
+                    break
+                with self._lock:
+                    self._counts["retries"] += 1
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+            except Exception as e:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                outcomes = [(False, e)] * len(jobs)
+                break
+
+        done = time.perf_counter()
+        with self._lock:
+            self._counts["batches"] += 1
+            self._counts["jobs"] += len(jobs)
+            self._counts["failed"] += sum(not ok for ok, _ in outcomes)
+            self._latencies.extend((done - job.submitted) * 1000 for job in jobs)
+        for job, (ok, value) in zip(jobs, outcomes):
+            if ok:
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(value)
+
+    def _attempt(self, jobs):
+        """Run the jobs in one transaction; [(ok, result or exception)] per job"""
+        outcomes = []
+        with transaction(self._conn):
+            for job in jobs:
+                try:
+                    # Nested, so a savepoint: a failing job leaves the others
+                    with transaction(self._conn):
+                        outcomes.append((True, job.fn(self._conn, *job.args, **job.kwargs)))
+                except sqlite3.OperationalError as e:
+                    if _locked(e):
+                        raise  # retry the whole batch
+                    outcomes.append((False, e))
+                except Exception as e:
+                    outcomes.append((False, e))
+        return outcomes
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Audit log of container verifications.
+
+Every verification (number, source, operator, validation and database
+results, latency) is appended to a SQLite file. Appends go onto an in-memory
+queue and a background thread writes them in batches, so recording never
+waits on disk. A batch that cannot be written (the file stays locked past
+the retries, say) is logged and dropped, and when the writer falls more
+than MAX_QUEUED records behind, new records are dropped and counted rather
+than held in memory without bound. Queries use the (owner, ok, ts) and (container_number, ts)
+indexes, so questions like "all failures for owner MSKU last week" stay fast
+on tens of millions of rows.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+AUDIT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "verification_audit.db")
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.5  # seconds a record may wait before its batch is written
+MAX_QUEUED = 100000  # records waiting to be written before new ones are dropped
+RETRIES = 3
+BACKOFF = 0.5  # seconds before the first retry of a failed batch, doubled after
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,            -- milliseconds since the epoch (UTC)
+    container_number TEXT NOT NULL,
+    owner TEXT NOT NULL,            -- owner code + category, e.g. MSKU
+    source TEXT NOT NULL,           -- 'manual' or 'image'
+    operator TEXT,
+    format_valid INTEGER NOT NULL,
+    format_msg TEXT,
+    db_valid INTEGER NOT NULL,
+    db_msg TEXT,
+    ok INTEGER NOT NULL,            -- format_valid AND db_valid
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS ix_audit_owner_ok_ts ON audit_log (owner, ok, ts);
+CREATE INDEX IF NOT EXISTS ix_audit_number_ts ON audit_log (container_number, ts);
+CREATE INDEX IF NOT EXISTS ix_audit_ts ON audit_log (ts);
+"""
+
+INSERT_SQL = """
+INSERT INTO audit_log (ts, container_number, owner, source, operator, format_valid,
+                       format_msg, db_valid, db_msg, ok, latency_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+COLUMNS = ["ts", "container_number", "owner", "source", "operator", "format_valid",
+           "format_msg", "db_valid", "db_msg", "ok", "latency_ms"]
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class AuditLog:
+    """Append-only verification log with a background batch writer"""
+
+    def __init__(self, path=AUDIT_DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_queued=MAX_QUEUED, retries=RETRIES, backoff=BACKOFF):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.dropped = 0  # records lost to a full queue or a failed batch
+        self._dropped_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._local = threading.local()
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._writer = threading.Thread(target=self._write_loop, name="audit-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record(self, container_number, source, format_valid, format_msg, db_valid, db_msg,
+               latency_ms=None, operator=None):
+        """Queue one verification for writing; returns immediately"""
+        try:
+            self._queue.put_nowait((
+                int(time.time() * 1000), container_number, container_number[:4], source, operator,
+                int(format_valid), format_msg, int(db_valid), db_msg,
+                int(format_valid and db_valid), latency_ms,
+            ))
+        except queue.Full:
+            self._drop(1, "audit queue full")
+
+    def _drop(self, count, reason):
+        with self._dropped_lock:
+            before = self.dropped
+            self.dropped += count
+        # Once per thousand, so a stalled writer does not flood the log
+        if before // 1000 != self.dropped // 1000 or before == 0:
+            logger.warning("Dropped %d audit records (%s), %d in total", count, reason, self.dropped)
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            # Keep collecting until the batch is full or the oldest record is due
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(conn, batch)
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        for attempt in range(self.retries + 1):
+            try:
+                with conn:
+                    conn.executemany(INSERT_SQL, batch)
+                return
+            except sqlite3.OperationalError:
+                # Locked or busy past busy_timeout, most likely; try again later
+                if attempt == self.retries:
+                    logger.exception("Could not write %d audit records", len(batch))
+                else:
+                    time.sleep(self.backoff * 2 ** attempt)
+            except Exception:
+                logger.exception("Could not write %d audit records", len(batch))
+                break
+        self._drop(len(batch), "write failed")
+
+    def close(self):
+        """Write any queued records and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def query(self, owner=None, container_number=None, outcome=None, since=None, until=None,
+              source=None, limit=1000):
+        """Most recent verifications matching the filters, newest first.
+
+        outcome is "failed", "passed" or None for both; since/until are
+        datetimes (inclusive/exclusive).
+        """
+        clauses, params = [], []
+        if owner:
+            clauses.append("owner = ?")
+            params.append(owner.upper())
+        if container_number:
+            clauses.append("container_number = ?")
+            params.append(container_number.upper())
+        if outcome in ("failed", "passed"):
+            clauses.append("ok = ?")
+            params.append(int(outcome == "passed"))
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(int(since.timestamp() * 1000))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(int(until.timestamp() * 1000))
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM audit_log {where} ORDER BY ts DESC LIMIT ?"
+        rows = self._reader().execute(sql, params + [limit]).fetchall()
+        return [dict(row) for row in rows]